@@ -1,14 +1,14 @@
 #mapping configurations for actions
-import pyautogui
 from typing import Any, Callable, Dict
 from actions.cursor_ctrl import CursorController
 from actions.keyboard_ctr import KeyBoardController
 
 class ActionMapper:
     def __init__(self, cursor: CursorController | None = None,
-                   keyboard: KeyBoardController | None = None):
-            self.cursor = cursor or CursorController()
-            self.keyboard = keyboard or KeyBoardController()
+                   keyboard: KeyBoardController | None = None,
+                   clock = None):
+            self.cursor = cursor or CursorController(clock=clock)
+            self.keyboard = keyboard or KeyBoardController(clock=clock)
 
             self.cursor_action_map: Dict[str, Callable[..., Any]] = {
                 "move_to": self.cursor.move_to, #main cursor movement action
@@ -25,11 +25,13 @@ class ActionMapper:
                 "scroll_down": self.cursor.scroll_down,
                 "SET_CLICK_COOLDOWN": self.cursor.set_click_cooldown,
                 "MAP_COORDINATES": self.cursor.map_coordinates,
+                "SET_TRANSFORM": self.cursor.set_transform,
             }
 
             self.keyboard_action_map: Dict[str, Callable[..., Any]] = {
                   "key_press": self.keyboard.press_key,
                   "type_text": self.keyboard.type_text,
+                  "write_text": self.keyboard.write_text,
                   "copy": self.keyboard.copy,
                   "paste": self.keyboard.paste,
                   "cut": self.keyboard.cut,
@@ -41,11 +43,15 @@ class ActionMapper:
                   "tab": self.keyboard.tab,
                   "escape": self.keyboard.escape,
                   "minimize_window": self.keyboard.minimize_window,
+                  "SET_ACTION_COOLDOWN": self.keyboard.set_action_cooldown,
             }
 
-    def ping_action(self, action: str, *args, **kwargs):
+    def resolve(self, action: str) -> Callable[..., Any]:
         if action in self.cursor_action_map:
-            return self.cursor_action_map[action](*args, **kwargs)
+            return self.cursor_action_map[action]
         if action in self.keyboard_action_map:
-            return self.keyboard_action_map[action](*args, **kwargs)
-        raise ValueError(f"Unknown action: {action}")
\ No newline at end of file
+            return self.keyboard_action_map[action]
+        raise ValueError(f"Unknown action: {action}")
+
+    def ping_action(self, action: str, *args, **kwargs):
+        return self.resolve(action)(*args, **kwargs)
@@ -1,9 +1,13 @@
-import pyautogui
-import time
+from gesture_rec import gesture_config as config
+from utils.clock import CLOCK
+from utils.lazy import LazyModule
+from utils.event_log import EVENT_LOG
+
+pyautogui = LazyModule("pyautogui")
 
 class CursorController:
 
-    def __init__(self, screen_width = None, screen_height = None):
+    def __init__(self, screen_width = None, screen_height = None, clock = None):
         if screen_width is None or screen_height is None:
             screen_size = pyautogui.size()
             self.screen_width = screen_size.width
@@ -13,42 +17,57 @@ class CursorController:
             self.screen_width = screen_width
             self.screen_height = screen_height
 
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.0
+        self.setup_backend()
 
+        #Click cooldown runs on the app's clock, so replayed sessions click exactly when live ones did
+        self.clock = clock or CLOCK
         self.is_dragging = False
-        self.last_click_time = 0
-        self.click_cooldown = 0.3
+        self.drag_button = 'left'
+        self.last_click_time = float("-inf")
+        self.click_cooldown = config.CLICK_COOLDOWN
+
+        #Affine camera->screen transform (ax, bx, ay, by) from calibration, None = whole frame
+        self.transform = None
+
+    def setup_backend(self):
+        #pyautogui sleeps PAUSE (0.1 s by default) after every call, which would sit on every cursor move
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = 0.0
 
     def move_to(self, x, y, duration=0.0):
         try:
             x = max(0, min(self.screen_width - 1, int(x)))
             y = max(0, min(self.screen_height - 1, int(y)))
-            pyautogui.moveTo(x, y, duration=duration)
+            if self.is_dragging:
+                #Button already held, some platforms need drag events rather than plain moves
+                pyautogui.dragTo(x, y, duration=duration, button=self.drag_button, mouseDownUp=False)
+            else:
+                pyautogui.moveTo(x, y, duration=duration)
 
         except Exception as e:
-            print(f"Error moving cursor: {e}")
+            EVENT_LOG.error(f"Error moving cursor: {e}")
     
     def move_relative(self, dx, dy):
         try:
             pyautogui.moveRel(int(dx), int(dy))
         except Exception as e:
-            print(f"Error moving cursor relatively: {e}")
+            EVENT_LOG.error(f"Error moving cursor relatively: {e}")
 
     def get_position(self):
         pos = pyautogui.position()
         return (pos.x, pos.y)
     
     def click(self, button='left', clicks = 1):
-        current_time = time.time()
+        current_time = self.clock.now()
         if current_time - self.last_click_time < self.click_cooldown:
             return
         
         try:
             pyautogui.click(button=button, clicks=clicks)
             self.last_click_time = current_time
+            EVENT_LOG.log("action", name="click", button=button, clicks=clicks)
         except Exception as e:
-            print(f"Error clicking mouse: {e}")
+            EVENT_LOG.error(f"Error clicking mouse: {e}")
 
     def left_click(self):
         self.click(button = 'left', clicks = 1)
@@ -63,30 +82,34 @@ class CursorController:
         try:
             pyautogui.mouseDown(button=button)
             self.is_dragging = True
+            self.drag_button = button
+            EVENT_LOG.log("action", name="mouse_down", button=button)
         except Exception as e:
-            print(f"Error pressing mouse button down: {e}")
+            EVENT_LOG.error(f"Error pressing mouse button down: {e}")
 
     def mouse_up(self, button='left'):
         try:
             pyautogui.mouseUp(button=button)
             self.is_dragging = False
+            EVENT_LOG.log("action", name="mouse_up", button=button)
         except Exception as e:
-            print(f"Error releasing mouse button: {e}")
+            EVENT_LOG.error(f"Error releasing mouse button: {e}")
 
-    def drag_to(self, x, y, duration = 0.2):
+    def drag_to(self, x, y, duration = 0.0):
+        #Non-blocking by default; a duration > 0 sleeps in pyautogui and stalls the caller
         try:
             x = max(0, min(self.screen_width - 1, int(x)))
             y = max(0, min(self.screen_height - 1, int(y)))
 
             pyautogui.dragTo(x, y, duration=duration, button='left')
         except Exception as e:
-            print(f"Error dragging mouse to position: {e}")
+            EVENT_LOG.error(f"Error dragging mouse to position: {e}")
 
     def scroll(self, amount):
         try:
             pyautogui.scroll(int(amount))
         except Exception as e:
-            print(f"Error scrolling mouse: {e}")
+            EVENT_LOG.error(f"Error scrolling mouse: {e}")
 
     def scroll_up(self, clicks = 3):
         self.scroll(clicks)
@@ -97,14 +120,71 @@ class CursorController:
     def set_click_cooldown(self, cooldown):
         self.click_cooldown = cooldown
 
+    def set_transform(self, transform):
+        self.transform = transform
+
     def map_coordinates(self, x, y, source_width, source_height):
-        x_norm = x / source_width
-        y_norm = y / source_height
+        if self.transform is not None:
+            ax, bx, ay, by = self.transform
+            screen_x = int(ax * x + bx)
+            screen_y = int(ay * y + by)
+        else:
+            x_norm = x / source_width
+            y_norm = y / source_height
 
-        screen_x = int(x_norm * self.screen_width)
-        screen_y = int(y_norm * self.screen_height)
+            screen_x = int(x_norm * self.screen_width)
+            screen_y = int(y_norm * self.screen_height)
 
         screen_x = max(0, min(self.screen_width - 1, screen_x))
         screen_y = max(0, min(self.screen_height - 1, screen_y))
 
-        return (screen_x, screen_y)
\ No newline at end of file
+        return (screen_x, screen_y)
+
+class RecordingCursor(CursorController):
+    #Headless cursor backend: every injection is recorded with its time instead of reaching the OS pointer
+
+    def __init__(self, screen_width = 1920, screen_height = 1080, clock = None):
+        super().__init__(screen_width, screen_height, clock)
+        self.position = (screen_width // 2, screen_height // 2)
+        self.moves = []  #(clock time, x, y)
+        self.events = []  #(clock time, name, args)
+
+    def setup_backend(self):
+        pass
+
+    def record(self, name, *args):
+        self.events.append((self.clock.now(), name, args))
+
+    def move_to(self, x, y, duration=0.0):
+        x = max(0, min(self.screen_width - 1, int(x)))
+        y = max(0, min(self.screen_height - 1, int(y)))
+        self.position = (x, y)
+        self.moves.append((self.clock.now(), x, y))
+
+    def move_relative(self, dx, dy):
+        self.move_to(self.position[0] + dx, self.position[1] + dy)
+
+    def get_position(self):
+        return self.position
+
+    def click(self, button='left', clicks = 1):
+        current_time = self.clock.now()
+        if current_time - self.last_click_time < self.click_cooldown:
+            return
+        self.last_click_time = current_time
+        self.record("click", button, clicks)
+
+    def mouse_down(self, button='left'):
+        self.is_dragging = True
+        self.drag_button = button
+        self.record("mouse_down", button)
+
+    def mouse_up(self, button='left'):
+        self.is_dragging = False
+        self.record("mouse_up", button)
+
+    def drag_to(self, x, y, duration = 0.0):
+        self.move_to(x, y)
+
+    def scroll(self, amount):
+        self.record("scroll", int(amount))
@@ -0,0 +1,138 @@
+#Cursor driver thread: moves the pointer at a fixed high rate between the (slower) camera-rate targets
+import threading
+import time
+from collections import deque
+
+from gesture_rec import gesture_config as config
+from utils.smoothing import VelocityLimiter
+
+class CursorDriver:
+
+    def __init__(self, cursor, rate_hz = config.CURSOR_DRIVER_HZ, max_speed = config.CURSOR_MAX_SPEED,
+                 interp_delay = config.CURSOR_INTERP_DELAY, max_extrapolation = config.CURSOR_MAX_EXTRAPOLATION,
+                 reset_gap = 0.25):
+        self.cursor = cursor
+        self.period = 1.0 / max(1.0, rate_hz)
+        self.max_speed = max_speed  #pixels per second
+        self.interp_delay = interp_delay
+        self.max_extrapolation = max_extrapolation
+        self.reset_gap = reset_gap
+
+        #Last two timestamped targets from the vision loop, replaced together under the lock
+        self.lock = threading.Lock()
+        self.prev_target = None
+        self.target = None
+
+        #Button presses / releases from the vision loop, applied in order with the moves
+        self.buttons = deque()
+
+        self.limiter = VelocityLimiter(max_speed * self.period)
+        self.last_sent = None
+        self.moves = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def set_target(self, x, y, timestamp = None):
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        sample = (timestamp, float(x), float(y))
+        with self.lock:
+            #After a pause, don't interpolate across the gap
+            if self.target is None or timestamp - self.target[0] > self.reset_gap:
+                self.prev_target = sample
+            else:
+                self.prev_target = self.target
+            self.target = sample
+
+    def queue_button(self, kind, button = 'left'):
+        self.buttons.append((kind, button))
+
+    def position_at(self, now):
+        with self.lock:
+            prev, target = self.prev_target, self.target
+        if target is None:
+            return None
+
+        t0, x0, y0 = prev
+        t1, x1, y1 = target
+        render = now - self.interp_delay
+        if t1 <= t0:
+            return (x1, y1)
+
+        #Interpolate inside the last interval, extrapolate a little past it, then ease back onto the target
+        over = render - t1
+        if over <= 0.0:
+            alpha = max(0.0, (render - t0) / (t1 - t0))
+        elif over <= self.max_extrapolation:
+            alpha = 1.0 + over / (t1 - t0)
+        elif over <= 2.0 * self.max_extrapolation:
+            alpha = 1.0 + (2.0 * self.max_extrapolation - over) / (t1 - t0)
+        else:
+            alpha = 1.0
+        return (x0 + alpha * (x1 - x0), y0 + alpha * (y1 - y0))
+
+    def tick(self, now, dt):
+        position = self.position_at(now)
+        if position is None:
+            return
+
+        #A press queued since the last tick lands before this tick's move, where the pointer is now; the target
+        #set in the same frame would otherwise pull the drag start up to one clamped step away
+        while self.buttons and self.buttons[0][0] == "down":
+            self.cursor.mouse_down(button=self.buttons.popleft()[1])
+
+        #Velocity clamp scaled to the actual tick length
+        self.limiter.max_speed = self.max_speed * dt
+        x, y = self.limiter.limit(*position)
+
+        point = (int(round(x)), int(round(y)))
+        if point != self.last_sent:
+            self.cursor.move_to(point[0], point[1])
+            self.last_sent = point
+            self.moves += 1
+
+        #After the move, so a release lands where the drag ended
+        while self.buttons:
+            kind, button = self.buttons.popleft()
+            if kind == "down":
+                self.cursor.mouse_down(button=button)
+            else:
+                self.cursor.mouse_up(button=button)
+
+    def run(self):
+        next_tick = time.perf_counter()
+        last = next_tick
+        while not self.stop_event.is_set():
+            now = time.perf_counter()
+            self.tick(now, max(self.period, now - last))
+            last = now
+
+            #Fixed-rate schedule; if we fell behind, skip ahead rather than bursting
+            next_tick += self.period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            else:
+                next_tick = time.perf_counter()
+
+    def start(self):
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, name="cursor-driver", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        #Never leave a button held down
+        while self.buttons:
+            kind, button = self.buttons.popleft()
+            if kind == "up":
+                self.cursor.mouse_up(button=button)
+
+    def reset(self):
+        with self.lock:
+            self.prev_target = None
+            self.target = None
+        self.limiter.reset()
@@ -0,0 +1,67 @@
+#Pinch-drag: the first pinch frame presses the button, later frames stream pointer moves, release or hand loss lets go
+from gesture_rec import gesture_config as config
+from utils.event_log import EVENT_LOG
+
+class DragController:
+
+    def __init__(self, cursor, driver = None, button = config.DRAG_BUTTON,
+                 release_frames = config.DRAG_RELEASE_FRAMES, max_hold = config.DRAG_MAX_HOLD):
+        self.cursor = cursor
+        #With a cursor driver the button events are queued behind its moves, so nothing here blocks
+        self.driver = driver
+        self.button = button
+        self.release_frames = release_frames
+        self.max_hold = max_hold
+
+        self.dragging = False
+        self.start_time = 0.0
+        self.last_held = None
+        self.missed = 0
+        #Set after a safety release, cleared once the pinch actually ends
+        self.locked_out = False
+
+    def hold(self, now):
+        #Called on every frame the drag gesture is seen; returns True while the button is down
+        self.last_held = now
+        self.missed = 0
+        if self.locked_out:
+            return False
+        if not self.dragging:
+            self.dragging = True
+            self.start_time = now
+            self.send("down")
+        return True
+
+    def update(self, now, hand_present):
+        #Called once per frame after dispatch
+        held = self.last_held == now
+        if not held:
+            self.missed += 1
+            if self.missed >= self.release_frames:
+                self.locked_out = False
+
+        if not self.dragging:
+            return
+        if not hand_present:
+            self.release("hand lost")
+        elif self.missed >= self.release_frames:
+            self.release()
+        elif now - self.start_time > self.max_hold:
+            self.release("timeout")
+            self.locked_out = True
+
+    def release(self, reason = None):
+        if not self.dragging:
+            return
+        self.dragging = False
+        self.send("up")
+        if reason is not None:
+            EVENT_LOG.log("drag_release", reason=reason)
+
+    def send(self, kind):
+        if self.driver is not None:
+            self.driver.queue_button(kind, self.button)
+        elif kind == "down":
+            self.cursor.mouse_down(button=self.button)
+        else:
+            self.cursor.mouse_up(button=self.button)
@@ -1,31 +1,40 @@
-import pyautogui 
-import time
 import platform
+from gesture_rec import gesture_config as config
+from utils.clock import CLOCK
+from utils.lazy import LazyModule
+from utils.event_log import EVENT_LOG
+
+pyautogui = LazyModule("pyautogui")
 
 class KeyBoardController:
 
-    def __init__(self):
+    def __init__(self, clock = None):
         self.os_name = platform.system()
         if self.os_name == "Darwin":
             self.modifier = "command"
         else:
             self.modifier = "ctrl"
         
-        self.last_action_time = 0
-        self.action_cooldown = 0.5
+        self.clock = clock or CLOCK
+        self.last_action_time = float("-inf")
+        self.action_cooldown = config.KEYBOARD_COOLDOWN
 
     def check_cooldown(self):
-        current_time = time.time()
+        current_time = self.clock.now()
         if current_time - self.last_action_time < self.action_cooldown:
             return False
         self.last_action_time = current_time
         return True
     
+    def set_action_cooldown(self, cooldown):
+        self.action_cooldown = cooldown
+
     def press_key(self, key):
         try:
             pyautogui.press(key)
+            EVENT_LOG.log("action", name="key_press", key=key)
         except Exception as e:
-            print(f"Error pressing key {key}: {e}")
+            EVENT_LOG.error(f"Error pressing key {key}: {e}")
 
     def hotkey(self, *keys):
         if not self.check_cooldown():
@@ -33,10 +42,9 @@ class KeyBoardController:
         
         try:
             pyautogui.hotkey(*keys)
-            shortcut_name = '+'.join(keys)
-            print(f"Pressed hotkey: {shortcut_name}")
+            EVENT_LOG.log("action", name="hotkey", keys='+'.join(keys))
         except Exception as e:
-            print(f"Error pressing hotkey {keys}: {e}")
+            EVENT_LOG.error(f"Error pressing hotkey {keys}: {e}")
 
     def type_text(self, text):
         if not self.check_cooldown():
@@ -44,9 +52,17 @@ class KeyBoardController:
         
         try:
             pyautogui.typewrite(text)
-            print(f"Typed text: {text}")
+            EVENT_LOG.log("action", name="type_text", chars=len(text))
+        except Exception as e:
+            EVENT_LOG.error(f"Error typing text: {e}")
+
+    def write_text(self, text):
+        #Single batched call, no cooldown and no echo (used for typed words)
+        try:
+            pyautogui.write(text)
+            EVENT_LOG.log("action", name="write_text", chars=len(text))
         except Exception as e:
-            print(f"Error typing text {text}: {e}")
+            EVENT_LOG.error(f"Error writing text: {e}")
 
     def copy(self):
         self.hotkey(self.modifier, 'c')
@@ -86,4 +102,28 @@ class KeyBoardController:
         if self.os_name == "Darwin":  # macOS
             self.hotkey('command', 'm')
         else:
-            self.hotkey('win', 'down')
\ No newline at end of file
+            self.hotkey('win', 'down')
+
+class RecordingKeyboard(KeyBoardController):
+    #Headless keyboard backend: key events are recorded with their time instead of reaching the OS
+
+    def __init__(self, clock = None):
+        super().__init__(clock)
+        self.events = []  #(clock time, name, args)
+
+    def record(self, name, *args):
+        self.events.append((self.clock.now(), name, args))
+
+    def press_key(self, key):
+        self.record("key_press", key)
+
+    def hotkey(self, *keys):
+        if self.check_cooldown():
+            self.record("hotkey", *keys)
+
+    def type_text(self, text):
+        if self.check_cooldown():
+            self.record("type_text", text)
+
+    def write_text(self, text):
+        self.record("write_text", text)
@@ -0,0 +1,133 @@
+#Declarative gesture -> action rules, compiled once into a (state, gesture) -> bound-callable dispatch table
+#Rule: {"state": "ACTIVE", "gesture": "Pointer", "trigger": "hold", "action": "left_click",
+#       "args": [...], "kwargs": {...}, "hold": 1.0, "interval": 0.5, "rate_limit": 0.2}
+#"*" matches every state / gesture, and string arguments starting with "$" are read from the runtime settings.
+from functools import partial
+
+from utils.tracer import TRACER
+
+TRIGGERS = ("edge", "hold", "repeat", "continuous")
+
+class CompiledRule:
+
+    __slots__ = ("name", "trigger", "call", "takes_landmarks", "hold", "interval", "rate_limit",
+                 "start_time", "fired", "last_fire", "span")
+
+    def __init__(self, name, trigger, call, takes_landmarks, hold, interval, rate_limit):
+        self.name = name
+        self.trigger = trigger
+        self.call = call
+        self.takes_landmarks = takes_landmarks
+        self.hold = hold
+        self.interval = interval
+        self.rate_limit = rate_limit
+        self.start_time = 0.0
+        self.fired = False
+        self.last_fire = float("-inf")
+        self.span = TRACER.span(f"action:{name}")
+
+    def enter(self, now):
+        self.start_time = now
+        self.fired = False
+
+    def step(self, now, landmarks, entered):
+        trigger = self.trigger
+        if trigger == "continuous":
+            due = True
+        elif trigger == "edge":
+            due = entered
+        elif trigger == "hold":
+            due = not self.fired and now - self.start_time >= self.hold
+        else:  #repeat
+            due = entered or now - self.last_fire >= self.interval
+
+        if not due or now - self.last_fire < self.rate_limit:
+            return
+        self.fired = True
+        self.last_fire = now
+        with self.span:
+            if self.takes_landmarks:
+                self.call(landmarks)
+            else:
+                self.call()
+
+class RuleEngine:
+
+    def __init__(self, table = None):
+        self.table = table or {}
+        self.active_key = None
+        self.active_rules = ()
+
+    def dispatch(self, state, gesture, landmarks, now):
+        key = (state, gesture)
+        entered = key != self.active_key
+        if entered:
+            self.active_key = key
+            self.active_rules = self.table.get(key, ())
+            for rule in self.active_rules:
+                rule.enter(now)
+
+        for rule in self.active_rules:
+            rule.step(now, landmarks, entered)
+
+    def reset(self):
+        self.active_key = None
+        self.active_rules = ()
+
+def resolve_value(value, settings):
+    if isinstance(value, str) and value.startswith("$"):
+        name = value[1:]
+        if not hasattr(settings, name):
+            raise ValueError(f"Unknown setting in rule: {value}")
+        return getattr(settings, name)
+    return value
+
+def compile_rules(rules, actions, states, gestures, settings = None, app_actions = None):
+    #app_actions: name -> callable(landmarks) for actions that need the hand (e.g. moving the pointer)
+    app_actions = app_actions or {}
+    table = {}
+    if not isinstance(rules, (list, tuple)):
+        raise ValueError(f"Rules must be a list, got {type(rules).__name__}")
+
+    for i, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            raise ValueError(f"Rule {i}: expected an object, got {type(rule).__name__}")
+        if not isinstance(rule.get("args", []), list) or not isinstance(rule.get("kwargs", {}), dict):
+            raise ValueError(f"Rule {i}: args must be a list and kwargs an object")
+        action = rule.get("action")
+        trigger = rule.get("trigger", "edge")
+        if trigger not in TRIGGERS:
+            raise ValueError(f"Rule {i}: unknown trigger {trigger!r} (expected one of {', '.join(TRIGGERS)})")
+
+        rule_states = states if rule.get("state", "*") == "*" else [rule["state"]]
+        rule_gestures = gestures if rule.get("gesture", "*") == "*" else [rule["gesture"]]
+        for name in rule_states:
+            if name not in states:
+                raise ValueError(f"Rule {i}: unknown state {name!r}")
+        for name in rule_gestures:
+            if name not in gestures:
+                raise ValueError(f"Rule {i}: unknown gesture {name!r}")
+
+        args = [resolve_value(arg, settings) for arg in rule.get("args", [])]
+        kwargs = {key: resolve_value(value, settings) for key, value in rule.get("kwargs", {}).items()}
+
+        if action in app_actions:
+            takes_landmarks = True
+            call = app_actions[action]
+        else:
+            takes_landmarks = False
+            call = actions.resolve(action)
+        if args or kwargs:
+            call = partial(call, *args, **kwargs)
+
+        hold = float(resolve_value(rule.get("hold", 0.0), settings))
+        interval = float(resolve_value(rule.get("interval", 0.0), settings))
+        rate_limit = float(resolve_value(rule.get("rate_limit", 0.0), settings))
+
+        #Each (state, gesture) pair gets its own rule object so hold/repeat timers are independent
+        for state in rule_states:
+            for gesture in rule_gestures:
+                compiled = CompiledRule(action, trigger, call, takes_landmarks, hold, interval, rate_limit)
+                table.setdefault((state, gesture), []).append(compiled)
+
+    return {key: tuple(value) for key, value in table.items()}
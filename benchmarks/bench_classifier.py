@@ -0,0 +1,92 @@
+#Classifier throughput and boundary fuzzing on synthetic hands
+#usage: python -m benchmarks.bench_classifier --samples 2000 --steps 41 --pair Pinch Fist
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+from gesture_rec.gesture_class import GestureClassifier
+from gesture_rec.synthetic import SyntheticHand, POSES, blend
+
+DEFAULT_PAIRS = [
+    (GestureClassifier.GESTURE_PINCH, GestureClassifier.GESTURE_FIST),
+    (GestureClassifier.GESTURE_PINCH, GestureClassifier.GESTURE_FIVE_FINGERS),
+    (GestureClassifier.GESTURE_POINTER, GestureClassifier.GESTURE_PEACE),
+    (GestureClassifier.GESTURE_FIST, GestureClassifier.GESTURE_THUMBS_UP),
+    (GestureClassifier.GESTURE_THUMBS_UP, GestureClassifier.GESTURE_THUMBS_DOWN),
+    (GestureClassifier.GESTURE_THREE_FINGERS_UP, GestureClassifier.GESTURE_THREE_FINGERS_DOWN),
+    (GestureClassifier.GESTURE_FOUR_FINGERS, GestureClassifier.GESTURE_FIVE_FINGERS),
+]
+
+def throughput(hand, classifier, samples, gen_kwargs):
+    print(f"== throughput / accuracy ({samples} poses per gesture)")
+    print(f"{'gesture':<18} {'accuracy':>9}  most common")
+    total_calls = 0
+    total_time = 0.0
+    gen_time = 0.0
+    for gesture in POSES:
+        start = time.perf_counter()
+        batch = hand.gesture_batch(gesture, samples, **gen_kwargs)
+        gen_time += time.perf_counter() - start
+        hands = hand.to_landmarks(batch)
+
+        start = time.perf_counter()
+        labels = [classifier.classify_gesture(lm) for lm in hands]
+        total_time += time.perf_counter() - start
+        total_calls += len(hands)
+
+        counts = Counter(labels)
+        common = ", ".join(f"{label} {n}" for label, n in counts.most_common(3))
+        print(f"{gesture:<18} {counts[gesture] / samples:>9.3f}  {common}")
+
+    print(f"classify_gesture: {total_calls / total_time:,.0f} calls/s "
+          f"({1e6 * total_time / total_calls:.1f} us/call); "
+          f"pose generation {total_calls / gen_time:,.0f} poses/s")
+
+def fuzz_pair(hand, classifier, a, b, steps, per_step, stable, gen_kwargs):
+    ts = np.linspace(0.0, 1.0, steps)
+    rows = []
+    for t in ts:
+        params = np.repeat(blend(a, b, t)[None], per_step, axis=0)
+        labels = [classifier.classify_gesture(lm) for lm in hand.to_landmarks(hand.generate(params, **gen_kwargs))]
+        label, count = Counter(labels).most_common(1)[0]
+        rows.append((t, label, count / per_step))
+
+    transitions = [f"{prev[1]}->{row[1]} @ t={row[0]:.2f}" for prev, row in zip(rows, rows[1:]) if prev[1] != row[1]]
+    unstable = [row for row in rows if row[2] < stable]
+    print(f"{a} -> {b}: {' | '.join(transitions) or 'no majority change'}")
+    if unstable:
+        lo, hi = unstable[0][0], unstable[-1][0]
+        worst = min(unstable, key=lambda row: row[2])
+        print(f"    unstable ({len(unstable)}/{steps} steps below {stable:.0%} agreement) in t=[{lo:.2f}, {hi:.2f}], "
+              f"worst t={worst[0]:.2f}: {worst[1]} only {worst[2]:.0%}")
+    if all(row[1] != b for row in rows):
+        print(f"    never classified as {b}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=41)
+    parser.add_argument("--per-step", type=int, default=200)
+    parser.add_argument("--stable", type=float, default=0.9, help="agreement below this marks a step unstable")
+    parser.add_argument("--noise", type=float, default=1.0)
+    parser.add_argument("--rotation", type=float, default=15.0)
+    parser.add_argument("--tilt", type=float, default=10.0)
+    parser.add_argument("--dropout", type=float, default=0.0)
+    parser.add_argument("--pair", nargs=2, action="append", metavar=("FROM", "TO"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    gen_kwargs = {"noise": args.noise, "rotation": args.rotation, "tilt": args.tilt, "dropout": args.dropout}
+    hand = SyntheticHand(seed=args.seed)
+    classifier = GestureClassifier()
+
+    throughput(hand, classifier, args.samples, gen_kwargs)
+
+    print(f"\n== boundary fuzz ({args.steps} steps x {args.per_step} poses)")
+    for a, b in args.pair or DEFAULT_PAIRS:
+        fuzz_pair(hand, classifier, a, b, args.steps, args.per_step, args.stable, gen_kwargs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#Per-frame IPC overhead of the out-of-process detector (round trip minus the worker's detection time)
+#usage: python -m benchmarks.bench_detect_ipc --frames 2000 [--backend solutions] [--pipelined] [--crash-test]
+#The default "replay" backend (nothing recorded = no hands) skips MediaPipe so only the shared-memory hand-over and pipe messages are measured.
+import argparse
+import os
+import signal
+import statistics
+import time
+
+import numpy as np
+
+from gesture_rec import gesture_config as config
+from gesture_rec.detect_worker import DetectionWorker
+from gesture_rec.detector_backends import BACKENDS
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--backend", default="replay", choices=sorted(BACKENDS))
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--crash-test", action="store_true", help="kill the worker mid-run and time the recovery")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    worker = DetectionWorker(backend=args.backend, pipelined=args.pipelined)
+    print(f"worker ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (config.FRAME_HEIGHT, config.FRAME_WIDTH, 3), dtype=np.uint8)
+    ipc = []
+    killed_at = None
+    recovered_at = None
+    try:
+        i = 0
+        while i < args.frames or (killed_at is not None and recovered_at is None
+                                  and time.perf_counter() - killed_at < config.DETECTOR_PROCESS_START_TIMEOUT):
+            i += 1
+            if args.crash_test and i == args.frames // 2:
+                os.kill(worker.process.pid, signal.SIGKILL)
+                killed_at = time.perf_counter()
+            sent = time.perf_counter()
+            results = worker.detect_hands(frame)
+            elapsed = time.perf_counter() - sent
+            if killed_at is not None and recovered_at is None and worker.ready and results.timestamp_ms is not None:
+                recovered_at = time.perf_counter()
+            if results.timestamp_ms is None:
+                #Worker restarting; frames keep coming at camera pace meanwhile
+                time.sleep(1.0 / 30.0)
+            elif not args.pipelined:
+                ipc.append((elapsed * 1000.0) - worker.detect_ms)
+            else:
+                ipc.append(elapsed * 1000.0)
+    finally:
+        worker.cleanup()
+
+    ipc.sort()
+    label = "detect_hands call" if args.pipelined else "IPC overhead"
+    print(f"{label}: mean {statistics.mean(ipc):.3f} ms, p50 {ipc[len(ipc) // 2]:.3f} ms, "
+          f"p95 {ipc[int(len(ipc) * 0.95)]:.3f} ms, p99 {ipc[int(len(ipc) * 0.99)]:.3f} ms over {len(ipc)} frames")
+    if killed_at is not None:
+        recovery = f"{(recovered_at - killed_at) * 1000:.0f} ms" if recovered_at else "not recovered"
+        print(f"restarts: {worker.restarts}, recovery after kill: {recovery}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#Latency / accuracy trade-off of the detector input scale
+#usage: python -m benchmarks.bench_detector_scale --source clip.mp4 --scales 1.0 0.75 0.5 0.33
+import argparse
+import math
+import time
+
+import cv2
+
+from gesture_rec.hand_detect import HandDetector
+from gesture_rec.gesture_class import GestureClassifier
+from gesture_rec import gesture_config as config
+
+def load_frames(source, max_frames):
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_WIDTH)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_HEIGHT)
+    frames = []
+    while len(frames) < max_frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.flip(frame, 1))
+    cap.release()
+    return frames
+
+def run_scale(frames, scale):
+    detector = HandDetector(input_scale=scale)
+    classifier = GestureClassifier()
+    latencies = []
+    hands = []
+    gestures = []
+    try:
+        for frame in frames:
+            start = time.perf_counter()
+            results = detector.detect_hands(frame)
+            landmarks = detector.get_landmarks(results)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+            hand = landmarks[0] if landmarks else None
+            hands.append(hand)
+            gestures.append(classifier.classify_gesture(hand) if hand else GestureClassifier.GESTURE_NONE)
+    finally:
+        detector.cleanup()
+    return latencies, hands, gestures
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="0", help="camera index or video file")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.75, 0.5, 0.33, 0.25])
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    if not frames:
+        raise RuntimeError(f"No frames read from {args.source}")
+
+    #Full resolution is the reference every other scale is scored against
+    scales = [1.0] + [s for s in args.scales if s != 1.0]
+    runs = {scale: run_scale(frames, scale) for scale in scales}
+    _, ref_hands, ref_gestures = runs[1.0]
+
+    h, w = frames[0].shape[:2]
+    print(f"{len(frames)} frames at {w}x{h}")
+    print(f"{'scale':>6} {'input':>9} {'p50 ms':>8} {'p95 ms':>8} {'detect%':>8} {'err px':>8} {'gesture%':>9}")
+    for scale in scales:
+        latencies, hands, gestures = runs[scale]
+        detected = sum(1 for hand in hands if hand)
+
+        errors = []
+        for hand, ref in zip(hands, ref_hands):
+            if hand and ref:
+                errors.append(sum(math.hypot(a['x'] - b['x'], a['y'] - b['y']) for a, b in zip(hand, ref)) / len(ref))
+        err = sum(errors) / len(errors) if errors else float("nan")
+
+        agree = sum(1 for g, r in zip(gestures, ref_gestures) if g == r) / len(frames)
+        size = f"{int(round(w * scale))}x{int(round(h * scale))}"
+        print(f"{scale:>6.2f} {size:>9} {percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.95):>8.2f} "
+              f"{100.0 * detected / len(frames):>8.1f} {err:>8.2f} {100.0 * agree:>9.1f}")
+
+if __name__ == "__main__":
+    main()
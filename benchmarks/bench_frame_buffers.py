@@ -0,0 +1,74 @@
+#Per-frame allocations of the capture -> mirror -> detector input path, per-frame copies vs the buffer pool
+#usage: python -m benchmarks.bench_frame_buffers --frames 500 --scale 0.5
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from gesture_rec import gesture_config as config
+from gesture_rec.hand_detect import prepare_detector_input
+from utils.buffers import BufferPool
+
+def legacy_step(frame, scale, pool):
+    mirrored = cv2.flip(frame, 1)
+    small = cv2.resize(mirrored, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+
+def pooled_flip_step(frame, scale, pool):
+    mirrored = cv2.flip(frame, 1, dst=pool.get("mirror", frame.shape))
+    return prepare_detector_input(mirrored, scale, pool)
+
+def pooled_mirror_coords_step(frame, scale, pool):
+    return prepare_detector_input(frame, scale, pool)
+
+def measure(step, frames, scale):
+    pool = BufferPool()
+    capture = np.empty_like(frames[0])
+
+    #Warm up so one-off buffer creation is not counted as steady state
+    for frame in frames[:5]:
+        np.copyto(capture, frame)
+        step(capture, scale, pool)
+    warm_allocations = pool.allocations
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    for frame in frames:
+        #stands in for cap.read(capture) writing into the reused capture buffer
+        np.copyto(capture, frame)
+        step(capture, scale, pool)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ms": elapsed * 1000.0 / len(frames),
+        "pool_allocs": (pool.allocations - warm_allocations) / len(frames),
+        "peak_kb": (peak - base) / 1024.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--scale", type=float, default=config.DETECTOR_INPUT_SCALE)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (config.FRAME_HEIGHT, config.FRAME_WIDTH, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    print(f"{args.frames} frames at {config.FRAME_WIDTH}x{config.FRAME_HEIGHT}, detector scale {args.scale}")
+    print(f"{'path':<22} {'ms/frame':>9} {'pool allocs/frame':>18} {'peak transient KB':>18}")
+    for name, step in (("copy per frame", legacy_step),
+                       ("pooled + flip", pooled_flip_step),
+                       ("pooled, mirror coords", pooled_mirror_coords_step)):
+        result = measure(step, frames, args.scale)
+        allocs = "n/a" if step is legacy_step else f"{result['pool_allocs']:.3f}"
+        print(f"{name:<22} {result['ms']:>9.3f} {allocs:>18} {result['peak_kb']:>18.1f}")
+
+if __name__ == "__main__":
+    main()
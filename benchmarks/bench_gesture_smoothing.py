@@ -0,0 +1,87 @@
+#Flicker and latency of HMM gesture smoothing on synthetic gesture sequences
+#usage: python -m benchmarks.bench_gesture_smoothing --frames 5000 --noise 3 --dropout 0.03 --lag 2
+import argparse
+import time
+
+import numpy as np
+
+from gesture_rec.gesture_class import GestureClassifier
+from gesture_rec.gesture_smoothing import GestureHMM
+from gesture_rec.synthetic import SyntheticHand, POSES, blend
+
+def make_sequence(rng, frames, blend_frames, min_len, max_len):
+    #Held gestures joined by short blends; truth is None during a blend
+    gestures = [g for g in POSES if g != GestureClassifier.GESTURE_FOUR_FINGERS]
+    params, truth = [], []
+    current = rng.choice(gestures)
+    while len(params) < frames:
+        for _ in range(rng.integers(min_len, max_len)):
+            params.append(blend(current, current, 0.0))
+            truth.append(current)
+        following = rng.choice([g for g in gestures if g != current])
+        for k in range(blend_frames):
+            params.append(blend(current, following, (k + 1) / (blend_frames + 1)))
+            truth.append(None)
+        current = following
+    return np.array(params[:frames]), truth[:frames]
+
+def runs(labels):
+    lengths = []
+    count = 1
+    for prev, label in zip(labels, labels[1:]):
+        if label == prev:
+            count += 1
+        else:
+            lengths.append(count)
+            count = 1
+    lengths.append(count)
+    return lengths
+
+def report(name, labels, truth, shift):
+    changes = sum(1 for a, b in zip(labels, labels[1:]) if a != b)
+    short = sum(1 for n in runs(labels) if n < 3)
+    scored = [(labels[i + shift], t) for i, t in enumerate(truth) if t is not None and i + shift < len(labels)]
+    accuracy = sum(label == t for label, t in scored) / max(1, len(scored))
+    print(f"{name:<10} changes/100 frames {100 * changes / len(labels):6.2f}   runs < 3 frames {short:5d}   "
+          f"accuracy {accuracy:.3f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--noise", type=float, default=3.0)
+    parser.add_argument("--dropout", type=float, default=0.03)
+    parser.add_argument("--tilt", type=float, default=20.0)
+    parser.add_argument("--lag", type=int, default=None, help="override GESTURE_HMM_LAG")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    hand = SyntheticHand(seed=args.seed)
+    classifier = GestureClassifier()
+    smoother = GestureHMM(GestureClassifier.GESTURES) if args.lag is None else GestureHMM(GestureClassifier.GESTURES, lag=args.lag)
+
+    params, truth = make_sequence(rng, args.frames, blend_frames=4, min_len=15, max_len=60)
+    hands = hand.to_landmarks(hand.generate(params, rotation=5.0, tilt=args.tilt, noise=args.noise, dropout=args.dropout))
+
+    raw, smoothed = [], []
+    classify_time = 0.0
+    update_time = 0.0
+    for landmarks in hands:
+        start = time.perf_counter()
+        label, confidence = classifier.classify_with_confidence(landmarks)
+        classify_time += time.perf_counter() - start
+        start = time.perf_counter()
+        smoothed.append(smoother.update(label, confidence))
+        update_time += time.perf_counter() - start
+        raw.append(label)
+
+    true_changes = sum(1 for a, b in zip(truth, truth[1:]) if a is not None and b is None)
+    print(f"{args.frames} frames, {true_changes} true gesture changes ({100 * true_changes / args.frames:.2f} per 100 frames), "
+          f"lag {smoother.lag}")
+    report("raw", raw, truth, 0)
+    report("smoothed", smoothed, truth, smoother.lag)
+    print(f"classify_with_confidence {1e6 * classify_time / args.frames:.1f} us/frame, "
+          f"HMM update {1e6 * update_time / args.frames:.1f} us/frame")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#End-to-end hand-motion-to-cursor latency, fully headless. A synthetic camera draws an open hand that jumps
+#between positions, the synthetic detector backend reads it back off the frame (sleeping --inference-ms to stand
+#in for the model) and a recording cursor timestamps every injected move. Per jump, latency is measured from the
+#capture time of the first frame showing the new position to the first cursor move 10% / 90% of the way there.
+#usage: python -m benchmarks.bench_latency --modes sync,worker,pipelined --driver both --steps 12 --inference-ms 15
+import argparse
+import os
+import statistics
+import tempfile
+
+from actions.cursor_ctrl import RecordingCursor
+from gesture_rec import gesture_config as config
+from gesture_rec.synthetic import SyntheticCamera, step_script
+from main import HTApp
+
+MODES = {
+    "sync": {"DETECTOR_PROCESS_ENABLED": False, "DETECTOR_PROCESS_PIPELINED": False},
+    "worker": {"DETECTOR_PROCESS_ENABLED": True, "DETECTOR_PROCESS_PIPELINED": False},
+    "pipelined": {"DETECTOR_PROCESS_ENABLED": True, "DETECTOR_PROCESS_PIPELINED": True},
+}
+
+def step_latencies(capture_times, moves, step_frames, min_distance = 20.0):
+    #(ms to 10% of the jump, ms to 90%) per jump; the settled position is the last move before the next jump
+    latencies = []
+    for start, end in zip(step_frames, step_frames[1:]):
+        t_start, t_end = capture_times[start], capture_times[end]
+        before = [m for m in moves if m[0] < t_start]
+        during = [m for m in moves if t_start <= m[0] < t_end]
+        if not before or not during:
+            continue
+        x0, y0 = before[-1][1:]
+        x1, y1 = during[-1][1:]
+        dx, dy = x1 - x0, y1 - y0
+        distance = (dx * dx + dy * dy) ** 0.5
+        if distance < min_distance:
+            continue
+
+        reached = {}
+        for t, x, y in during:
+            progress = ((x - x0) * dx + (y - y0) * dy) / (distance * distance)
+            for fraction in (0.1, 0.9):
+                if fraction not in reached and progress >= fraction:
+                    reached[fraction] = (t - t_start) * 1000.0
+        if len(reached) == 2:
+            latencies.append((reached[0.1], reached[0.9]))
+    return latencies
+
+def run_mode(mode, driver, args, profile_dir):
+    for name, value in MODES[mode].items():
+        setattr(config, name, value)
+    config.CURSOR_DRIVER_ENABLED = driver
+    config.EVENT_LOG_ENABLED = False
+
+    script = step_script(args.activate_frames, args.step_frames)
+    frames = args.activate_frames + args.steps * args.step_frames
+    camera = SyntheticCamera(script, frames, fps=args.fps)
+    cursor = RecordingCursor()
+    app = HTApp(headless=True, camera=camera, cursor=cursor, backend="synthetic",
+                backend_options={"inference_ms": args.inference_ms})
+    app.calibration_path = os.path.join(profile_dir, f"{mode}_{driver}.json")
+    app.run()
+
+    #Frames where the hand jumped (the first one after activation is where the pointer starts)
+    jumps = [args.activate_frames + k * args.step_frames for k in range(args.steps)]
+    return step_latencies(camera.capture_times, cursor.moves, jumps + [frames - 1]), len(cursor.moves)
+
+def summary(values):
+    values = sorted(values)
+    return (f"mean {statistics.mean(values):6.1f}  p50 {values[len(values) // 2]:6.1f}  "
+            f"p95 {values[min(len(values) - 1, int(len(values) * 0.95))]:6.1f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="sync,worker,pipelined")
+    parser.add_argument("--driver", default="both", choices=["on", "off", "both"])
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--steps", type=int, default=12)
+    parser.add_argument("--step-frames", type=int, default=30)
+    parser.add_argument("--activate-frames", type=int, default=20)
+    parser.add_argument("--inference-ms", type=float, default=15.0, help="simulated detector time per frame")
+    args = parser.parse_args()
+
+    drivers = {"on": [True], "off": [False], "both": [True, False]}[args.driver]
+    rows = []
+    with tempfile.TemporaryDirectory() as profile_dir:
+        for mode in args.modes.split(","):
+            for driver in drivers:
+                latencies, moves = run_mode(mode, driver, args, profile_dir)
+                rows.append((f"{mode}{' +driver' if driver else ''}", latencies, moves))
+
+    print(f"\n{args.fps:.0f} fps camera, {args.inference_ms:.0f} ms simulated inference, latency in ms from capture")
+    for name, latencies, moves in rows:
+        if not latencies:
+            print(f"{name:<18} no measurable jumps ({moves} cursor moves)")
+            continue
+        print(f"{name:<18} first move (10%): {summary([a for a, _ in latencies])}")
+        print(f"{'':<18} settled    (90%): {summary([b for _, b in latencies])}   ({len(latencies)} jumps, {moves} moves)")
+
+if __name__ == "__main__":
+    main()
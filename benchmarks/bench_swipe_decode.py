@@ -0,0 +1,83 @@
+#Swipe decoding latency and accuracy on noisy synthetic strokes
+#usage: python -m benchmarks.bench_swipe_decode --lexicon words.txt --strokes 300
+#Without --lexicon a synthetic 100k-word lexicon is generated from random syllables.
+import argparse
+import random
+import statistics
+import time
+
+from gesture_rec.swipe_keyboard import KeyboardLayout, SwipeDecoder, load_lexicon
+
+ONSETS = ["", "b", "c", "d", "f", "g", "h", "j", "k", "l", "m", "n", "p", "r", "s", "t", "v", "w",
+          "br", "ch", "cl", "cr", "dr", "fl", "gr", "pl", "pr", "sh", "sl", "st", "th", "tr"]
+VOWELS = ["a", "e", "i", "o", "u", "ai", "ea", "ee", "oo", "ou"]
+CODAS = ["", "", "d", "k", "l", "m", "n", "p", "r", "s", "t", "ck", "ng", "nt", "st"]
+
+def synthetic_lexicon(size, rng):
+    words = set()
+    while len(words) < size:
+        word = "".join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS) for _ in range(rng.randint(1, 3)))
+        if 2 <= len(word) <= 14:
+            words.add(word)
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+def stroke_for(word, layout, rng, noise, points_per_key):
+    #Fingertip path through the key centres with per-sample jitter, sampled like a camera would
+    centers = [layout.centers[word[0]]]
+    for a, b in zip(word, word[1:]):
+        if a != b:
+            centers.append(layout.centers[b])
+    if len(centers) == 1:
+        centers.append(centers[0])
+    path = []
+    for (x0, y0), (x1, y1) in zip(centers, centers[1:]):
+        for k in range(points_per_key):
+            t = k / points_per_key
+            path.append((x0 + t * (x1 - x0) + rng.gauss(0, noise), y0 + t * (y1 - y0) + rng.gauss(0, noise)))
+    path.append((centers[-1][0] + rng.gauss(0, noise), centers[-1][1] + rng.gauss(0, noise)))
+    return path
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lexicon", default=None)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--strokes", type=int, default=300)
+    parser.add_argument("--noise", type=float, default=0.15, help="key widths")
+    parser.add_argument("--points-per-key", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = load_lexicon(args.lexicon, args.size) if args.lexicon else synthetic_lexicon(args.size, rng)
+
+    start = time.perf_counter()
+    decoder = SwipeDecoder(words)
+    print(f"trie: {len(decoder.trie)} words built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    layout = KeyboardLayout()
+    #Frequent words are what people mostly type
+    targets = [w for w in words[: max(1000, args.strokes)] if len(w) >= 2]
+    times = []
+    visited = []
+    top1 = top3 = 0
+    for _ in range(args.strokes):
+        word = rng.choice(targets)
+        path = stroke_for(word, layout, rng, args.noise, args.points_per_key)
+        start = time.perf_counter()
+        candidates = decoder.decode(path, 3)
+        times.append((time.perf_counter() - start) * 1000.0)
+        visited.append(decoder.visited)
+        labels = [w for w, _ in candidates]
+        top1 += bool(labels) and labels[0] == word
+        top3 += word in labels
+
+    times.sort()
+    print(f"decode: mean {statistics.mean(times):.2f} ms, p50 {times[len(times) // 2]:.2f} ms, "
+          f"p95 {times[int(len(times) * 0.95)]:.2f} ms, max {times[-1]:.2f} ms")
+    print(f"trie nodes visited: mean {statistics.mean(visited):.0f} of {len(decoder.trie)} words")
+    print(f"accuracy: top-1 {top1 / args.strokes:.1%}, top-3 {top3 / args.strokes:.1%}")
+
+if __name__ == "__main__":
+    main()
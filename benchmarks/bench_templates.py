@@ -0,0 +1,121 @@
+#Dynamic gesture template matching as the library grows: per-frame cost, how much of the library the lower bounds
+#rule out, recognition of re-performed gestures, and agreement with an unpruned DTW search over every template.
+#Templates are synthetic movements (a pose morph while the wrist follows a random path) recorded like a user would.
+#usage: python -m benchmarks.bench_templates --sizes 10,100,500 --queries 30 --demos 2
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from gesture_rec.synthetic import SyntheticHand, POSES, blend
+from gesture_rec.templates import TemplateLibrary, TemplateMatcher, TemplateRecorder, normalize
+
+def random_spec(rng, name):
+    gestures = list(POSES)
+    return {
+        "name": name,
+        "from": gestures[rng.integers(len(gestures))],
+        "to": gestures[rng.integers(len(gestures))],
+        "path": rng.uniform(-1.5, 1.5, (3, 2)),  #wrist waypoints in hand sizes, relative to the start
+        "duration": rng.uniform(0.5, 2.0),
+    }
+
+def perform(hand, rng, spec, fps, start, speed_jitter, noise):
+    #One performance as (times, landmarks (n, 21, 4)); speed and timing vary a little each time
+    duration = spec["duration"] * rng.uniform(1.0 - speed_jitter, 1.0 + speed_jitter)
+    n = max(2, int(duration * fps))
+    warp = np.linspace(0.0, 1.0, n) ** rng.uniform(0.8, 1.25)
+    frames = hand.generate(blend(spec["from"], spec["to"], warp), rotation=5.0, scale=(100.0, 100.0), tilt=5.0, noise=noise)
+
+    #Wrist along the waypoints (piecewise linear), hand size 100 px, starting mid-frame
+    knots = np.vstack([np.zeros((1, 2)), spec["path"]])
+    segment = np.minimum((warp * (len(knots) - 1)).astype(np.int64), len(knots) - 2)
+    local = warp * (len(knots) - 1) - segment
+    target = np.array([320.0, 240.0]) + 100.0 * (knots[segment] * (1.0 - local[:, None]) + knots[segment + 1] * local[:, None])
+    frames[..., :2] += (target - frames[:, 0, :2])[:, None, :]
+    return start + np.arange(n) / fps, frames
+
+def build_library(rng, hand, count, demos, fps, noise):
+    library = TemplateLibrary()
+    recorder = TemplateRecorder()
+    specs = [random_spec(rng, f"gesture{k}") for k in range(max(1, count // demos))]
+    for spec in specs:
+        for _ in range(demos):
+            times, frames = perform(hand, rng, spec, fps, 0.0, 0.1, noise)
+            recorder.start(spec["name"], "dynamic")
+            for t, landmarks in zip(times, frames):
+                recorder.add(landmarks, t)
+            recorder.stop(library)
+    library.build_index()
+    return library, specs
+
+def run_size(count, args):
+    rng = np.random.default_rng(args.seed)
+    hand = SyntheticHand(seed=args.seed)
+    library, specs = build_library(rng, hand, count, args.demos, args.fps, args.noise)
+    matcher = TemplateMatcher(library)
+    exact = TemplateMatcher(library, max_dtw=float("inf"))
+
+    frame_ms, correct, fired, capped_agree, exact_agree = [], 0, 0, 0, 0
+    t = 0.0
+    for _ in range(args.queries):
+        spec = specs[rng.integers(len(specs))]
+        #Idle lead-in (an open hand held still), the gesture, then its last pose held for a moment
+        lead_times, lead = perform(hand, rng, {**random_spec(rng, ""), "from": "FiveFingers", "to": "FiveFingers",
+                                              "path": np.zeros((3, 2))}, args.fps, t, 0.0, args.noise)
+        times, frames = perform(hand, rng, spec, args.fps, lead_times[-1] + 1.0 / args.fps, args.speed_jitter, args.noise)
+        hold = int(0.3 * args.fps)
+        hold_times = times[-1] + np.arange(1, hold + 1) / args.fps
+        hold_frames = np.repeat(frames[-1:], hold, axis=0)
+        t = hold_times[-1] + 1.0 / args.fps
+
+        matcher.reset()
+        matcher.last_fired = None
+        result = None
+        stream = zip(np.concatenate([lead_times, times, hold_times]), np.concatenate([lead, frames, hold_frames]))
+        for ft, landmarks in stream:
+            start = time.perf_counter()
+            _, dynamic = matcher.update(landmarks, ft)
+            frame_ms.append((time.perf_counter() - start) * 1000.0)
+            if dynamic is not None and result is None and ft >= times[0]:
+                result = dynamic[0]
+        fired += result is not None
+        correct += result == spec["name"]
+
+        #Same final window through the capped, the uncapped and the brute-force search
+        history = deque((ft,) + normalize(lm) for ft, lm in zip(times, frames))
+        for probe in (matcher, exact):
+            probe.history = history
+        queries = {b: exact.query(bucket["duration"], times[-1]) for b, bucket in enumerate(library.index["buckets"])}
+        reference = exact.search(queries, library.index, prune=False)
+        capped_agree += matcher.search(queries, library.index) == reference
+        exact_agree += exact.search(queries, library.index) == reference
+
+    stats = matcher.stats
+    frame_ms.sort()
+    print(f"{len(library):>5} templates  {len(library.index['buckets']):>2} buckets   per frame: "
+          f"mean {np.mean(frame_ms):6.2f} ms  p95 {frame_ms[int(len(frame_ms) * 0.95)]:6.2f} ms   "
+          f"DTW/search {stats['dtw'] / max(1, stats['searches']):5.2f}")
+    print(f"{'':<29}pruned by PAA {stats['paa_pruned'] / max(1, stats['candidates']):6.1%}  "
+          f"by LB_Keogh {stats['keogh_pruned'] / max(1, stats['candidates']):6.1%}  "
+          f"abandoned {stats['abandoned'] / max(1, stats['dtw']):6.1%} of DTWs")
+    print(f"{'':<29}recognized {correct}/{args.queries} (fired {fired})   "
+          f"same result as unpruned search: capped {capped_agree}/{args.queries}, uncapped {exact_agree}/{args.queries}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,500", help="library sizes (templates)")
+    parser.add_argument("--demos", type=int, default=2, help="recorded demonstrations per gesture")
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--noise", type=float, default=1.0, help="landmark noise (px)")
+    parser.add_argument("--speed-jitter", type=float, default=0.15, help="+- fraction of the template duration")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for count in (int(s) for s in args.sizes.split(",")):
+        run_size(count, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#Vectorized GestureClassifier.classify_gesture for threshold tuning: the geometry of a landmark batch is reduced
+#to features once, then any number of threshold sets are applied with broadcasting, giving (sets, samples) labels.
+#The decision order and float operations mirror gesture_class.py; tune_thresholds checks the two still agree.
+import numpy as np
+
+from gesture_rec import gesture_config as config
+from gesture_rec.gesture_class import GestureClassifier
+
+GESTURES = GestureClassifier.GESTURES
+GESTURE_INDEX = {name: i for i, name in enumerate(GESTURES)}
+
+#Threshold name -> GestureClassifier attribute
+THRESHOLDS = {
+    "pinch_threshold": "PINCH_THRESHOLD",
+    "finger_tip_threshold": "FINGER_TIP_THRESHOLD",
+    "thumb_extended_ratio": "THUMB_EXTENDED_RATIO",
+    "finger_extended_ratio": "FINGER_EXTENDED_RATIO",
+    "thumb_direction_threshold": "THUMB_DIRECTION_THRESHOLD",
+    "three_fingers_direction_threshold": "THREE_FINGERS_DIRECTION_THRESHOLD",
+}
+
+def current_thresholds(classifier = None):
+    classifier = classifier or GestureClassifier
+    return {name: getattr(classifier, attr) for name, attr in THRESHOLDS.items()}
+
+def calc_distance(landmarks, i, j):
+    #GestureClassifier.calc_distance
+    dx = landmarks[:, i, 0] - landmarks[:, j, 0]
+    dy = landmarks[:, i, 1] - landmarks[:, j, 1]
+    return np.sqrt(dx * dx + dy * dy)
+
+def dist(landmarks, i, j):
+    #GestureClassifier._dist
+    return np.hypot(landmarks[:, i, 0] - landmarks[:, j, 0], landmarks[:, i, 1] - landmarks[:, j, 1])
+
+def features(landmarks):
+    #landmarks (N, 21, >=2) in the same units get_landmarks produces
+    lm = np.asarray(landmarks, dtype=np.float64)
+    hl = config.HandLandmark
+    f = {}
+
+    hand_size = calc_distance(lm, hl.WRIST, hl.MIDDLE_FINGER_MCP)
+    pinch = calc_distance(lm, hl.THUMB_TIP, hl.INDEX_FINGER_TIP)
+    f["pinch"] = np.where(hand_size > 0, pinch / np.where(hand_size > 0, hand_size, 1.0), pinch)
+
+    f["thumb_ext"] = calc_distance(lm, hl.THUMB_TIP, hl.INDEX_FINGER_MCP) > calc_distance(lm, hl.THUMB_IP, hl.INDEX_FINGER_MCP)
+    for name, tip, pip in (
+        ("index", hl.INDEX_FINGER_TIP, hl.INDEX_FINGER_PIP),
+        ("middle", hl.MIDDLE_FINGER_TIP, hl.MIDDLE_FINGER_PIP),
+        ("ring", hl.RING_FINGER_TIP, hl.RING_FINGER_PIP),
+        ("pinky", hl.PINKY_TIP, hl.PINKY_PIP),
+    ):
+        f[name + "_tip"] = calc_distance(lm, tip, hl.WRIST)
+        f[name + "_pip"] = calc_distance(lm, pip, hl.WRIST)
+
+    for name, tip, mcp in (("thumb", 4, 2), ("index", 8, 5), ("middle", 12, 9), ("ring", 16, 13), ("pinky", 20, 17)):
+        f[name + "_geom_tip"] = dist(lm, 0, tip)
+        f[name + "_geom_mcp"] = dist(lm, 0, mcp)
+
+    ref = np.hypot(lm[:, 5, 0] - lm[:, 0, 0], lm[:, 5, 1] - lm[:, 0, 1])
+    f["ref"] = np.where(ref < 1e-6, 1.0, ref)
+    f["thumb_dy"] = lm[:, 4, 1] - lm[:, 2, 1]
+    f["three_dy"] = ((lm[:, 12, 1] - lm[:, 9, 1]) + (lm[:, 16, 1] - lm[:, 13, 1]) + (lm[:, 20, 1] - lm[:, 17, 1])) / 3
+    return f
+
+def classify(f, thresholds):
+    #thresholds: name -> scalar or (S,) array; returns (S, N) int8 indices into GESTURES
+    t = {name: np.atleast_1d(np.asarray(thresholds[name], dtype=np.float64))[:, None] for name in THRESHOLDS}
+
+    pinch = f["pinch"] < t["pinch_threshold"]
+    thumb = np.broadcast_to(f["thumb_ext"], pinch.shape)
+    ext = {name: f[name + "_tip"] > (f[name + "_pip"] + t["finger_tip_threshold"]) for name in ("index", "middle", "ring", "pinky")}
+    count = thumb.astype(np.int8) + ext["index"] + ext["middle"] + ext["ring"] + ext["pinky"]
+
+    thumb_geom = f["thumb_geom_tip"] > f["thumb_geom_mcp"] * t["thumb_extended_ratio"]
+    fingers_geom = np.zeros_like(pinch)
+    for name in ("index", "middle", "ring", "pinky"):
+        fingers_geom |= f[name + "_geom_tip"] > f[name + "_geom_mcp"] * t["finger_extended_ratio"]
+    thumbs_only = thumb_geom & ~fingers_geom
+    thumb_limit = t["thumb_direction_threshold"] * f["ref"]
+    three_limit = t["three_fingers_direction_threshold"] * f["ref"]
+
+    three = (count != 2) & ext["middle"] & ext["ring"] & ext["pinky"]
+    g = GESTURE_INDEX
+    conditions = [
+        (pinch, g[GestureClassifier.GESTURE_PINCH]),
+        (count == 0, g[GestureClassifier.GESTURE_FIST]),
+        (thumbs_only & (f["thumb_dy"] < -thumb_limit), g[GestureClassifier.GESTURE_THUMBS_UP]),
+        (thumbs_only & (f["thumb_dy"] > thumb_limit), g[GestureClassifier.GESTURE_THUMBS_DOWN]),
+        (thumbs_only, g[GestureClassifier.GESTURE_NONE]),
+        (count == 5, g[GestureClassifier.GESTURE_FIVE_FINGERS]),
+        ((count == 1) & ext["index"] & ~thumb, g[GestureClassifier.GESTURE_POINTER]),
+        ((count == 2) & ext["index"] & ext["middle"], g[GestureClassifier.GESTURE_PEACE]),
+        (three & (f["three_dy"] < -three_limit), g[GestureClassifier.GESTURE_THREE_FINGERS_UP]),
+        (three & (f["three_dy"] > three_limit), g[GestureClassifier.GESTURE_THREE_FINGERS_DOWN]),
+        (three, g[GestureClassifier.GESTURE_NONE]),
+        ((count == 4) & ~thumb, g[GestureClassifier.GESTURE_FOUR_FINGERS]),
+    ]
+    return np.select([c for c, _ in conditions], [v for _, v in conditions], g[GestureClassifier.GESTURE_NONE]).astype(np.int8)
+
+def confusion(true, predicted):
+    #true (N,), predicted (S, N) -> (S, G, G) counts, rows = true label
+    g = len(GESTURES)
+    s = predicted.shape[0]
+    flat = (np.arange(s)[:, None] * g * g + true[None, :] * g + predicted).ravel()
+    return np.bincount(flat, minlength=s * g * g).reshape(s, g, g)
+
+def precision_recall(matrix):
+    #Per gesture for one (G, G) matrix; NaN where a gesture is never predicted / never present
+    tp = np.diag(matrix).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = tp / matrix.sum(axis=0)
+        recall = tp / matrix.sum(axis=1)
+    return precision, recall
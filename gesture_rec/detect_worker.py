@@ -0,0 +1,315 @@
+#Out-of-process hand detection: the detector backend runs in a child process so it never competes with the UI / actions for the GIL.
+#Frames go over a shared-memory double buffer, landmarks come back as a small fixed-size float32 array,
+#and the pipe only carries tiny control messages. A dead or hung worker is restarted in the background.
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+from gesture_rec import gesture_config as config
+from gesture_rec.detector_backends import HAND_FLOATS, HandResults, empty_results, now_ms
+from gesture_rec.hand_detect import draw_results, results_to_hand_info, results_to_landmarks
+from utils.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+class SharedBuffers:
+    #[heartbeat float64][2 frame slots][2 result slots], laid out in one segment
+
+    def __init__(self, frame_shape, max_hands, name = None):
+        self.frame_shape = tuple(frame_shape)
+        self.max_hands = max_hands
+        frame_bytes = int(np.prod(self.frame_shape))
+        result_bytes = 2 * max_hands * HAND_FLOATS * 4
+        self.frame_offset = 64
+        self.result_offset = self.frame_offset + 2 * frame_bytes
+        size = self.result_offset + result_bytes
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            #Spawned children share the parent's resource tracker, so attaching normally is fine here
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+
+        buf = self.shm.buf
+        self.heartbeat = np.ndarray((1,), dtype=np.float64, buffer=buf, offset=0)
+        self.frames = np.ndarray((2,) + self.frame_shape, dtype=np.uint8, buffer=buf, offset=self.frame_offset)
+        self.results = np.ndarray((2, max_hands, HAND_FLOATS), dtype=np.float32, buffer=buf, offset=self.result_offset)
+
+    def close(self):
+        #Views must go before the segment can be closed
+        del self.heartbeat, self.frames, self.results
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+def worker_main(conn, shm_name, frame_shape, max_hands, settings, backend, backend_options):
+    from gesture_rec.hand_detect import HandDetector, prepare_detector_input
+    from utils.buffers import BufferPool
+
+    buffers = SharedBuffers(frame_shape, max_hands, name=shm_name)
+    pool = BufferPool()
+    detector = HandDetector(pool=pool, mirror=False, backend=backend, **settings, **backend_options)
+    input_scale = settings["input_scale"]
+
+    buffers.heartbeat[0] = time.monotonic()
+    conn.send(("ready",))
+    try:
+        while True:
+            #Heartbeat while idle and after every frame
+            buffers.heartbeat[0] = time.monotonic()
+            if not conn.poll(config.DETECTOR_PROCESS_HEARTBEAT):
+                continue
+            message = conn.recv()
+            kind = message[0]
+
+            if kind == "detect":
+                _, seq, slot, height, width, timestamp_ms = message
+                start = time.perf_counter()
+                frame = buffers.frames[slot, :height, :width]
+                results = detector.backend.process(prepare_detector_input(frame, input_scale, pool), timestamp_ms)
+                count = len(results.hands)
+                buffers.results[slot, :count] = results.hands
+                conn.send(("done", seq, slot, count, time.perf_counter() - start, results.timestamp_ms))
+            elif kind == "model_complexity":
+                detector.set_model_complexity(message[1])
+            elif kind == "input_scale":
+                input_scale = message[1]
+            elif kind == "stop":
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        detector.cleanup()
+        buffers.close()
+
+class DetectionWorker:
+    #Drop-in for HandDetector: same detect / landmark / drawing methods, detection done by a child process
+
+    def __init__(self,
+        max_num_hands = config.MAX_NUM_HANDS,
+        detection_confidence = config.HAND_DETECTION_CONFIDENCE,
+        tracking_confidence = config.HAND_TRACKING_CONFIDENCE,
+        input_scale = config.DETECTOR_INPUT_SCALE,
+        model_complexity = config.MODEL_COMPLEXITY,
+        mirror = config.MIRROR_IN_COORDINATES,
+        pool = None,
+        frame_shape = (config.FRAME_HEIGHT, config.FRAME_WIDTH, 3),
+        pipelined = config.DETECTOR_PROCESS_PIPELINED,
+        backend = config.DETECTOR_BACKEND,
+        **backend_options):
+
+        self.max_num_hands = max_num_hands
+        self.settings = {
+            "max_num_hands": max_num_hands,
+            "detection_confidence": detection_confidence,
+            "tracking_confidence": tracking_confidence,
+            "input_scale": input_scale,
+            "model_complexity": model_complexity,
+        }
+        self.input_scale = input_scale
+        self.model_complexity = model_complexity
+        self.mirror = mirror
+        self.frame_shape = None
+        self.capacity_shape = tuple(frame_shape)
+        #Pipelined: frame N is detected while the parent handles frame N-1 (one frame of latency, no waiting)
+        self.pipelined = pipelined
+        self.backend = backend
+        self.backend_options = backend_options
+        self.context = multiprocessing.get_context("spawn")
+
+        self.buffers = None
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.started_at = 0.0
+        self.seq = 0
+        self.outstanding = None  #(seq, slot, sent_at) of the request in flight
+        self.last_results = empty_results()
+
+        #IPC cost per frame = round trip minus the worker's own detection time
+        self.ipc_ms = 0.0
+        self.detect_ms = 0.0
+        self.restarts = 0
+
+        self.start()
+        self.wait_ready(config.DETECTOR_PROCESS_START_TIMEOUT)
+
+    def start(self):
+        if self.buffers is None:
+            self.buffers = SharedBuffers(self.capacity_shape, self.max_num_hands)
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=worker_main,
+            args=(child_conn, self.buffers.name, self.capacity_shape, self.max_num_hands, self.settings, self.backend, self.backend_options),
+            name="hand-detector",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.ready = False
+        self.outstanding = None
+        self.started_at = time.monotonic()
+
+    def wait_ready(self, timeout):
+        if self.conn.poll(timeout):
+            self.check_ready()
+        return self.ready
+
+    def check_ready(self):
+        try:
+            while not self.ready and self.conn.poll():
+                if self.conn.recv()[0] == "ready":
+                    self.ready = True
+                    #Settings may have changed while it was starting
+                    self.conn.send(("model_complexity", self.model_complexity))
+                    self.conn.send(("input_scale", self.input_scale))
+        except (EOFError, OSError):
+            pass
+        return self.ready
+
+    def restart(self, reason):
+        print(f"[detector] worker {reason}, restarting")
+        self.restarts += 1
+        self.kill()
+        self.start()
+
+    def resize_buffers(self, frame_shape):
+        self.capacity_shape = (max(frame_shape[0], self.capacity_shape[0]), max(frame_shape[1], self.capacity_shape[1])) + tuple(frame_shape[2:])
+        print(f"[detector] frame {tuple(frame_shape)} does not fit the worker buffer, reallocating {self.capacity_shape}")
+        self.kill()
+        if self.buffers is not None:
+            self.buffers.close()
+            self.buffers = None
+        self.restarts += 1
+        self.start()
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1.0)
+        if self.conn is not None:
+            self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def healthy(self):
+        if self.process is None or not self.process.is_alive():
+            self.restart("exited")
+            return False
+        if not self.ready:
+            if self.check_ready():
+                return True
+            if time.monotonic() - self.started_at > config.DETECTOR_PROCESS_START_TIMEOUT:
+                self.restart("did not start")
+            return False
+        if self.outstanding is None and time.monotonic() - self.buffers.heartbeat[0] > config.DETECTOR_PROCESS_HANG_TIMEOUT:
+            self.restart("missed heartbeats")
+            return False
+        return True
+
+    def set_model_complexity(self, model_complexity):
+        if model_complexity == self.model_complexity:
+            return
+        self.model_complexity = model_complexity
+        self.settings["model_complexity"] = model_complexity
+        if self.ready:
+            self.conn.send(("model_complexity", model_complexity))
+
+    def set_input_scale(self, input_scale):
+        if input_scale == self.input_scale:
+            return
+        self.input_scale = input_scale
+        self.settings["input_scale"] = input_scale
+        if self.ready:
+            self.conn.send(("input_scale", input_scale))
+
+    def collect(self, timeout):
+        seq, slot, sent_at = self.outstanding
+        try:
+            if not self.conn.poll(timeout):
+                self.restart("timed out")
+                return empty_results()
+            _, _, done_slot, count, detect_s, timestamp_ms = self.conn.recv()
+        except (EOFError, OSError):
+            self.restart("crashed")
+            return empty_results()
+        self.outstanding = None
+
+        round_trip = time.perf_counter() - sent_at
+        self.detect_ms = detect_s * 1000.0
+        self.ipc_ms += 0.1 * ((round_trip - detect_s) * 1000.0 - self.ipc_ms)
+        return HandResults(self.buffers.results[done_slot, :count].copy(), timestamp_ms)
+
+    def detect_hands(self, frame, timestamp = None):
+        self.frame_shape = frame.shape
+        if not self.healthy():
+            return empty_results()
+        height, width = frame.shape[:2]
+        if frame.shape[2:] != self.capacity_shape[2:] or height > self.capacity_shape[0] or width > self.capacity_shape[1]:
+            #Cameras don't always honour the requested size: reallocate for it (no hands until the worker is back)
+            self.resize_buffers(frame.shape)
+            return empty_results()
+
+        previous = None
+        if self.outstanding is not None:
+            #Pipelined mode: the other slot is still being read by the worker, finish it first
+            previous = self.collect(config.DETECTOR_PROCESS_HANG_TIMEOUT)
+            if self.conn is None or not self.ready:
+                return previous
+
+        self.seq += 1
+        slot = self.seq % 2
+        np.copyto(self.buffers.frames[slot, :height, :width], frame)
+        try:
+            timestamp_ms = int(timestamp * 1000.0) if timestamp is not None else now_ms()
+            self.conn.send(("detect", self.seq, slot, height, width, timestamp_ms))
+        except (BrokenPipeError, OSError):
+            self.restart("crashed")
+            return empty_results()
+        self.outstanding = (self.seq, slot, time.perf_counter())
+
+        if self.pipelined:
+            if previous is not None:
+                self.last_results = previous
+            return self.last_results
+        return self.collect(config.DETECTOR_PROCESS_HANG_TIMEOUT)
+
+    def poll(self):
+        #Pipelined result that finished while no new frame was sent (motion gate / keyframes), else None
+        if self.outstanding is None or self.conn is None or not self.conn.poll():
+            return None
+        self.last_results = self.collect(0.0)
+        return self.last_results
+
+    def get_landmarks(self, results, frame_shape = None):
+        if not len(results):
+            return []
+        return results_to_landmarks(results, frame_shape if frame_shape is not None else self.frame_shape, self.mirror)
+
+    def get_hand_info(self, results):
+        return results_to_hand_info(results, self.mirror)
+
+    def draw_landmarks(self, frame, results,
+                       draw_landmarks = config.SHOW_LANDMARKS,
+                       draw_connections = config.SHOW_CONNECTIONS):
+        return draw_results(frame, results, draw_landmarks, draw_connections)
+
+    def cleanup(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        if self.process is not None:
+            self.process.join(timeout=2.0)
+        self.kill()
+        if self.buffers is not None:
+            self.buffers.close()
+            self.buffers = None
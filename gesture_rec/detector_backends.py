@@ -0,0 +1,256 @@
+#Interchangeable hand detection backends behind HandDetector. Every backend turns an RGB frame into the same
+#HandResults: a (hands, 86) float32 array of handedness code, score and normalized x, y, z, visibility per landmark.
+#  solutions - legacy mediapipe.solutions.hands, synchronous
+#  tasks     - MediaPipe Tasks HandLandmarker in LIVE_STREAM mode, results arrive on a callback
+#  replay    - recorded results played back in order or by frame time (no recording = no hands), for tests,
+#              headless runs and session replay (DETECTOR_RECORD_PATH, python -m utils.replay_session)
+#  synthetic - reads the hand back from SyntheticCamera frames, for the headless latency harness
+import bisect
+import threading
+import time
+
+from gesture_rec import gesture_config as config
+from utils.lazy import LazyModule
+
+np = LazyModule("numpy")
+mediapipe = LazyModule("mediapipe")
+
+NUM_LANDMARKS = 21
+HAND_FLOATS = 2 + NUM_LANDMARKS * 4
+HANDEDNESS_CODES = {"Left": 1.0, "Right": 2.0}
+HANDEDNESS_NAMES = {1: "Left", 2: "Right"}
+
+class HandResults:
+
+    __slots__ = ("hands", "timestamp_ms")
+
+    def __init__(self, hands, timestamp_ms = None):
+        self.hands = hands  #(count, HAND_FLOATS), count may be 0
+        self.timestamp_ms = timestamp_ms
+
+    def __len__(self):
+        return len(self.hands)
+
+def empty_results(timestamp_ms = None):
+    return HandResults(np.zeros((0, HAND_FLOATS), dtype=np.float32), timestamp_ms)
+
+def pack_hands(landmark_lists, categories, max_hands, timestamp_ms = None):
+    #landmark_lists: per hand, 21 objects with x / y / z (/ visibility); categories: per hand, (label, score) or None
+    count = min(max_hands, len(landmark_lists))
+    hands = np.zeros((count, HAND_FLOATS), dtype=np.float32)
+    for i in range(count):
+        label, score = categories[i] if i < len(categories) and categories[i] else (None, 0.0)
+        values = [HANDEDNESS_CODES.get(label, 0.0), score]
+        for landmark in landmark_lists[i]:
+            visibility = getattr(landmark, "visibility", None)
+            values += (landmark.x, landmark.y, landmark.z, 1.0 if visibility is None else visibility)
+        hands[i] = values
+    return HandResults(hands, timestamp_ms)
+
+class SolutionsBackend:
+
+    name = "solutions"
+
+    def __init__(self, max_num_hands, detection_confidence, tracking_confidence, model_complexity):
+        self.max_num_hands = max_num_hands
+        self.detection_confidence = detection_confidence
+        self.tracking_confidence = tracking_confidence
+        self.model_complexity = model_complexity
+        self.hands = self.build()
+
+    def build(self):
+        return mediapipe.solutions.hands.Hands(static_image_mode=False,
+            max_num_hands=self.max_num_hands,
+            model_complexity=self.model_complexity,
+            min_detection_confidence=self.detection_confidence,
+            min_tracking_confidence=self.tracking_confidence)
+
+    def set_model_complexity(self, model_complexity):
+        #Needs a new graph, only rebuild when it actually changes
+        if model_complexity == self.model_complexity:
+            return
+        self.model_complexity = model_complexity
+        self.hands.close()
+        self.hands = self.build()
+
+    def process(self, rgb, timestamp_ms):
+        results = self.hands.process(rgb)
+        if not results.multi_hand_landmarks:
+            return empty_results(timestamp_ms)
+        categories = []
+        for handedness in results.multi_handedness or []:
+            top = handedness.classification[0]
+            categories.append((top.label, top.score))
+        landmarks = [hand.landmark for hand in results.multi_hand_landmarks]
+        return pack_hands(landmarks, categories, self.max_num_hands, timestamp_ms)
+
+    def close(self):
+        self.hands.close()
+
+class TasksBackend:
+    #detect_async() returns immediately; the graph runs on MediaPipe's own thread and the callback stores the
+    #newest result, which process() hands back while the next frame is being captured (about one frame behind)
+
+    name = "tasks"
+
+    def __init__(self, max_num_hands, detection_confidence, tracking_confidence, model_complexity,
+                 model_path = config.HAND_LANDMARKER_MODEL):
+        self.max_num_hands = max_num_hands
+        self.model_complexity = model_complexity  #single model, kept for interface parity
+        vision = mediapipe.tasks.vision
+        options = vision.HandLandmarkerOptions(
+            base_options=mediapipe.tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_hands=max_num_hands,
+            min_hand_detection_confidence=detection_confidence,
+            min_hand_presence_confidence=detection_confidence,
+            min_tracking_confidence=tracking_confidence,
+            result_callback=self.on_result,
+        )
+        self.landmarker = vision.HandLandmarker.create_from_options(options)
+        self.lock = threading.Lock()
+        self.latest = empty_results()
+        self.last_timestamp_ms = -1
+        self.in_flight = 0
+
+    def on_result(self, result, image, timestamp_ms):
+        categories = [(h[0].category_name, h[0].score) if h else None for h in result.handedness]
+        packed = pack_hands(result.hand_landmarks, categories, self.max_num_hands, timestamp_ms)
+        with self.lock:
+            self.latest = packed
+            self.in_flight = 0
+
+    def set_model_complexity(self, model_complexity):
+        self.model_complexity = model_complexity
+
+    def process(self, rgb, timestamp_ms):
+        #Timestamps must strictly increase; a frame is skipped while the previous one is still running
+        timestamp_ms = max(int(timestamp_ms), self.last_timestamp_ms + 1)
+        with self.lock:
+            busy = self.in_flight
+            latest = self.latest
+        if not busy:
+            image = mediapipe.Image(image_format=mediapipe.ImageFormat.SRGB, data=np.ascontiguousarray(rgb))
+            with self.lock:
+                self.in_flight = 1
+            self.landmarker.detect_async(image, timestamp_ms)
+            self.last_timestamp_ms = timestamp_ms
+        return latest
+
+    def close(self):
+        self.landmarker.close()
+
+class ReplayBackend:
+    #Plays recorded results back one per frame (looping); with nothing recorded it is a no-hands stub.
+    #by_time: each call gets the result recorded for its frame timestamp instead, so frames the app skips
+    #detection on (motion gate, keyframes) don't shift the rest of a replayed session.
+
+    name = "replay"
+    #Results don't depend on the image, so the detector skips resizing / converting it
+    reads_pixels = False
+
+    def __init__(self, max_num_hands = config.MAX_NUM_HANDS, detection_confidence = None, tracking_confidence = None,
+                 model_complexity = None, frames = None, path = config.DETECTOR_REPLAY_PATH, loop = True, by_time = False):
+        self.max_num_hands = max_num_hands
+        self.model_complexity = model_complexity
+        if path is not None:
+            frames = self.load(path)
+        self.frames = list(frames or [])
+        self.loop = loop
+        self.index = 0
+        self.stamps = [r.timestamp_ms for r in self.frames] if by_time else None
+
+    @staticmethod
+    def save(path, results, capture_times = None, frame_shape = None):
+        #One .npz: every frame's hands stacked, plus per-frame counts and timestamps (and, for recorded sessions,
+        #the exact capture times in seconds and the camera frame shape the landmarks were scaled to)
+        counts = np.array([len(r.hands) for r in results], dtype=np.int32)
+        stacked = np.concatenate([r.hands for r in results]) if len(results) else np.zeros((0, HAND_FLOATS), np.float32)
+        stamps = np.array([r.timestamp_ms if r.timestamp_ms is not None else -1 for r in results], dtype=np.int64)
+        extra = {}
+        if capture_times is not None:
+            extra["capture_times"] = np.asarray(capture_times, dtype=np.float64)
+        if frame_shape is not None:
+            extra["frame_shape"] = np.asarray(frame_shape, dtype=np.int64)
+        np.savez_compressed(path, hands=stacked.astype(np.float32), counts=counts, timestamps=stamps, **extra)
+
+    @staticmethod
+    def load(path):
+        data = np.load(path)
+        hands, counts, stamps = data["hands"], data["counts"], data["timestamps"]
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return [HandResults(hands[offsets[i]:offsets[i + 1]], None if stamps[i] < 0 else int(stamps[i]))
+                for i in range(len(counts))]
+
+    def set_model_complexity(self, model_complexity):
+        self.model_complexity = model_complexity
+
+    def process(self, rgb, timestamp_ms):
+        if self.stamps is not None:
+            i = bisect.bisect_right(self.stamps, timestamp_ms) - 1
+            if i < 0:
+                return empty_results(timestamp_ms)
+            return HandResults(self.frames[i].hands[:self.max_num_hands], timestamp_ms)
+        if not self.frames or (not self.loop and self.index >= len(self.frames)):
+            return empty_results(timestamp_ms)
+        recorded = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return HandResults(recorded.hands[:self.max_num_hands], timestamp_ms)
+
+    def close(self):
+        pass
+
+class SyntheticBackend:
+    #Decodes the barcode SyntheticCamera stamps on each frame into a noise-free hand, after an optional
+    #sleep standing in for model inference time
+
+    name = "synthetic"
+
+    def __init__(self, max_num_hands = config.MAX_NUM_HANDS, detection_confidence = None, tracking_confidence = None,
+                 model_complexity = None, inference_ms = 0.0, hand_size = 0.3):
+        from gesture_rec import synthetic
+        self.synthetic = synthetic
+        self.max_num_hands = max_num_hands
+        self.model_complexity = model_complexity
+        self.inference_ms = inference_ms
+        self.hand_size = hand_size
+        self.frame_id = None
+
+    def set_model_complexity(self, model_complexity):
+        self.model_complexity = model_complexity
+
+    def process(self, rgb, timestamp_ms):
+        if self.inference_ms > 0.0:
+            time.sleep(self.inference_ms / 1000.0)
+        decoded = self.synthetic.decode_barcode(rgb)
+        if decoded is None or not self.max_num_hands:
+            return empty_results(timestamp_ms)
+        self.frame_id, x, y, gesture, mirrored = decoded
+        points = self.synthetic.pose_landmarks(gesture, x, y, self.hand_size, rgb.shape[1] / rgb.shape[0])
+        if mirrored:
+            points[:, 0] = 2.0 * x - points[:, 0]
+        hands = np.zeros((1, HAND_FLOATS), dtype=np.float32)
+        hands[0, 0] = HANDEDNESS_CODES["Left" if mirrored else "Right"]
+        hands[0, 1] = 1.0
+        landmarks = hands[0, 2:].reshape(NUM_LANDMARKS, 4)
+        landmarks[:, :3] = points
+        landmarks[:, 3] = 1.0
+        return HandResults(hands, timestamp_ms)
+
+    def close(self):
+        pass
+
+BACKENDS = {
+    SolutionsBackend.name: SolutionsBackend,
+    TasksBackend.name: TasksBackend,
+    ReplayBackend.name: ReplayBackend,
+    SyntheticBackend.name: SyntheticBackend,
+}
+
+def make_backend(name, max_num_hands, detection_confidence, tracking_confidence, model_complexity, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detector backend {name!r} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name](max_num_hands, detection_confidence, tracking_confidence, model_complexity, **kwargs)
+
+def now_ms():
+    return int(time.monotonic() * 1000.0)
@@ -1,5 +1,4 @@
 import math
-import numpy as np
 from gesture_rec import gesture_config as config
 from typing import Sequence
 
@@ -17,6 +16,12 @@ class GestureClassifier:
     GESTURE_THUMBS_UP = "ThumbsUp"
     GESTURE_THUMBS_DOWN = "ThumbsDown"
 
+    GESTURES = (
+        GESTURE_NONE, GESTURE_POINTER, GESTURE_PINCH, GESTURE_PEACE,
+        GESTURE_THREE_FINGERS_UP, GESTURE_THREE_FINGERS_DOWN, GESTURE_FOUR_FINGERS,
+        GESTURE_FIVE_FINGERS, GESTURE_FIST, GESTURE_THUMBS_UP, GESTURE_THUMBS_DOWN,
+    )
+
     def __init__ (self):
         self.current_gesture = self.GESTURE_NONE
         self.previous_gesture = self.GESTURE_NONE
@@ -26,9 +31,16 @@ class GestureClassifier:
         self.cooldown_frames = config.GESTURE_COOLDOWN_FRAMES
         self.last_gesture_frame = self.cooldown_frames
 
+    PINCH_THRESHOLD = config.PINCH_THRESHOLD
+    FINGER_TIP_THRESHOLD = config.FINGER_TIP_THRESHOLD
+    THUMB_EXTENDED_RATIO = config.THUMB_EXTENDED_RATIO
+    FINGER_EXTENDED_RATIO = config.FINGER_EXTENDED_RATIO
+    THUMB_DIRECTION_THRESHOLD = config.THUMB_DIRECTION_THRESHOLD
+    THREE_FINGERS_DIRECTION_THRESHOLD = config.THREE_FINGERS_DIRECTION_THRESHOLD
     POKE_Z_DELTA = getattr(config, "POKE_Z_DELTA", 0.08) #depth from wrist to finger tip to count as poke
     POKE_REQUIRE_EXTENDED = getattr(config, "POKE_REQUIRE_EXTENDED", True)
     THUMBS_Y_DELTA = getattr(config, "THUMBS_Y_DELTA", 0.10)
+    MARGIN_GAIN = config.GESTURE_MARGIN_GAIN #decision margin (hand-size units) -> confidence steepness
 
     def z(self, pt):
         #Fall back to 0.0 if missing
@@ -52,7 +64,7 @@ class GestureClassifier:
         tip_to_wrist = self.calc_distance(tip, wrist)
         pip_to_wrist = self.calc_distance(pip, wrist)
 
-        return tip_to_wrist > (pip_to_wrist + 0.02)
+        return tip_to_wrist > (pip_to_wrist + self.FINGER_TIP_THRESHOLD)
     
     def is_thumb_extended(self, landmarks):
         thumb_tip = landmarks[config.HandLandmark.THUMB_TIP]
@@ -93,14 +105,14 @@ class GestureClassifier:
         d_tip = self._dist(landmarks, WRIST, THUMB_TIP)
         d_mcp = self._dist(landmarks, WRIST, THUMB_MCP)
 
-        return d_tip > d_mcp * 1.1
+        return d_tip > d_mcp * self.THUMB_EXTENDED_RATIO
 
     def _is_finger_extended_geom(self, landmarks, tip_idx, mcp_idx):
         WRIST = 0
         d_tip = self._dist(landmarks, WRIST, tip_idx)
         d_mcp = self._dist(landmarks, WRIST, mcp_idx)
 
-        return d_tip > d_mcp * 1.1
+        return d_tip > d_mcp * self.FINGER_EXTENDED_RATIO
     
     def three_fingers_direction(self, landmarks):
         if not landmarks or len(landmarks) < 21:
@@ -127,7 +139,7 @@ class GestureClassifier:
         if hand_size < 1e-6:
             hand_size = 1.0
 
-        threshold = 0.25 * hand_size  #tweak 0.2–0.3 if needed
+        threshold = self.THREE_FINGERS_DIRECTION_THRESHOLD * hand_size
 
         if avg_dy < -threshold:
             return "up"
@@ -157,7 +169,7 @@ class GestureClassifier:
             hand_size = 1.0
 
         dy = ty - my  
-        threshold = 0.25 * hand_size  
+        threshold = self.THUMB_DIRECTION_THRESHOLD * hand_size
 
         if dy < -threshold:
             return "up"
@@ -178,7 +190,7 @@ class GestureClassifier:
 
         normalized_distance = distance / hand_size if hand_size > 0 else distance
         
-        return normalized_distance < config.PINCH_THRESHOLD
+        return normalized_distance < self.PINCH_THRESHOLD
     
     def is_fist(self, landmarks):
         finger_info = self.extended_fingers(landmarks)
@@ -303,6 +315,56 @@ class GestureClassifier:
 
         return self.GESTURE_NONE
 
+    def decision_margins(self, landmarks):
+        #Signed distance of each hard decision from its threshold, in hand-size units (0 = right on the boundary)
+        wrist = landmarks[config.HandLandmark.WRIST]
+        hand_size = self.calc_distance(wrist, landmarks[config.HandLandmark.MIDDLE_FINGER_MCP]) or 1.0
+        pinch_distance = self.calc_distance(landmarks[config.HandLandmark.THUMB_TIP], landmarks[config.HandLandmark.INDEX_FINGER_TIP])
+
+        margins = {"pinch": self.PINCH_THRESHOLD - pinch_distance / hand_size}
+
+        thumb_tip_d = self.calc_distance(landmarks[config.HandLandmark.THUMB_TIP], landmarks[config.HandLandmark.INDEX_FINGER_MCP])
+        thumb_ip_d = self.calc_distance(landmarks[config.HandLandmark.THUMB_IP], landmarks[config.HandLandmark.INDEX_FINGER_MCP])
+        margins["thumb"] = (thumb_tip_d - thumb_ip_d) / hand_size
+        for name, tip, pip in (
+            ("index", config.HandLandmark.INDEX_FINGER_TIP, config.HandLandmark.INDEX_FINGER_PIP),
+            ("middle", config.HandLandmark.MIDDLE_FINGER_TIP, config.HandLandmark.MIDDLE_FINGER_PIP),
+            ("ring", config.HandLandmark.RING_FINGER_TIP, config.HandLandmark.RING_FINGER_PIP),
+            ("pinky", config.HandLandmark.PINKY_TIP, config.HandLandmark.PINKY_PIP),
+        ):
+            margins[name] = (self.calc_distance(landmarks[tip], wrist) - self.calc_distance(landmarks[pip], wrist) - self.FINGER_TIP_THRESHOLD) / hand_size
+
+        #Geometric extension checks used for thumbs up / down
+        for name, tip, mcp in (("thumb_geom", 4, 2), ("index_geom", 8, 5), ("middle_geom", 12, 9), ("ring_geom", 16, 13), ("pinky_geom", 20, 17)):
+            ratio = self.THUMB_EXTENDED_RATIO if name == "thumb_geom" else self.FINGER_EXTENDED_RATIO
+            margins[name] = (self._dist(landmarks, 0, tip) - ratio * self._dist(landmarks, 0, mcp)) / hand_size
+
+        #Direction checks: how far past the hand-size dead zone
+        ref = self._dist(landmarks, 0, 5) or 1.0
+        thumb_dy = self._xy(landmarks[4])[1] - self._xy(landmarks[2])[1]
+        margins["thumb_dir"] = (abs(thumb_dy) - self.THUMB_DIRECTION_THRESHOLD * ref) / ref
+        three_dy = sum(self._xy(landmarks[t])[1] - self._xy(landmarks[m])[1] for t, m in ((12, 9), (16, 13), (20, 17))) / 3.0
+        margins["three_dir"] = (abs(three_dy) - self.THREE_FINGERS_DIRECTION_THRESHOLD * ref) / ref
+        return margins
+
+    def classify_with_confidence(self, landmarks):
+        #Hard label plus how far the closest deciding feature was from flipping it, mapped to (0.5, 1)
+        label = self.classify_gesture(landmarks)
+        if not landmarks or len(landmarks) != 21:
+            return label, 1.0
+
+        margins = self.decision_margins(landmarks)
+        deciding = ["pinch"]
+        if label != self.GESTURE_PINCH:
+            deciding += ["thumb", "index", "middle", "ring", "pinky"]
+        if label in (self.GESTURE_THUMBS_UP, self.GESTURE_THUMBS_DOWN):
+            deciding += ["thumb_geom", "index_geom", "middle_geom", "ring_geom", "pinky_geom", "thumb_dir"]
+        elif label in (self.GESTURE_THREE_FINGERS_UP, self.GESTURE_THREE_FINGERS_DOWN):
+            deciding.append("three_dir")
+
+        nearest = min(abs(margins[name]) for name in deciding)
+        return label, 0.5 + 0.5 * math.tanh(self.MARGIN_GAIN * nearest)
+
     def update_gesture(self, landmarks):
         self.frame_count += 1
         gesture = self.classfy_gesture(landmarks)
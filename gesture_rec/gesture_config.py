@@ -4,29 +4,223 @@ HAND_DETECTION_CONFIDENCE = 0.7
 HAND_TRACKING_CONFIDENCE = 0.5
 MAX_NUM_HANDS = 1
 
-#gesture rec thresholds
-FINGER_TIP_THRESHOLD = 0.02
+#fraction of the capture resolution fed to MediaPipe (0.5 of 640x480 -> 320x240)
+DETECTOR_INPUT_SCALE = 0.5
+
+#MediaPipe hands model (0 = lite, 1 = full)
+MODEL_COMPLEXITY = 1
+
+#detector backend: "solutions" (synchronous mediapipe.solutions.hands), "tasks" (HandLandmarker in LIVE_STREAM
+#mode, results arrive asynchronously about a frame late) or "replay" (recorded results, see DETECTOR_REPLAY_PATH)
+DETECTOR_BACKEND = "solutions"
+HAND_LANDMARKER_MODEL = "models/hand_landmarker.task"  #download from the MediaPipe model page for "tasks"
+DETECTOR_REPLAY_PATH = None  #.npz written by ReplayBackend.save(); None = no hands
+DETECTOR_RECORD_PATH = None  #save every frame's detector results here on exit, python -m utils.replay_session replays it
+
+#run the detector backend in a child process (frames over shared memory), UI and actions stay in this one
+DETECTOR_PROCESS_ENABLED = False
+DETECTOR_PROCESS_PIPELINED = False  #detect frame N while frame N-1 is handled (+1 frame latency)
+DETECTOR_PROCESS_HEARTBEAT = 0.1  #seconds between idle heartbeats
+DETECTOR_PROCESS_HANG_TIMEOUT = 2.0  #no reply / heartbeat for this long means the worker is restarted
+DETECTOR_PROCESS_START_TIMEOUT = 30.0
+
+#motion gate: skip detection while the scene is static and no hand was seen recently
+MOTION_GATE_ENABLED = True
+MOTION_GATE_SIZE = (32, 24)  #thumbnail width, height
+MOTION_GATE_PIXEL_THRESHOLD = 12.0  #grey levels a thumbnail pixel must change by
+MOTION_GATE_AREA_THRESHOLD = 0.01  #fraction of thumbnail pixels that must change
+MOTION_GATE_BACKGROUND_ALPHA = 0.05
+MOTION_GATE_HAND_HOLD_FRAMES = 15  #keep detecting this long after the hand was last seen
+MOTION_GATE_RECHECK_FRAMES = 30  #detect at least this often even when static
+
+#gesture rec thresholds (overridable in config.json; python -m utils.tune_thresholds searches them)
+FINGER_TIP_THRESHOLD = 0.02  #tip must be this much further from the wrist than the PIP to count as extended
 PINCH_THRESHOLD = 0.05
+THUMB_EXTENDED_RATIO = 1.1  #wrist->tip over wrist->MCP, geometric extension check for thumbs up / down
+FINGER_EXTENDED_RATIO = 1.1
+THUMB_DIRECTION_THRESHOLD = 0.25  #thumb tip above / below its MCP by this many hand sizes = up / down
+THREE_FINGERS_DIRECTION_THRESHOLD = 0.25
 FIRST_THRESHOLD = 0.15
 
 #Scrolling
 SCROLLING_SENSITIVITY = 2.0
 SCROLL_AMOUNT = 40  #pixels per scroll action
+SCROLL_STEP = 120 #Typical scroll step value
+
+#action cooldowns (seconds)
+CLICK_COOLDOWN = 0.3
+KEYBOARD_COOLDOWN = 0.5
+FINGER_HOLD_TIME = 1.0
 
 #cooldown time in frames
 GESTURE_COOLDOWN_FRAMES = 10
 
+#temporal smoothing of gesture labels (HMM over the gesture set)
+GESTURE_SMOOTHING_ENABLED = True
+GESTURE_MARGIN_GAIN = 8.0  #decision margin (hand-size units) -> per-frame confidence steepness
+GESTURE_HMM_STAY = 0.9  #probability a gesture persists to the next frame
+GESTURE_HMM_LAG = 2  #frames of fixed-lag Viterbi (0 = forward filter, no lag)
+GESTURE_HMM_CONFIDENCE = 0.6  #posterior a new label needs before it is acted on
+#per-pair transition overrides, rows are renormalized; a direct flip between the thumbs is very unlikely
+GESTURE_HMM_TRANSITIONS = {
+    ("ThumbsUp", "ThumbsDown"): 0.002,
+    ("ThumbsDown", "ThumbsUp"): 0.002,
+}
+
+#user-defined gesture templates, matched with DTW alongside the built-in gestures (custom names can be used in
+#gesture_rules). Record with the hotkey in the window: press to start a demonstration, again to stop; the name
+#and kind ("static" pose or "dynamic" movement) come from template_record_name / template_record_kind.
+TEMPLATES_ENABLED = True
+TEMPLATE_LIBRARY_PATH = "profiles/templates.json"
+TEMPLATE_RECORD_HOTKEY = "r"
+TEMPLATE_RECORD_NAME = "Custom"
+TEMPLATE_RECORD_KIND = "dynamic"
+TEMPLATE_MIN_FRAMES = 5
+TEMPLATE_LENGTH = 32  #frames a dynamic template / live window is resampled to
+TEMPLATE_BAND = 0.15  #DTW warping window, fraction of TEMPLATE_LENGTH
+TEMPLATE_SEGMENTS = 4  #PAA segments of the coarse lower bound
+TEMPLATE_DURATION_STEP = 0.25  #seconds, dynamic templates are indexed by duration in these steps
+TEMPLATE_MOTION_WEIGHT = 1.0  #wrist movement against hand pose in the DTW distance
+TEMPLATE_STATIC_THRESHOLD = 0.15  #RMS landmark distance in hand sizes
+TEMPLATE_DYNAMIC_THRESHOLD = 0.25  #RMS per frame along the warping path
+TEMPLATE_REFRACTORY = 0.5  #seconds after a dynamic match before the next one
+TEMPLATE_MAX_DTW = 16  #full DTW evaluations per frame, best lower bounds first
+
+#cursor filter: "ema" (SMOOTHING_FACTOR = weight of the newest sample) or "one_euro" (speed-adaptive cutoff);
+#python -m utils.tune_filters picks these from recorded pointer tracks and writes them to config.json
+CURSOR_FILTER = "ema"
 SMOOTHING_FACTOR = 0.7
+ONE_EURO_MIN_CUTOFF = 1.5  #Hz at rest, lower = steadier
+ONE_EURO_BETA = 0.005  #cutoff gain per pixel/second of speed, higher = less lag when moving
+
+#cursor driver thread, moves the pointer between camera frames
+CURSOR_DRIVER_ENABLED = True
+CURSOR_DRIVER_HZ = 144
+CURSOR_MAX_SPEED = 6000.0  #pixels per second, 0 = no clamp
+CURSOR_INTERP_DELAY = 0.0  #seconds the driver renders behind the newest target (0 = extrapolate only)
+CURSOR_MAX_EXTRAPOLATION = 0.04  #seconds past the newest target before holding still
+
+#no window or HUD (the latency harness runs this way); the loop ends when the camera does
+HEADLESS = False
 
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 
+#detect on the unflipped frame and mirror landmark x instead; the image is only flipped for display
+MIRROR_IN_COORDINATES = True
+
+#calibration (streaming percentiles of the pointer range, saved per user)
+CALIBRATION_USER = "default"
+CALIBRATION_PROFILE_DIR = "profiles"
+CALIBRATION_LOW_PERCENTILE = 0.05
+CALIBRATION_HIGH_PERCENTILE = 0.95
+CALIBRATION_WARMUP_SAMPLES = 100
+CALIBRATION_PADDING = 0.1
+
+#gesture -> action rules (override with "gesture_rules" in config.json)
+#trigger: edge = once on entering, hold = once after `hold` seconds, repeat = every `interval` seconds,
+#continuous = every frame; "$name" arguments come from the runtime settings
+GESTURE_RULES = [
+    {"state": "ACTIVE", "gesture": "FiveFingers", "trigger": "continuous", "action": "move_pointer"},
+    {"state": "ACTIVE", "gesture": "ThreeFingersUp", "trigger": "continuous", "action": "scroll_up", "args": ["$scroll_step"]},
+    {"state": "ACTIVE", "gesture": "ThreeFingersDown", "trigger": "continuous", "action": "scroll_down", "args": ["$scroll_step"]},
+    {"state": "ACTIVE", "gesture": "Pointer", "trigger": "hold", "hold": "$finger_hold_time", "action": "left_click"},
+    {"state": "ACTIVE", "gesture": "Pinch", "trigger": "continuous", "action": "drag_pointer"},
+    {"state": "ACTIVE", "gesture": "Peace", "trigger": "hold", "hold": "$finger_hold_time", "action": "toggle_keyboard"},
+    {"state": "TYPING", "gesture": "Peace", "trigger": "hold", "hold": "$finger_hold_time", "action": "toggle_keyboard"},
+    {"state": "TYPING", "gesture": "*", "trigger": "continuous", "action": "keyboard_track"},
+    {"state": "TYPING", "gesture": "Pinch", "trigger": "continuous", "action": "keyboard_stroke"},
+]
+
+#swipe keyboard (TYPING state): pinch and trace a word across the keys, release to type it
+SWIPE_LEXICON_PATH = "words.txt"  #one word per line, most frequent first (or "word count" lines)
+SWIPE_LEXICON_LIMIT = 100000
+SWIPE_KEYBOARD_RECT = (0.05, 0.5, 0.95, 0.95)  #normalized frame x0, y0, x1, y1
+SWIPE_KEY_RADIUS = 0.8  #key widths around the path that count as "passed near"
+SWIPE_SAMPLE_SPACING = 0.35  #key widths between decoded path samples
+SWIPE_SHAPE_POINTS = 24
+SWIPE_FREQUENCY_WEIGHT = 0.5
+SWIPE_TAP_LENGTH = 0.6  #strokes shorter than this (key widths) type the single key under them
+SWIPE_RELEASE_FRAMES = 3
+SWIPE_CANDIDATES = 3
+
+#pinch-drag
+DRAG_BUTTON = "left"
+DRAG_RELEASE_FRAMES = 3  #frames without the drag gesture before the button is released
+DRAG_MAX_HOLD = 15.0  #seconds, safety release for a stuck pinch
+
+#power states: stepped down after the hand has been gone this long, back to ACTIVE as soon as it shows up
+POWER_WATCH_AFTER = 5.0
+POWER_DEEP_IDLE_AFTER = 60.0
+POWER_STATES = {
+    #capture_fps: None keeps the camera's native rate
+    "ACTIVE": {"capture_fps": None, "detect_every": 1, "display_every": 1},
+    "WATCHING": {"capture_fps": 15, "detect_every": 2, "display_every": 2},
+    "DEEP_IDLE": {"capture_fps": 5, "detect_every": 1, "display_every": 5},
+}
+
+#quality governor: tiers from best to cheapest, stepped to hold the per-frame budget
+GOVERNOR_ENABLED = True
+FRAME_BUDGET_MS = 33.0
+GOVERNOR_WINDOW_FRAMES = 30
+GOVERNOR_DOWNGRADE_RATIO = 1.0
+GOVERNOR_UPGRADE_RATIO = 0.6
+GOVERNOR_HOLD_FRAMES = 90
+GOVERNOR_START_TIER = 1
+
+#hud_level: 0 = frame only, 1 = text HUD, 2 = text HUD + landmarks
+#keyframe_interval: run detection every N frames, display_every: imshow every N frames
+QUALITY_TIERS = [
+    {"name": "ultra", "model_complexity": 1, "input_scale": 1.0, "keyframe_interval": 1, "hud_level": 2, "display_every": 1},
+    {"name": "high", "model_complexity": 1, "input_scale": 0.5, "keyframe_interval": 1, "hud_level": 2, "display_every": 1},
+    {"name": "medium", "model_complexity": 0, "input_scale": 0.5, "keyframe_interval": 1, "hud_level": 1, "display_every": 2},
+    {"name": "low", "model_complexity": 0, "input_scale": 0.375, "keyframe_interval": 2, "hud_level": 1, "display_every": 3},
+    {"name": "minimal", "model_complexity": 0, "input_scale": 0.25, "keyframe_interval": 3, "hud_level": 0, "display_every": 6},
+]
+
+#shared-memory landmark stream for other local processes (python -m utils.shm_stream to watch it)
+SHM_STREAM_ENABLED = False
+SHM_STREAM_NAME = "handtrack_landmarks"
+SHM_STREAM_SLOTS = 16
+
+#gesture/state/cursor event server (python -m utils.event_server is a test client)
+EVENT_SERVER_ENABLED = False
+EVENT_SERVER_HOST = "127.0.0.1"
+EVENT_SERVER_PORT = 8765
+EVENT_SERVER_CURSOR_HZ = 30
+EVENT_SERVER_MAX_PENDING = 256
+
+#frame tracing (toggle with the hotkey in the window or SIGUSR1), dumped as Chrome trace JSON
+TRACE_ENABLED = False
+TRACE_HOTKEY = "t"
+TRACE_DIR = "traces"
+TRACE_CAPACITY = 65536
+TRACE_SLOW_FRAME_MS = 80.0
+TRACE_CONTEXT_FRAMES = 5
+
+#session event log (gesture transitions, state changes, actions, frame latency), JSON lines in size-rotated files
+EVENT_LOG_ENABLED = True
+EVENT_LOG_DIR = "logs"
+EVENT_LOG_MAX_BYTES = 8 * 1024 * 1024
+EVENT_LOG_MAX_FILES = 200
+EVENT_LOG_QUEUE_SIZE = 10000
+EVENT_LOG_FLUSH_INTERVAL = 1.0  #seconds
+EVENT_LOG_SUMMARY_FRAMES = 300  #frames per latency summary event
+EVENT_LOG_TRACKS = False  #also log raw (unfiltered) pointer positions, input for utils.tune_filters
+EVENT_LOG_TRACK_BATCH = 120  #pointer samples per "track" event
+
 #debug
 SHOW_LANDMARKS = True
 SHOW_CONNECTIONS = True
 SHOW_BOUNDING_BOX = False
 
 THUMBS_Y_DELTA = 0.10
+POKE_Z_DELTA = 0.08
+POKE_REQUIRE_EXTENDED = True
+
+#runtime config file, polled for changes and applied between frames
+CONFIG_PATH = "config.json"
+CONFIG_POLL_INTERVAL = 1.0
 
 class HandLandmark:
     WRIST = 0
@@ -0,0 +1,99 @@
+#Temporal gesture smoothing: an HMM over the gesture set, fed one (label, confidence) observation per frame.
+#lag 0 runs the forward filter; lag L runs fixed-lag Viterbi and reports the label L frames back.
+#Both are O(G^2) per frame in NumPy, and the output only changes once its posterior clears the confidence gate.
+from gesture_rec import gesture_config as config
+from utils.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+def transition_matrix(gestures, stay, overrides = None):
+    #Row i = P(next | current = gestures[i]): stay on the diagonal, the rest spread evenly, then per-pair overrides
+    g = len(gestures)
+    matrix = np.full((g, g), (1.0 - stay) / max(1, g - 1))
+    np.fill_diagonal(matrix, stay)
+    index = {name: i for i, name in enumerate(gestures)}
+    for (src, dst), p in (overrides or {}).items():
+        if src not in index or dst not in index:
+            raise ValueError(f"Unknown gesture in transition override: {src!r} -> {dst!r}")
+        matrix[index[src], index[dst]] = p
+    return matrix / matrix.sum(axis=1, keepdims=True)
+
+class GestureHMM:
+
+    def __init__(self, gestures, stay = config.GESTURE_HMM_STAY, overrides = config.GESTURE_HMM_TRANSITIONS,
+                 lag = config.GESTURE_HMM_LAG, confidence = config.GESTURE_HMM_CONFIDENCE):
+        self.gestures = tuple(gestures)
+        self.index = {name: i for i, name in enumerate(self.gestures)}
+        self.transitions = transition_matrix(self.gestures, stay, overrides)
+        self.log_transitions = np.log(self.transitions)
+        self.lag = lag
+        self.confidence = confidence
+        g = len(self.gestures)
+
+        #Ring buffers over the last lag + 1 frames: filtered posteriors and Viterbi back-pointers
+        self.posteriors = np.zeros((lag + 1, g))
+        self.backpointers = np.zeros((lag + 1, g), dtype=np.int64)
+        self.emission = np.empty(g)
+        self.scores = np.empty((g, g))
+        self.alpha = None
+        self.delta = None
+        self.frames = 0
+
+        self.label = self.gestures[0]
+        self.label_confidence = 0.0
+
+    def reset(self):
+        self.alpha = None
+        self.delta = None
+        self.frames = 0
+        self.label = self.gestures[0]
+        self.label_confidence = 0.0
+
+    def observe(self, label, confidence):
+        #Emission likelihoods: confidence on the observed label, the remainder spread over the others
+        g = len(self.gestures)
+        confidence = min(max(confidence, 1.0 / g), 1.0 - 1e-6)
+        self.emission.fill((1.0 - confidence) / (g - 1))
+        self.emission[self.index[label]] = confidence
+        return self.emission
+
+    def update(self, label, confidence = 1.0):
+        emission = self.observe(label, confidence)
+        slot = self.frames % (self.lag + 1)
+
+        if self.alpha is None:
+            alpha = emission / emission.sum()
+            self.delta = np.log(emission)
+            self.backpointers[slot] = np.arange(len(self.gestures))
+        else:
+            #Forward filter: alpha_t = e_t * (A^T alpha_{t-1}), normalized
+            alpha = emission * (self.alpha @ self.transitions)
+            alpha /= alpha.sum()
+
+            #Viterbi step: best predecessor for every state, kept as back-pointers
+            np.add(self.delta[:, None], self.log_transitions, out=self.scores)
+            best = self.scores.argmax(axis=0)
+            self.backpointers[slot] = best
+            self.delta = self.scores[best, np.arange(len(self.gestures))] + np.log(emission)
+            self.delta -= self.delta.max()
+        self.alpha = alpha
+        self.posteriors[slot] = alpha
+        self.frames += 1
+
+        if self.lag == 0:
+            state = int(alpha.argmax())
+            posterior = float(alpha[state])
+        elif self.frames <= self.lag:
+            return self.label
+        else:
+            #Trace the best path back lag frames
+            state = int(self.delta.argmax())
+            for k in range(self.lag):
+                state = int(self.backpointers[(slot - k) % (self.lag + 1)][state])
+            posterior = float(self.posteriors[(slot - self.lag) % (self.lag + 1)][state])
+
+        #Confidence gate: keep the previous stable label until the new one is believable
+        if posterior >= self.confidence or self.gestures[state] == self.label:
+            self.label = self.gestures[state]
+            self.label_confidence = posterior
+        return self.label
@@ -1,97 +1,156 @@
-import cv2
-import mediapipe
-from mediapipe import solutions as mp_solutions
 from gesture_rec import gesture_config as config
+from gesture_rec.detector_backends import HAND_FLOATS, HANDEDNESS_NAMES, make_backend, now_ms
+from utils.lazy import LazyModule
+from utils.buffers import BufferPool
+
+cv2 = LazyModule("cv2")
+mediapipe = LazyModule("mediapipe")
+landmark_pb2 = LazyModule("mediapipe.framework.formats.landmark_pb2")
+
+def prepare_detector_input(frame, input_scale, pool):
+    height, width = frame.shape[:2]
+    in_w = max(1, int(round(width * input_scale)))
+    in_h = max(1, int(round(height * input_scale)))
+    rgb = pool.get("detector_rgb", (in_h, in_w, 3))
+
+    #Full-res frame is read once: either straight into RGB, or resized and then converted at the small size
+    rgb.flags.writeable = True
+    if (in_w, in_h) == (width, height):
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+    else:
+        small = pool.get("detector_small", (in_h, in_w, 3))
+        cv2.resize(frame, (in_w, in_h), dst=small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb)
+
+    #Read-only input lets MediaPipe skip its own copy
+    rgb.flags.writeable = False
+    return rgb
+
+MIRRORED_HANDEDNESS = {"Left": "Right", "Right": "Left"}
+
+def results_to_landmarks(results, frame_shape, mirror):
+    #HandResults rows -> get_landmarks dicts; normalized coordinates scale back to full-res pixels
+    height, width = frame_shape[:2]
+    hands_landmarks = []
+    for row in results.hands:
+        values = row.tolist()
+        landmarks = []
+        for base in range(2, HAND_FLOATS, 4):
+            x, y, z, visibility = values[base:base + 4]
+            relative_x = 1.0 - x if mirror else x
+            landmarks.append({
+                'x': int(relative_x * width),
+                'y': int(y * height),
+                'z': z,
+                'relative_x': relative_x,
+                'relative_y': y,
+                'visibility': visibility
+            })
+        hands_landmarks.append(landmarks)
+    return hands_landmarks
+
+def results_to_hand_info(results, mirror):
+    hand_info = []
+    for row in results.hands:
+        handedness = HANDEDNESS_NAMES.get(int(row[0]), "Unknown")
+        if mirror:
+            handedness = MIRRORED_HANDEDNESS.get(handedness, handedness)
+        hand_info.append({
+            'handedness': handedness,
+            'score': float(row[1])
+        })
+    return hand_info
+
+def draw_results(frame, results, draw_landmarks = True, draw_connections = True):
+    #Frame is in the detector's (unmirrored) orientation. HandResults rows go back into MediaPipe landmark
+    #lists so every backend is drawn with the default MediaPipe hand styles.
+    if not draw_landmarks:
+        return frame
+    drawing = mediapipe.solutions.drawing_utils
+    styles = mediapipe.solutions.drawing_styles
+    for row in results.hands:
+        values = row.tolist()
+        hand_landmarks = landmark_pb2.NormalizedLandmarkList(landmark=[
+            landmark_pb2.NormalizedLandmark(x=values[base], y=values[base + 1], z=values[base + 2])
+            for base in range(2, HAND_FLOATS, 4)])
+        drawing.draw_landmarks(
+            frame,
+            hand_landmarks,
+            mediapipe.solutions.hands.HAND_CONNECTIONS if draw_connections else None,
+            styles.get_default_hand_landmarks_style(),
+            styles.get_default_hand_connections_style() if draw_connections else None)
+    return frame
 
 class HandDetector:
     def __init__(self,
         max_num_hands = config.MAX_NUM_HANDS,
         detection_confidence = config.HAND_DETECTION_CONFIDENCE,
-        tracking_confidence = config.HAND_TRACKING_CONFIDENCE):
-
-        self.mp_hands = mediapipe.solutions.hands
-        self.mp_drawing = mediapipe.solutions.drawing_utils
-        self.mp_drawing_styles = mediapipe.solutions.drawing_styles
+        tracking_confidence = config.HAND_TRACKING_CONFIDENCE,
+        input_scale = config.DETECTOR_INPUT_SCALE,
+        model_complexity = config.MODEL_COMPLEXITY,
+        mirror = config.MIRROR_IN_COORDINATES,
+        pool = None,
+        backend = config.DETECTOR_BACKEND,
+        **backend_options):
 
-        self.hands = self.mp_hands.Hands(static_image_mode=False,
-            max_num_hands=max_num_hands,
-            min_detection_confidence=detection_confidence,
-            min_tracking_confidence=tracking_confidence)
-            
         self.max_num_hands = max_num_hands
         self.detection_confidence = detection_confidence
         self.tracking_confidence = tracking_confidence
-
-    def detect_hands(self, frame):
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
-        return results
-    
-    def get_landmarks(self, results, frame_shape):
-        if not results.multi_hand_landmarks:
+        self.model_complexity = model_complexity
+
+        #solutions / tasks / replay, all producing HandResults
+        self.backend = make_backend(backend, max_num_hands, detection_confidence, tracking_confidence,
+                                    model_complexity, **backend_options)
+
+        #Detector input is resized independently of capture/display resolution
+        self.input_scale = input_scale
+        self.frame_shape = None
+        self.pool = pool or BufferPool()
+
+        #Frames arrive unflipped; landmark x and handedness are mirrored instead of the image
+        self.mirror = mirror
+
+    def set_model_complexity(self, model_complexity):
+        if model_complexity == self.model_complexity:
+            return
+        self.model_complexity = model_complexity
+        self.backend.set_model_complexity(model_complexity)
+
+    def set_input_scale(self, input_scale):
+        if input_scale == self.input_scale:
+            return
+        self.input_scale = input_scale
+
+    def prepare_input(self, frame):
+        self.frame_shape = frame.shape
+        return prepare_detector_input(frame, self.input_scale, self.pool)
+
+    def detect_hands(self, frame, timestamp = None):
+        #timestamp in seconds (capture time); live-stream backends need it increasing
+        if getattr(self.backend, "reads_pixels", True):
+            frame_rgb = self.prepare_input(frame)
+        else:
+            self.frame_shape, frame_rgb = frame.shape, None
+        timestamp_ms = int(timestamp * 1000.0) if timestamp is not None else now_ms()
+        return self.backend.process(frame_rgb, timestamp_ms)
+
+    def poll(self):
+        #Detection is synchronous here, nothing is ever left in flight
+        return None
+
+    def get_landmarks(self, results, frame_shape = None):
+        if not len(results):
             return []
-        
-        height, width, _ = frame_shape
-        hands_landmarks = []
-
-        for i in range(len(results.multi_hand_landmarks)):
-            hand_landmarks = results.multi_hand_landmarks[i]
-            landmarks = []  
-            for landmark in hand_landmarks.landmark:
-                landmark_dict = {
-                    'x': int(landmark.x * width),
-                    'y': int(landmark.y * height),
-                    'z': landmark.z,
-                    'relative_x': landmark.x,
-                    'relative_y': landmark.y,
-                    'visibility': landmark.visibility
-                }
-                landmarks.append(landmark_dict)
-            hands_landmarks.append(landmarks)
-        return hands_landmarks
-    
+        return results_to_landmarks(results, frame_shape if frame_shape is not None else self.frame_shape, self.mirror)
+
     def get_hand_info(self, results):
-        if not results.multi_handedness:
-            return []
-        hand_info = []
-        for i in range(len(results.multi_handedness)):
-            hand = results.multi_handedness[i]
-            handedness = hand.classification[0].label
-            score = hand.classification[0].score        
-
-            hand_info.append({
-                'handedness': handedness,
-                'score': score
-            })
-        return hand_info
-    
+        return results_to_hand_info(results, self.mirror)
+
     def draw_landmarks(self, frame, results,
                        draw_landmarks = config.SHOW_LANDMARKS,
                           draw_connections = config.SHOW_CONNECTIONS):
-        
-        if not results.multi_hand_landmarks:
-            return frame
-        
-        for i in range(len(results.multi_hand_landmarks)):
-            hand_landmarks = results.multi_hand_landmarks[i]
-            if draw_landmarks and draw_connections:
-                self.mp_drawing.draw_landmarks(
-                    frame,
-                    hand_landmarks,
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                    self.mp_drawing_styles.get_default_hand_connections_style())
-            
-            elif draw_landmarks:
-                self.mp_drawing.draw_landmarks(
-                    frame,
-                    hand_landmarks,
-                    None,
-                    self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                    )
-                
-        return frame 
-    
+        return draw_results(frame, results, draw_landmarks, draw_connections)
+
     def draw_bounding_box(self, frame, landmarks):
         if not landmarks:
             return frame
@@ -113,7 +172,7 @@ class HandDetector:
         return (int(landmark['x']), int(landmark['y']))
     
     def cleanup(self):
-        self.hands.close()
+        self.backend.close()
 
 if __name__ == "__main__":
     detector = HandDetector()
@@ -126,12 +185,15 @@ if __name__ == "__main__":
             print("Failed to grab frame")
             break
 
-        frame = cv2.flip(frame, 1)
+        if not detector.mirror:
+            frame = cv2.flip(frame, 1)
         results = detector.detect_hands(frame)
         hands_landmarks = detector.get_landmarks(results, frame.shape)
         hands_info = detector.get_hand_info(results)
 
         frame = detector.draw_landmarks(frame, results)
+        if detector.mirror:
+            frame = cv2.flip(frame, 1)
 
         if hands_landmarks:
             cv2.putText(frame, f'Hands Detected: {len(hands_landmarks)}', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
@@ -0,0 +1,82 @@
+#Cheap motion gate in front of HandDetector.detect_hands: a tiny grayscale thumbnail is compared
+#against a running background, and detection is skipped while the scene is static and no hand was seen recently.
+from gesture_rec import gesture_config as config
+from utils.buffers import BufferPool
+from utils.lazy import LazyModule
+
+cv2 = LazyModule("cv2")
+
+class MotionGate:
+
+    def __init__(self, size = config.MOTION_GATE_SIZE, pixel_threshold = config.MOTION_GATE_PIXEL_THRESHOLD,
+                 area_threshold = config.MOTION_GATE_AREA_THRESHOLD, background_alpha = config.MOTION_GATE_BACKGROUND_ALPHA,
+                 hand_hold_frames = config.MOTION_GATE_HAND_HOLD_FRAMES, recheck_frames = config.MOTION_GATE_RECHECK_FRAMES,
+                 pool = None):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.background_alpha = background_alpha
+        self.hand_hold_frames = hand_hold_frames
+        self.recheck_frames = recheck_frames
+        self.pool = pool or BufferPool()
+
+        self.background = None
+        self.frames_since_hand = hand_hold_frames
+        self.frames_since_detect = 0
+        self.motion = 0.0
+        self.open = True
+        self.checked = 0
+        self.skipped = 0
+
+    def measure(self, frame):
+        #Fraction of thumbnail pixels that moved away from the background
+        width, height = self.size
+        small = self.pool.get("gate_small", (height, width, 3))
+        gray = self.pool.get("gate_gray", (height, width))
+        gray_f = self.pool.get("gate_gray_f", (height, width), "float32")
+        diff = self.pool.get("gate_diff", (height, width), "float32")
+
+        cv2.resize(frame, (width, height), dst=small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=gray)
+        gray_f[...] = gray
+
+        if self.background is None:
+            self.background = self.pool.get("gate_background", (height, width), "float32")
+            self.background[...] = gray_f
+            return 1.0
+
+        cv2.absdiff(gray_f, self.background, dst=diff)
+        cv2.threshold(diff, self.pixel_threshold, 1.0, cv2.THRESH_BINARY, dst=diff)
+        moved = cv2.countNonZero(diff) / float(width * height)
+        cv2.accumulateWeighted(gray_f, self.background, self.background_alpha)
+        return moved
+
+    def should_detect(self, frame, hand_seen):
+        self.checked += 1
+        if hand_seen:
+            self.frames_since_hand = 0
+        else:
+            self.frames_since_hand += 1
+
+        #Background keeps tracking the scene even while a hand is up
+        self.motion = self.measure(frame)
+
+        self.open = (
+            self.frames_since_hand < self.hand_hold_frames
+            or self.motion >= self.area_threshold
+            or self.frames_since_detect >= self.recheck_frames
+        )
+        if self.open:
+            self.frames_since_detect = 0
+        else:
+            self.frames_since_detect += 1
+            self.skipped += 1
+        return self.open
+
+    def skip_ratio(self):
+        return self.skipped / self.checked if self.checked else 0.0
+
+    def reset(self):
+        self.background = None
+        self.frames_since_hand = self.hand_hold_frames
+        self.frames_since_detect = 0
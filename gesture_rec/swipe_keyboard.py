@@ -0,0 +1,338 @@
+#Swipe-typing virtual keyboard: the fingertip path drawn while pinching is decoded against a lexicon.
+#The prefix trie is only walked along letters the path passes near, in order, so most of the lexicon is never visited.
+import heapq
+import math
+import threading
+
+from gesture_rec import gesture_config as config
+from utils.lazy import LazyModule
+
+cv2 = LazyModule("cv2")
+
+#Layout in key units: ten keys across, three letter rows and a row of special keys
+LETTER_ROWS = ("qwertyuiop", "asdfghjkl", "zxcvbnm")
+ROW_OFFSETS = (0.0, 0.5, 1.5)
+SPECIAL_KEYS = (("backspace", 0.5, 3.0), ("space", 3.0, 7.0), ("enter", 7.0, 9.5))
+LAYOUT_WIDTH = 10.0
+LAYOUT_HEIGHT = 4.0
+
+LETTER_INDEX = {c: i for i, c in enumerate("abcdefghijklmnopqrstuvwxyz")}
+
+class KeyboardLayout:
+
+    def __init__(self):
+        self.centers = {}
+        for row, (letters, offset) in enumerate(zip(LETTER_ROWS, ROW_OFFSETS)):
+            for col, letter in enumerate(letters):
+                self.centers[letter] = (offset + col + 0.5, row + 0.5)
+        self.specials = SPECIAL_KEYS
+
+    def key_at(self, x, y):
+        if y >= len(LETTER_ROWS):
+            for name, x0, x1 in self.specials:
+                if x0 <= x < x1:
+                    return name
+            return None
+        return min(self.centers, key=lambda c: (self.centers[c][0] - x) ** 2 + (self.centers[c][1] - y) ** 2)
+
+    def near(self, x, y, radius):
+        r2 = radius * radius
+        return [c for c, (cx, cy) in self.centers.items() if (cx - x) ** 2 + (cy - y) ** 2 <= r2]
+
+def path_length(points):
+    return sum(math.hypot(x1 - x0, y1 - y0) for (x0, y0), (x1, y1) in zip(points, points[1:]))
+
+def resample(points, n):
+    #n points evenly spaced along the polyline
+    total = path_length(points)
+    if len(points) == 1 or total <= 0.0:
+        return [points[0]] * n
+
+    step = total / (n - 1)
+    out = [points[0]]
+    carried = 0.0
+    prev = points[0]
+    i = 1
+    while i < len(points) and len(out) < n:
+        (x0, y0), (x1, y1) = prev, points[i]
+        d = math.hypot(x1 - x0, y1 - y0)
+        if d > 0.0 and carried + d >= step:
+            t = (step - carried) / d
+            prev = (x0 + t * (x1 - x0), y0 + t * (y1 - y0))
+            out.append(prev)
+            carried = 0.0
+        else:
+            carried += d
+            prev = points[i]
+            i += 1
+    while len(out) < n:
+        out.append(points[-1])
+    return out
+
+def load_lexicon(path, limit = None):
+    #One word per line, most frequent first, or "word count" lines in any order
+    words = []
+    counts = {}
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            word = parts[0].lower()
+            if word in counts or not word.isascii() or not word.isalpha():
+                continue
+            counts[word] = float(parts[1]) if len(parts) > 1 and parts[1].replace(".", "", 1).isdigit() else None
+            words.append(word)
+
+    if any(count is not None for count in counts.values()):
+        words.sort(key=lambda w: -(counts[w] or 0.0))
+    return words[:limit] if limit else words
+
+class PrefixTrie:
+    #Nested dicts keyed by letter; "" marks the end of a word and holds its frequency rank
+
+    def __init__(self, words = ()):
+        self.root = {}
+        self.size = 0
+        for rank, word in enumerate(words):
+            self.insert(word, rank)
+
+    def insert(self, word, rank):
+        node = self.root
+        for c in word:
+            node = node.setdefault(c, {})
+        if "" not in node:
+            node[""] = rank
+            self.size += 1
+
+    def __len__(self):
+        return self.size
+
+class SwipeDecoder:
+
+    def __init__(self, words, layout = None, key_radius = config.SWIPE_KEY_RADIUS,
+                 sample_spacing = config.SWIPE_SAMPLE_SPACING, shape_points = config.SWIPE_SHAPE_POINTS,
+                 frequency_weight = config.SWIPE_FREQUENCY_WEIGHT):
+        self.layout = layout or KeyboardLayout()
+        self.trie = PrefixTrie(words)
+        self.key_radius = key_radius
+        self.sample_spacing = sample_spacing
+        self.shape_points = shape_points
+        self.frequency_weight = frequency_weight
+        self.rank_norm = math.log1p(max(1, len(self.trie)))
+        self.visited = 0
+
+    def key_sequence(self, points):
+        #Letters near each resampled path point, plus the next index each letter is near from every point on
+        samples = resample(points, max(2, int(path_length(points) / self.sample_spacing) + 1))
+        near = [self.layout.near(x, y, self.key_radius) for x, y in samples]
+
+        nxt = [None] * len(near)
+        current = [-1] * len(LETTER_INDEX)
+        for i in range(len(near) - 1, -1, -1):
+            for c in near[i]:
+                current[LETTER_INDEX[c]] = i
+            nxt[i] = current[:]
+        return near, nxt
+
+    def walk(self, near, nxt):
+        #Depth-first over the trie; a child is only followed if its letter is near the path at or after the current point
+        first, last = set(near[0]), set(near[-1])
+        stack = [(child, c, 0) for c, child in self.trie.root.items() if c in first]
+        visited = 0
+        while stack:
+            node, prefix, i = stack.pop()
+            visited += 1
+            for c, child in node.items():
+                if c == "":
+                    if prefix[-1] in last:
+                        yield prefix, child
+                    continue
+                j = nxt[i][LETTER_INDEX[c]]
+                if j >= 0:
+                    stack.append((child, prefix + c, j))
+        self.visited = visited
+
+    def word_path(self, word):
+        centers = self.layout.centers
+        points = [centers[word[0]]]
+        for a, b in zip(word, word[1:]):
+            if a != b:
+                points.append(centers[b])
+        return points
+
+    def decode(self, points, limit = 3):
+        #Returns [(word, score)], best (lowest) first
+        if len(points) < 2:
+            return []
+        near, nxt = self.key_sequence(points)
+        if not near[0] or not near[-1]:
+            return []
+
+        n = self.shape_points
+        user = resample(points, n)
+        user_length = path_length(points)
+        best = []
+        for word, rank in self.walk(near, nxt):
+            ideal = self.word_path(word)
+            #Cheap length check before the full shape distance
+            if abs(path_length(ideal) - user_length) > max(1.5, 0.5 * user_length):
+                continue
+            ideal = resample(ideal, n)
+            shape = sum(math.hypot(ux - ix, uy - iy) for (ux, uy), (ix, iy) in zip(user, ideal)) / n
+            score = shape + self.frequency_weight * math.log1p(rank) / self.rank_norm
+            if len(best) < limit:
+                heapq.heappush(best, (-score, word))
+            elif -score > best[0][0]:
+                heapq.heapreplace(best, (-score, word))
+        return [(word, -neg) for neg, word in sorted(best, reverse=True)]
+
+class VirtualKeyboard:
+
+    def __init__(self, send, rect = config.SWIPE_KEYBOARD_RECT, lexicon_path = config.SWIPE_LEXICON_PATH,
+                 release_frames = config.SWIPE_RELEASE_FRAMES, tap_length = config.SWIPE_TAP_LENGTH):
+        #send(action, *args) goes to ActionMapper.ping_action
+        self.send = send
+        self.rect = rect
+        self.lexicon_path = lexicon_path
+        self.release_frames = release_frames
+        self.tap_length = tap_length
+        self.layout = KeyboardLayout()
+
+        #Lexicon + trie are built on a background thread the first time the keyboard opens
+        self.decoder = None
+        self.loader = None
+        self.load_error = None
+
+        self.is_open = False
+        self.hover = None
+        self.stroke_points = []
+        self.last_stroke = None
+        self.missed = 0
+        self.candidates = []
+
+    def open(self):
+        self.is_open = True
+        if self.decoder is None and self.loader is None:
+            self.loader = threading.Thread(target=self.load, name="swipe-lexicon", daemon=True)
+            self.loader.start()
+
+    def close(self):
+        self.is_open = False
+        self.cancel()
+
+    def load(self):
+        try:
+            words = load_lexicon(self.lexicon_path, config.SWIPE_LEXICON_LIMIT)
+            self.decoder = SwipeDecoder(words, self.layout)
+            print(f"[keyboard] lexicon ready ({len(self.decoder.trie)} words)")
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"Error loading swipe lexicon {self.lexicon_path}: {e}")
+
+    def to_layout(self, point):
+        #Frame pixels -> key units inside the keyboard rectangle (None outside it)
+        x0, y0, x1, y1 = self.rect
+        u = (point[0] / config.FRAME_WIDTH - x0) / (x1 - x0)
+        v = (point[1] / config.FRAME_HEIGHT - y0) / (y1 - y0)
+        if not (0.0 <= u <= 1.0 and 0.0 <= v <= 1.0):
+            return None
+        return (u * LAYOUT_WIDTH, v * LAYOUT_HEIGHT)
+
+    def track(self, point):
+        self.hover = point
+
+    def stroke(self, point, now):
+        #Called on every frame the stroke gesture is held
+        self.hover = point
+        self.last_stroke = now
+        self.missed = 0
+        key_point = self.to_layout(point)
+        if key_point is not None:
+            self.stroke_points.append(key_point)
+
+    def update(self, now, hand_present, active):
+        if not active:
+            if self.is_open:
+                self.close()
+            return
+        if not hand_present:
+            self.hover = None
+        if self.last_stroke is None:
+            return
+        if self.last_stroke != now:
+            self.missed += 1
+        if not hand_present or self.missed >= self.release_frames:
+            self.finish()
+
+    def cancel(self):
+        self.stroke_points = []
+        self.last_stroke = None
+        self.missed = 0
+
+    def finish(self):
+        points = self.stroke_points
+        self.cancel()
+        if not points:
+            return
+
+        #Short strokes are taps on a single key
+        if path_length(points) < self.tap_length:
+            x = sum(p[0] for p in points) / len(points)
+            y = sum(p[1] for p in points) / len(points)
+            key = self.layout.key_at(x, y)
+            if key == "space":
+                self.send("write_text", " ")
+            elif key is not None and len(key) == 1:
+                self.send("write_text", key)
+            elif key is not None:
+                self.send("key_press", key)
+            return
+
+        if self.decoder is None:
+            return
+        self.candidates = self.decoder.decode(points, config.SWIPE_CANDIDATES)
+        if self.candidates:
+            #One batched keyboard call per word
+            self.send("write_text", self.candidates[0][0] + " ")
+
+    def key_rect(self, x0, y0, x1, y1):
+        #Key units -> frame pixel rectangle
+        rx0, ry0, rx1, ry1 = self.rect
+        w = (rx1 - rx0) * config.FRAME_WIDTH / LAYOUT_WIDTH
+        h = (ry1 - ry0) * config.FRAME_HEIGHT / LAYOUT_HEIGHT
+        ox = rx0 * config.FRAME_WIDTH
+        oy = ry0 * config.FRAME_HEIGHT
+        return (int(ox + x0 * w), int(oy + y0 * h)), (int(ox + x1 * w), int(oy + y1 * h))
+
+    def draw(self, frame):
+        hover_key = None
+        if self.hover is not None:
+            key_point = self.to_layout(self.hover)
+            if key_point is not None:
+                hover_key = self.layout.key_at(*key_point)
+
+        for letter, (cx, cy) in self.layout.centers.items():
+            p0, p1 = self.key_rect(cx - 0.45, cy - 0.45, cx + 0.45, cy + 0.45)
+            color = (0, 200, 255) if letter == hover_key else (200, 200, 200)
+            cv2.rectangle(frame, p0, p1, color, 1)
+            cv2.putText(frame, letter, (p0[0] + 4, p1[1] - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+        row = len(LETTER_ROWS)
+        for name, x0, x1 in self.layout.specials:
+            p0, p1 = self.key_rect(x0 + 0.05, row + 0.05, x1 - 0.05, row + 0.95)
+            color = (0, 200, 255) if name == hover_key else (200, 200, 200)
+            cv2.rectangle(frame, p0, p1, color, 1)
+            cv2.putText(frame, name, (p0[0] + 4, p1[1] - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+
+        #Stroke trail
+        for (ax, ay), (bx, by) in zip(self.stroke_points, self.stroke_points[1:]):
+            p0, _ = self.key_rect(ax, ay, ax, ay)
+            p1, _ = self.key_rect(bx, by, bx, by)
+            cv2.line(frame, p0, p1, (0, 255, 0), 2)
+
+        if self.decoder is None:
+            status = f"lexicon error: {self.load_error}" if self.load_error else "loading lexicon..."
+        else:
+            status = "  ".join(word for word, _ in self.candidates)
+        origin, _ = self.key_rect(0.0, -0.6, 0.0, -0.6)
+        cv2.putText(frame, status, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
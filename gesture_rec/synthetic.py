@@ -0,0 +1,329 @@
+#Procedural 21-landmark hand poses for exercising the classifier, calibration and smoothing without a camera
+#A pose is a small parameter vector (per-finger curl, thumb-to-index pinch, roll), so two gestures can be
+#blended to probe the boundary between them. Everything is generated in batches with NumPy.
+import math
+import time
+
+import numpy as np
+
+from gesture_rec import gesture_config as config
+from gesture_rec.gesture_class import GestureClassifier
+from utils.lazy import LazyModule
+
+cv2 = LazyModule("cv2")
+
+FINGERS = ("thumb", "index", "middle", "ring", "pinky")
+
+#Hand-local layout in units of wrist -> middle MCP, x to the thumb side is negative, y up is negative
+MCP_POSITIONS = {
+    "index": (-0.32, -0.95),
+    "middle": (0.0, -1.0),
+    "ring": (0.24, -0.94),
+    "pinky": (0.45, -0.82),
+}
+SEGMENTS = {
+    "thumb": (0.38, 0.32, 0.28),
+    "index": (0.45, 0.27, 0.22),
+    "middle": (0.50, 0.30, 0.23),
+    "ring": (0.46, 0.28, 0.22),
+    "pinky": (0.36, 0.22, 0.20),
+}
+THUMB_CMC = (-0.22, -0.18)
+THUMB_DIRECTION = math.radians(-125.0)  #extended thumb points up and out, angle from +x
+JOINT_FLEX = (math.radians(75), math.radians(100), math.radians(70))
+THUMB_SWEEP = math.radians(130.0)  #a curled thumb swings across the palm
+THUMB_FLEX = (math.radians(20), math.radians(50), math.radians(60))
+
+FINGER_INDICES = {
+    "thumb": (1, 2, 3, 4),
+    "index": (5, 6, 7, 8),
+    "middle": (9, 10, 11, 12),
+    "ring": (13, 14, 15, 16),
+    "pinky": (17, 18, 19, 20),
+}
+
+#curl per finger (0 = straight, 1 = fully curled), pinch pulls the thumb tip onto the index tip, roll in degrees
+POSES = {
+    GestureClassifier.GESTURE_NONE: {"curl": (1, 0, 1, 1, 0), "pinch": 0.0, "roll": 0.0},
+    GestureClassifier.GESTURE_POINTER: {"curl": (1, 0, 1, 1, 1), "pinch": 0.0, "roll": 0.0},
+    GestureClassifier.GESTURE_PINCH: {"curl": (0.3, 0.35, 0, 0, 0), "pinch": 1.0, "roll": 0.0},
+    GestureClassifier.GESTURE_PEACE: {"curl": (1, 0, 0, 1, 1), "pinch": 0.0, "roll": 0.0},
+    GestureClassifier.GESTURE_THREE_FINGERS_UP: {"curl": (1, 1, 0, 0, 0), "pinch": 0.0, "roll": 0.0},
+    GestureClassifier.GESTURE_THREE_FINGERS_DOWN: {"curl": (1, 1, 0, 0, 0), "pinch": 0.0, "roll": 180.0},
+    GestureClassifier.GESTURE_FOUR_FINGERS: {"curl": (1, 0, 0, 0, 0), "pinch": 0.0, "roll": 0.0},
+    GestureClassifier.GESTURE_FIVE_FINGERS: {"curl": (0, 0, 0, 0, 0), "pinch": 0.0, "roll": 0.0},
+    GestureClassifier.GESTURE_FIST: {"curl": (1, 1, 1, 1, 1), "pinch": 0.0, "roll": 0.0},
+    GestureClassifier.GESTURE_THUMBS_UP: {"curl": (0, 1, 1, 1, 1), "pinch": 0.0, "roll": 0.0},
+    GestureClassifier.GESTURE_THUMBS_DOWN: {"curl": (0, 1, 1, 1, 1), "pinch": 0.0, "roll": 180.0},
+}
+
+def pose_params(gesture):
+    pose = POSES[gesture]
+    return np.array(list(pose["curl"]) + [pose["pinch"], pose["roll"]], dtype=np.float64)
+
+def blend(gesture_a, gesture_b, t):
+    #Pose parameters for t in [0, 1] between two gestures, t may be an array for a sweep
+    a = pose_params(gesture_a)
+    b = pose_params(gesture_b)
+    t = np.asarray(t, dtype=np.float64)[..., None]
+    return a + t * (b - a)
+
+def chain(base, direction, lengths, flex, curl):
+    #Forward kinematics for one finger, batched. base (N,3), direction (N,2) unit in-plane,
+    #curl (N,) scales the joint flex; flexing bends the finger out of the image plane toward the camera.
+    points = []
+    position = base.copy()
+    angle = np.zeros(len(curl))
+    for length, joint in zip(lengths, flex):
+        angle = angle + curl * joint
+        step = np.empty_like(position)
+        step[:, 0] = direction[:, 0] * np.cos(angle) * length
+        step[:, 1] = direction[:, 1] * np.cos(angle) * length
+        step[:, 2] = -np.sin(angle) * length
+        position = position + step
+        points.append(position)
+    return points
+
+def local_poses(params, splay = None):
+    #params (N, 7): five curls, pinch, roll. Returns hand-local landmarks (N, 21, 3), roll not applied.
+    n = len(params)
+    out = np.zeros((n, 21, 3))
+    if splay is None:
+        splay = np.zeros((n, 5))
+
+    for f, name in enumerate(FINGERS[1:], start=1):
+        mx, my = MCP_POSITIONS[name]
+        base = np.zeros((n, 3))
+        base[:, 0] = mx
+        base[:, 1] = my
+        angle = np.arctan2(my, mx) + splay[:, f]
+        direction = np.stack([np.cos(angle), np.sin(angle)], axis=1)
+        idx = FINGER_INDICES[name]
+        out[:, idx[0]] = base
+        for i, point in zip(idx[1:], chain(base, direction, SEGMENTS[name][:3], JOINT_FLEX[1:] + (0.0,), params[:, f])[:3]):
+            out[:, i] = point
+
+    #Thumb: swings across the palm as it curls, then flexes
+    cmc = np.zeros((n, 3))
+    cmc[:, 0], cmc[:, 1] = THUMB_CMC
+    angle = THUMB_DIRECTION + params[:, 0] * THUMB_SWEEP + splay[:, 0]
+    direction = np.stack([np.cos(angle), np.sin(angle)], axis=1)
+    mcp, ip, tip = chain(cmc, direction, SEGMENTS["thumb"], THUMB_FLEX, params[:, 0])
+    out[:, 1], out[:, 2], out[:, 3], out[:, 4] = cmc, mcp, ip, tip
+
+    #Pinch pulls the thumb IP / tip onto the index tip
+    pinch = params[:, 5][:, None]
+    index_tip = out[:, 8]
+    out[:, 4] = tip + pinch * (index_tip - tip)
+    out[:, 3] = ip + pinch * ((mcp + index_tip) / 2.0 - ip)
+    return out
+
+class SyntheticHand:
+
+    def __init__(self, width = config.FRAME_WIDTH, height = config.FRAME_HEIGHT, seed = None):
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+
+    def generate(self, params, rotation = 15.0, scale = (70.0, 130.0), depth = (0.0, 0.0),
+                 tilt = 10.0, noise = 1.0, dropout = 0.0, splay = 0.05):
+        #params (7,) or (N, 7) pose vectors. rotation / tilt are +- degrees of in-plane roll and
+        #out-of-plane yaw/pitch, scale is the wrist->middle MCP length in pixels, depth a z range
+        #(bigger = further away = smaller), noise is pixel std-dev, dropout the per-landmark
+        #chance of an occluded (badly placed, zero visibility) point. Returns (N, 21, 4): x, y, z, visibility.
+        params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+        n = len(params)
+        rng = self.rng
+
+        local = local_poses(params, rng.uniform(-splay, splay, (n, 5)))
+
+        #Out-of-plane tilt (yaw about y, then pitch about x)
+        yaw = np.radians(rng.uniform(-tilt, tilt, n))
+        pitch = np.radians(rng.uniform(-tilt, tilt, n))
+        x, y, z = local[..., 0], local[..., 1], local[..., 2]
+        cy, sy = np.cos(yaw)[:, None], np.sin(yaw)[:, None]
+        x, z = cy * x + sy * z, -sy * x + cy * z
+        cp, sp = np.cos(pitch)[:, None], np.sin(pitch)[:, None]
+        y, z = cp * y - sp * z, sp * y + cp * z
+
+        #In-plane roll around the wrist
+        roll = np.radians(params[:, 6] + rng.uniform(-rotation, rotation, n))[:, None]
+        cr, sr = np.cos(roll), np.sin(roll)
+        x, y = cr * x - sr * y, sr * x + cr * y
+
+        #Size falls off with depth, hand placed anywhere it fits in the frame
+        size = rng.uniform(scale[0], scale[1], n) / (1.0 + rng.uniform(depth[0], depth[1], n))
+        size = size[:, None]
+        margin = 1.6 * size[:, 0]
+        cx = rng.uniform(margin, np.maximum(margin + 1, self.width - margin))[:, None]
+        cyy = rng.uniform(margin, np.maximum(margin + 1, self.height - margin))[:, None]
+
+        out = np.empty((n, 21, 4))
+        out[..., 0] = cx + x * size + rng.normal(0.0, noise, (n, 21))
+        out[..., 1] = cyy + y * size + rng.normal(0.0, noise, (n, 21))
+        #MediaPipe z is relative to the wrist, on roughly the same scale as normalized x
+        out[..., 2] = z * size / self.width + rng.normal(0.0, noise / self.width, (n, 21))
+        out[..., 3] = 1.0
+
+        if dropout > 0.0:
+            dropped = rng.random((n, 21)) < dropout
+            jitter = rng.normal(0.0, 0.3, (n, 21, 2)) * size[..., None]
+            out[..., :2] = np.where(dropped[..., None], out[..., :2] + jitter, out[..., :2])
+            out[..., 3] = np.where(dropped, 0.0, 1.0)
+        return out
+
+    def gesture_batch(self, gesture, n, **kwargs):
+        return self.generate(np.repeat(pose_params(gesture)[None], n, axis=0), **kwargs)
+
+    def to_landmarks(self, batch):
+        #Same dict layout as HandDetector.get_landmarks, one list of 21 dicts per pose
+        hands = []
+        for pose in batch:
+            hands.append([
+                {
+                    'x': int(x),
+                    'y': int(y),
+                    'z': float(z),
+                    'relative_x': float(x) / self.width,
+                    'relative_y': float(y) / self.height,
+                    'visibility': float(v),
+                }
+                for x, y, z, v in pose
+            ])
+        return hands
+
+def pose_landmarks(gesture, x, y, size, aspect):
+    #Noise-free normalized landmarks (21, 3) for a gesture with the middle MCP..wrist centred on (x, y).
+    #size is wrist -> middle MCP as a fraction of the frame height, aspect = width / height.
+    params = pose_params(gesture)
+    local = local_poses(params[None])[0]
+    roll = math.radians(params[6])
+    lx = math.cos(roll) * local[:, 0] - math.sin(roll) * local[:, 1]
+    ly = math.sin(roll) * local[:, 0] + math.cos(roll) * local[:, 1]
+    out = np.empty((21, 3))
+    out[:, 0] = x + lx * size / aspect
+    out[:, 1] = y + (ly + 0.5) * size
+    out[:, 2] = local[:, 2] * size / aspect
+    return out
+
+#Frame barcode: a strip across the top of synthetic camera frames carrying the frame id, hand position and
+#gesture, so a detector backend can read them back after resizing or mirroring. White start, black stop block.
+BARCODE_FIELDS = (("frame_id", 32), ("x", 16), ("y", 16), ("gesture", 4))
+BARCODE_BLOCKS = 2 + sum(bits for _, bits in BARCODE_FIELDS)
+BARCODE_HEIGHT = 1.0 / 40.0  #fraction of the frame height
+GESTURE_CODES = tuple(POSES)
+
+def encode_barcode(frame, frame_id, x, y, gesture):
+    height, width = frame.shape[:2]
+    values = {"frame_id": frame_id, "x": int(x * 0xFFFF), "y": int(y * 0xFFFF), "gesture": GESTURE_CODES.index(gesture)}
+    bits = [1]
+    for name, count in BARCODE_FIELDS:
+        bits += [(values[name] >> i) & 1 for i in range(count - 1, -1, -1)]
+    bits.append(0)
+    bar = max(2, int(height * BARCODE_HEIGHT))
+    for i, bit in enumerate(bits):
+        frame[:bar, round(i * width / BARCODE_BLOCKS):round((i + 1) * width / BARCODE_BLOCKS)] = 255 if bit else 0
+    return frame
+
+def decode_barcode(image):
+    #(frame_id, x, y, gesture, mirrored), or None when the frame carries no barcode
+    height, width = image.shape[:2]
+    row = image[int(height * BARCODE_HEIGHT / 2)]
+    columns = ((np.arange(BARCODE_BLOCKS) + 0.5) * width / BARCODE_BLOCKS).astype(np.int64)
+    bits = (row[columns].reshape(BARCODE_BLOCKS, -1).mean(axis=1) > 127).astype(np.int64)
+    mirrored = not bits[0] and bits[-1]
+    if mirrored:
+        bits = bits[::-1]
+    if not bits[0] or bits[-1]:
+        return None
+
+    values = {}
+    i = 1
+    for name, count in BARCODE_FIELDS:
+        value = 0
+        for bit in bits[i:i + count]:
+            value = (value << 1) | int(bit)
+        values[name] = value
+        i += count
+    if values["gesture"] >= len(GESTURE_CODES):
+        return None
+    x = values["x"] / 0xFFFF
+    return (values["frame_id"], 1.0 - x if mirrored else x, values["y"] / 0xFFFF,
+            GESTURE_CODES[values["gesture"]], bool(mirrored))
+
+def step_script(activate_frames = 20, step_frames = 30, positions = ((0.3, 0.35), (0.7, 0.65), (0.3, 0.65), (0.7, 0.35))):
+    #Thumbs up to switch the app on, then an open hand that jumps to the next position every step_frames
+    def script(frame_id):
+        if frame_id < activate_frames:
+            return GestureClassifier.GESTURE_THUMBS_UP, 0.5, 0.5
+        step = (frame_id - activate_frames) // step_frames
+        x, y = positions[step % len(positions)]
+        return GestureClassifier.GESTURE_FIVE_FINGERS, x, y
+    return script
+
+class SyntheticCamera:
+    #cv2.VideoCapture stand-in: frames paced at fps, each with a hand blob and a barcode from script(frame_id),
+    #and the time every frame was produced (its "photon" time) kept by frame id. With a simulated clock
+    #nothing waits: frames are stamped 1 / fps apart from 0.
+
+    def __init__(self, script, frames, fps = 30.0, width = config.FRAME_WIDTH, height = config.FRAME_HEIGHT, clock = None):
+        self.script = script
+        self.clock = clock
+        self.frames = frames
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.frame_id = 0
+        self.next_time = None
+        self.capture_times = []
+        self.last_capture_time = None
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FPS and value:
+            self.fps = float(value)
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        return 0.0
+
+    def read(self, image = None):
+        if not self.opened or self.frame_id >= self.frames:
+            return False, None
+
+        if self.clock is not None and self.clock.simulated:
+            capture_time = 0.0 if self.next_time is None else self.next_time
+            self.next_time = capture_time + 1.0 / self.fps
+        else:
+            #Block until the next frame is due, like a camera would
+            now = time.perf_counter()
+            if self.next_time is None:
+                self.next_time = now
+            if self.next_time > now:
+                time.sleep(self.next_time - now)
+            self.next_time = max(self.next_time + 1.0 / self.fps, time.perf_counter())
+            capture_time = None
+
+        if image is None or image.shape != (self.height, self.width, 3):
+            image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        gesture, x, y = self.script(self.frame_id)
+        image.fill(40)
+        cv2.circle(image, (int(x * self.width), int(y * self.height)), int(0.12 * self.height), (150, 170, 200), -1)
+        encode_barcode(image, self.frame_id, x, y, gesture)
+
+        self.last_capture_time = capture_time if capture_time is not None else time.perf_counter()
+        self.capture_times.append(self.last_capture_time)
+        self.frame_id += 1
+        return True, image
+
+    def release(self):
+        self.opened = False
@@ -0,0 +1,364 @@
+#User-defined gestures recorded as landmark templates. A static template is one normalized hand pose, a dynamic
+#one a pose + wrist-motion sequence resampled to a fixed length. Live input is matched with banded DTW; dynamic
+#templates are indexed by duration bucket with precomputed LB_Keogh envelopes (and coarser PAA envelopes), so most
+#of the library is ruled out by vectorized lower bounds and only a capped number of full DTWs run per frame.
+import json
+import os
+from collections import deque
+
+from gesture_rec import gesture_config as config
+from utils.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+POSE_DIMS = 42  #21 landmarks x (x, y), wrist at the origin, in hand-size units
+MOTION_DIMS = 2  #wrist offset from the start of the gesture, in hand-size units
+STATIC = "static"
+DYNAMIC = "dynamic"
+
+def normalize(landmarks):
+    #get_landmarks dicts or an (21, >=2) array -> (pose (42,), wrist (2,), hand size in pixels)
+    if isinstance(landmarks[0], dict):
+        xy = np.array([(p['x'], p['y']) for p in landmarks], dtype=np.float64)
+    else:
+        xy = np.asarray(landmarks, dtype=np.float64)[:, :2]
+    wrist = xy[config.HandLandmark.WRIST]
+    size = float(np.hypot(*(xy[config.HandLandmark.MIDDLE_FINGER_MCP] - wrist))) or 1.0
+    return ((xy - wrist) / size).ravel(), wrist.copy(), size
+
+def resample(times, values, length):
+    #(n,) times, (n, D) values -> (length, D) linearly interpolated at evenly spaced times
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 1:
+        return np.repeat(values, length, axis=0)
+    pos = np.interp(np.linspace(times[0], times[-1], length), times, np.arange(n))
+    i0 = np.minimum(pos.astype(np.int64), n - 2)
+    w = (pos - i0)[:, None]
+    return values[i0] * (1.0 - w) + values[i0 + 1] * w
+
+def sequence_features(times, poses, wrists, sizes, length):
+    #Unweighted (length, 44) sequence: pose, then wrist motion relative to the first frame
+    motion = (np.asarray(wrists) - wrists[0]) / sizes[0]
+    return resample(np.asarray(times, dtype=np.float64), np.hstack([np.asarray(poses), motion]), length)
+
+def envelope(frames, radius):
+    #Running max / min over +-radius frames (the Sakoe-Chiba band) for each of (..., L, D)
+    pad = [(0, 0)] * (frames.ndim - 2) + [(radius, radius), (0, 0)]
+    padded = np.pad(frames, pad, mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=-2)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+def keogh_rows(query, upper, lower):
+    #Per-frame LB_Keogh contributions of query (L, D) against one or many envelopes (..., L, D)
+    above = np.maximum(query - upper, 0.0)
+    below = np.maximum(lower - query, 0.0)
+    return (above * above + below * below).sum(axis=-1)
+
+def dtw_distance(query, template, radius, limit = float("inf"), rest = None):
+    #Banded DTW with squared-euclidean frame cost. Abandons (returns inf) once every path in a row, plus the
+    #LB_Keogh bound of the rows still to come (rest[i + 1]), already costs at least limit.
+    n = len(query)
+    cost = ((query[:, None, :] - template[None, :, :]) ** 2).sum(axis=-1).tolist()
+    inf = float("inf")
+    prev = [inf] * n
+    for i in range(n):
+        row = cost[i]
+        cur = [inf] * n
+        row_min = inf
+        for j in range(max(0, i - radius), min(n, i + radius + 1)):
+            if i == 0 and j == 0:
+                best = 0.0
+            else:
+                best = prev[j]
+                if j > 0:
+                    if cur[j - 1] < best:
+                        best = cur[j - 1]
+                    if prev[j - 1] < best:
+                        best = prev[j - 1]
+            value = row[j] + best
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min + (rest[i + 1] if rest is not None else 0.0) >= limit:
+            return inf
+        prev = cur
+    return prev[n - 1]
+
+class TemplateLibrary:
+
+    def __init__(self,
+        length = config.TEMPLATE_LENGTH,
+        band = config.TEMPLATE_BAND,
+        segments = config.TEMPLATE_SEGMENTS,
+        duration_step = config.TEMPLATE_DURATION_STEP,
+        motion_weight = config.TEMPLATE_MOTION_WEIGHT):
+
+        self.length = length
+        self.radius = max(1, int(round(band * length)))
+        self.segments = max(1, min(segments, length))
+        self.duration_step = duration_step
+        self.motion_weight = motion_weight
+
+        self.static = []  #(name, pose (42,))
+        self.dynamic = []  #(name, duration s, frames (L, 44) unweighted)
+        self.index = None
+
+    def __len__(self):
+        return len(self.static) + len(self.dynamic)
+
+    def names(self):
+        seen = {}
+        for name, *_ in self.static + self.dynamic:
+            seen.setdefault(name, None)
+        return list(seen)
+
+    def add_static(self, name, pose):
+        self.static.append((name, np.asarray(pose, dtype=np.float64)))
+        self.index = None
+
+    def add_dynamic(self, name, frames, duration):
+        frames = np.asarray(frames, dtype=np.float64)
+        if len(frames) != self.length:
+            frames = resample(np.linspace(0.0, 1.0, len(frames)), frames, self.length)
+        self.dynamic.append((name, float(duration), frames))
+        self.index = None
+
+    def remove(self, name):
+        before = len(self)
+        self.static = [t for t in self.static if t[0] != name]
+        self.dynamic = [t for t in self.dynamic if t[0] != name]
+        self.index = None
+        return before - len(self)
+
+    def weighted(self, frames):
+        #Motion columns scaled against the pose columns, the space DTW and the envelopes work in
+        out = np.array(frames, dtype=np.float64)
+        out[..., POSE_DIMS:] *= self.motion_weight
+        return out
+
+    def build_index(self):
+        #Static poses as one matrix; dynamic templates grouped by duration, each group stacked with its envelopes
+        static = np.array([pose for _, pose in self.static]).reshape(-1, POSE_DIMS)
+        groups = {}
+        for i, (_, duration, _) in enumerate(self.dynamic):
+            groups.setdefault(max(1, int(round(duration / self.duration_step))), []).append(i)
+
+        buckets = []
+        bounds = np.linspace(0, self.length, self.segments + 1).astype(np.int64)
+        for key in sorted(groups):
+            members = groups[key]
+            frames = self.weighted(np.stack([self.dynamic[i][2] for i in members]))
+            upper, lower = envelope(frames, self.radius)
+            buckets.append({
+                "duration": key * self.duration_step,
+                "names": [self.dynamic[i][0] for i in members],
+                "frames": frames,
+                "upper": upper,
+                "lower": lower,
+                #Segment-wise envelope extremes: a bound on LB_Keogh that costs `segments` frames instead of L
+                "paa_upper": np.maximum.reduceat(upper, bounds[:-1], axis=1),
+                "paa_lower": np.minimum.reduceat(lower, bounds[:-1], axis=1),
+            })
+        self.index = {"static": static, "static_names": [name for name, _ in self.static],
+                      "buckets": buckets, "bounds": bounds}
+        return self.index
+
+    def save(self, path):
+        data = {
+            "length": self.length,
+            "static": [{"name": name, "pose": pose.round(5).tolist()} for name, pose in self.static],
+            "dynamic": [{"name": name, "duration": round(duration, 4), "frames": frames.round(5).tolist()}
+                        for name, duration, frames in self.dynamic],
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            static = [(t["name"], np.asarray(t["pose"], dtype=np.float64)) for t in data.get("static", [])]
+            dynamic = [(t["name"], t["duration"], t["frames"]) for t in data.get("dynamic", [])]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error loading gesture templates from {path}: {e}")
+            return False
+
+        self.static = [t for t in static if t[1].shape == (POSE_DIMS,)]
+        self.dynamic = []
+        for name, duration, frames in dynamic:
+            self.add_dynamic(name, frames, duration)
+        self.index = None
+        return True
+
+class TemplateMatcher:
+    #Feed one hand per frame; returns (static match, dynamic match), each None or (name, confidence in (0.5, 1])
+
+    def __init__(self, library,
+        static_threshold = config.TEMPLATE_STATIC_THRESHOLD,
+        dynamic_threshold = config.TEMPLATE_DYNAMIC_THRESHOLD,
+        refractory = config.TEMPLATE_REFRACTORY,
+        max_dtw = config.TEMPLATE_MAX_DTW):
+
+        self.library = library
+        #RMS landmark distance in hand sizes (per frame for dynamic templates) a match must stay under
+        self.static_threshold = static_threshold
+        self.dynamic_threshold = dynamic_threshold
+        self.refractory = refractory
+        self.max_dtw = max_dtw
+
+        self.history = deque()  #(t, pose, wrist, size)
+        self.last_fired = None
+        self.pending = None  #(name, distance) of the best match so far, fired once it stops improving
+        self.stats = {"searches": 0, "candidates": 0, "paa_pruned": 0, "keogh_pruned": 0, "dtw": 0, "abandoned": 0}
+
+    def reset(self):
+        self.history.clear()
+        self.pending = None
+
+    def update(self, landmarks, t):
+        if not len(self.library):
+            return None, None
+        index = self.library.index or self.library.build_index()
+        pose, wrist, size = normalize(landmarks)
+        #History only feeds the dynamic search, and is kept to the longest bucket's horizon
+        if index["buckets"]:
+            self.history.append((t, pose, wrist, size))
+            horizon = index["buckets"][-1]["duration"] * 1.25
+            while self.history and self.history[0][0] < t - horizon:
+                self.history.popleft()
+        else:
+            self.history.clear()
+        return self.match_static(pose, index), self.match_dynamic(t, index)
+
+    def match_static(self, pose, index):
+        if not len(index["static"]):
+            return None
+        rms = np.sqrt(((index["static"] - pose) ** 2).sum(axis=1) / (POSE_DIMS // 2))
+        best = int(rms.argmin())
+        if rms[best] >= self.static_threshold:
+            return None
+        return index["static_names"][best], 0.5 + 0.5 * (1.0 - rms[best] / self.static_threshold)
+
+    def query(self, duration, now):
+        #The last `duration` seconds as a weighted (L, 44) sequence, None until that much history exists
+        if not self.history or self.history[0][0] > now - 0.8 * duration:
+            return None
+        frames = [h for h in self.history if h[0] >= now - duration]
+        if len(frames) < 2:
+            return None
+        times, poses, wrists, sizes = zip(*frames)
+        return self.library.weighted(sequence_features(times, poses, wrists, sizes, self.library.length))
+
+    def match_dynamic(self, now, index):
+        if not index["buckets"] or (self.last_fired is not None and now - self.last_fired < self.refractory):
+            return None
+        queries = {b: self.query(bucket["duration"], now) for b, bucket in enumerate(index["buckets"])}
+
+        #Windows ending a frame or two before / after the best alignment match too, and a prefix of a longer
+        #gesture can match a shorter one: hold the best match until a frame brings nothing closer (one frame late)
+        pending = self.pending
+        name, distance = self.search(queries, index, threshold=pending[1] if pending is not None else None)
+        if name is not None:
+            self.pending = (name, distance)
+            return None
+        if pending is None:
+            return None
+
+        #One firing per performance: start collecting the next one from scratch
+        self.last_fired = now
+        self.history.clear()
+        self.pending = None
+        return pending[0], 0.5 + 0.5 * (1.0 - pending[1] / self.dynamic_threshold)
+
+    def search(self, queries, index, prune = True, threshold = None):
+        #Nearest dynamic template under the threshold: (name, RMS distance) or (None, None)
+        length = self.library.length
+        radius = self.library.radius
+        frame_dims = (POSE_DIMS + MOTION_DIMS) // 2
+        threshold = self.dynamic_threshold if threshold is None else threshold
+        limit = threshold ** 2 * length * frame_dims
+        stats = self.stats
+        stats["searches"] += 1
+
+        #Coarse pass over every template: PAA bound from segment means against segment envelopes
+        bounds = index["bounds"]
+        seg_len = np.diff(bounds)[:, None]
+        candidates = []
+        for b, query in queries.items():
+            if query is None:
+                continue
+            bucket = index["buckets"][b]
+            stats["candidates"] += len(bucket["names"])
+            means = np.add.reduceat(query, bounds[:-1], axis=0) / seg_len
+            paa = (keogh_rows(means, bucket["paa_upper"], bucket["paa_lower"]) * seg_len[:, 0]).sum(axis=1)
+            keep = np.flatnonzero(paa < limit) if prune else np.arange(len(paa))
+            stats["paa_pruned"] += len(paa) - len(keep)
+            candidates += [(float(paa[k]), b, int(k)) for k in keep]
+        candidates.sort()
+
+        best_name, best_cost, runs = None, limit, 0
+        for lb, b, k in candidates:
+            if prune and (lb >= best_cost or runs >= self.max_dtw):
+                break
+            bucket = index["buckets"][b]
+            query = queries[b]
+            rest = None
+            if prune:
+                rows = keogh_rows(query, bucket["upper"][k], bucket["lower"][k])
+                if rows.sum() >= best_cost:
+                    stats["keogh_pruned"] += 1
+                    continue
+                rest = np.append(np.cumsum(rows[::-1])[::-1], 0.0).tolist()
+            runs += 1
+            stats["dtw"] += 1
+            cost = dtw_distance(query, bucket["frames"][k], radius, best_cost if prune else float("inf"), rest)
+            if cost == float("inf"):
+                stats["abandoned"] += 1
+            elif cost < best_cost:
+                best_name, best_cost = bucket["names"][k], cost
+        if best_name is None:
+            return None, None
+        return best_name, float(np.sqrt(best_cost / (length * frame_dims)))
+
+class TemplateRecorder:
+    #Collects one demonstration between start() and stop(), then adds it to a library
+
+    def __init__(self, min_frames = config.TEMPLATE_MIN_FRAMES):
+        self.min_frames = min_frames
+        self.active = False
+        self.name = None
+        self.kind = None
+        self.frames = []
+
+    def start(self, name, kind):
+        if kind not in (STATIC, DYNAMIC):
+            raise ValueError(f"Unknown template kind: {kind!r}")
+        self.active = True
+        self.name = name
+        self.kind = kind
+        self.frames = []
+
+    def add(self, landmarks, t):
+        if self.active:
+            self.frames.append((t,) + normalize(landmarks))
+
+    def stop(self, library):
+        #Returns the number of frames used, 0 if the demonstration was too short and was dropped
+        self.active = False
+        frames, self.frames = self.frames, []
+        if len(frames) < self.min_frames:
+            return 0
+        times, poses, wrists, sizes = zip(*frames)
+        if self.kind == STATIC:
+            library.add_static(self.name, np.mean(poses, axis=0))
+        else:
+            library.add_dynamic(self.name, sequence_features(times, poses, wrists, sizes, library.length), times[-1] - times[0])
+        return len(frames)
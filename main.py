@@ -1,213 +1,774 @@
 from __future__ import annotations
-import cv2
 import time
-from typing import Optional, Tuple
-import math
+STARTUP_T0 = time.perf_counter()  #reference point for the time-to-first-frame metric
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from actions.action_mapper import ActionMapper
+from actions.rules import RuleEngine, compile_rules
+from actions.cursor_driver import CursorDriver
+from actions.drag import DragController
+from gesture_rec.motion_gate import MotionGate
+from gesture_rec.swipe_keyboard import VirtualKeyboard
 from gesture_rec.hand_detect import HandDetector
+from gesture_rec.detect_worker import DetectionWorker
+from gesture_rec.detector_backends import HandResults, ReplayBackend
 from gesture_rec.gesture_class import GestureClassifier
+from gesture_rec.gesture_smoothing import GestureHMM
+from gesture_rec.templates import TemplateLibrary, TemplateMatcher, TemplateRecorder
 from gesture_rec import gesture_config as config
-from utils.state_machine import GestureStateMachine, ControlState
-
-#testing 
-SCROLL_STEP = 120 #Typical scroll step value
-
-def smooth(prev: Optional[Tuple[int, int]], curr: Tuple[int, int], alpha: float) -> Tuple[int, int]:
-    if prev is None:
-        return curr
-    return (
-        int(alpha * prev[0] + (1 - alpha) * curr[0]),
-        int(alpha * prev[1] + (1 - alpha) * curr[1]),
-    )
-
-
-#One Euro filter for later 
-class OneEuroFilter:
-    def __init__(self, freq=60.0, min_cutoff=1.5, beta=0.35, d_cutoff=20.0):
-        self.freq = freq  # expected samples/sec
-        self.min_cutoff = min_cutoff
-        self.beta = beta  # velocity sensitivity
-        self.d_cutoff = d_cutoff
-        self.last_time = None
-        self.prev_x = None
-        self.prev_dx = None
-
-    def alpha(self, cutoff):
-        tau = 1.0 / (2 * math.pi * cutoff)
-        te = 1.0 / max(1e-3, self.freq)
-        return 1.0 / (1.0 + tau / te)
-
-    def OneEuroF(self, x):
-        #Estimate dx
-        if self.prev_x is None:
-            dx = 0.0
-        else:
-            dx = (x - self.prev_x) * self.freq
-
-        #Smooth dx
-        a_d = self.alpha(self.d_cutoff)
-        dx_hat = dx if self.prev_dx is None else (a_d * dx + (1 - a_d) * self.prev_dx)
-
-        cutoff = self.min_cutoff + self.beta * abs(dx_hat)
-        a = self.alpha(cutoff)
-        x_hat = x if self.prev_x is None else (a * x + (1 - a) * self.prev_x)
-        self.prev_x = x_hat
-        self.prev_dx = dx_hat
-        return x_hat
-
+from utils.state_machine import GestureStateMachine, ControlState, PowerState
+from utils.calibration import HandCalibration
+from utils.clock import CLOCK
+from utils.governor import QualityGovernor
+from utils.lazy import LazyModule
+from utils.runtime_config import ConfigWatcher, DETECTOR_FIELDS
+from utils.shm_stream import LandmarkPublisher
+from utils.event_server import EventServer
+from utils.tracer import TRACER
+from utils.buffers import BufferPool
+from utils.event_log import EVENT_LOG, FrameSummary, TrackBuffer
+from utils.smoothing import CursorFilter
+
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+
+WINDOW_NAME = "Hand Gesture Cursor (Thumbs Up=ON, Thumbs Down=OFF, FIVE to move)"
 
 class HTApp:
-    def __init__(self):
-        #Hand detector + classifier
-        self.detector = HandDetector(
-            max_num_hands=config.MAX_NUM_HANDS,
-            detection_confidence=config.HAND_DETECTION_CONFIDENCE,
-            tracking_confidence=config.HAND_TRACKING_CONFIDENCE,
-        )
-        self.classifier = GestureClassifier()
+    def __init__(self, headless = None, camera = None, cursor = None, backend = None, backend_options = None,
+                 keyboard = None, clock = None):
+        #Heavy pieces (detector, cursor/keyboard actions, camera) are built in parallel by startup()
+        self.detector = None
+        self.actions = None
+        self.cap = None
+
+        #Stand-ins for the latency harness and session replay: any VideoCapture-like camera, cursor / keyboard
+        #backends, detector backend and clock. Headless runs have no window or HUD and end when the camera runs out.
+        self.headless = config.HEADLESS if headless is None else headless
+        self.camera = camera
+        self.cursor = cursor
+        self.keyboard_backend = keyboard
+        #Every timing decision (cooldowns, holds, power timers) reads this clock; a simulated one replays sessions
+        #faster than realtime with the same outcomes
+        self.clock = clock or CLOCK
+        self.detector_backend = backend or config.DETECTOR_BACKEND
+        self.backend_options = backend_options or {}
+        self.startup_metrics = {}
+        self.first_frame_ms = None
+
+        #Session event log bookkeeping (transitions are logged, not every frame)
+        self.frame_summary = FrameSummary()
+        #Per-frame detector results and capture times for a replayable session (DETECTOR_RECORD_PATH)
+        self.session = [] if config.DETECTOR_RECORD_PATH else None
+        self.session_times = []
+        self.session_shape = None
+        self.last_gesture = GestureClassifier.GESTURE_NONE
+        self.gesture_since = None
+        self.last_state = None
+
+        #Capture / mirror / detector input arrays are reused frame to frame
+        self.pool = BufferPool()
+        self.frame_time = None
+        self.cursor_driver = None
+        self.drag = None
+        self.keyboard = None
+        self.motion_gate = MotionGate(pool=self.pool) if config.MOTION_GATE_ENABLED else None
+
+        #Runtime settings from config.json, re-read in the background and applied between frames
+        self.config_watcher = ConfigWatcher()
+        self.settings = self.config_watcher.settings
+        self.pending_detector = None
+        self.detector_rebuild = None
 
-        #Cursor/keyboard actions
-        self.actions = ActionMapper()
+        self.classifier = GestureClassifier()
+        #User-recorded gestures, matched alongside the built-in ones; their names join the gesture set
+        self.templates = None
+        self.recorder = TemplateRecorder()
+        if config.TEMPLATES_ENABLED:
+            library = TemplateLibrary()
+            library.load(config.TEMPLATE_LIBRARY_PATH)
+            self.templates = TemplateMatcher(library)
+        self.gestures = self.gesture_set()
+        #Per-frame labels are smoothed over time before anything acts on them
+        self.smoother = GestureHMM(self.gestures) if config.GESTURE_SMOOTHING_ENABLED else None
+
+        #Cursor filter chain, rebuilt from the runtime settings; raw positions optionally logged for tuning
+        self.cursor_filter = CursorFilter()
+        self.track = TrackBuffer() if config.EVENT_LOG_TRACKS else None
+
+        #Per-user calibration, keeps refining the camera->screen transform while the pointer moves
+        self.calibration = HandCalibration(
+            low_percentile=config.CALIBRATION_LOW_PERCENTILE,
+            high_percentile=config.CALIBRATION_HIGH_PERCENTILE,
+            max_samples=config.CALIBRATION_WARMUP_SAMPLES,
+            padding=config.CALIBRATION_PADDING,
+        )
+        self.calibration_path = HandCalibration.profile_path(config.CALIBRATION_USER, config.CALIBRATION_PROFILE_DIR)
 
-        #Camera
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_WIDTH)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_HEIGHT)
+        #Gesture state machine (ThumbsUp / ThumbsDown -> ACTIVE / IDLE) plus timed power states
+        self.state_machine = GestureStateMachine(
+            watch_after=config.POWER_WATCH_AFTER,
+            deep_idle_after=config.POWER_DEEP_IDLE_AFTER,
+        )
+        self.power = None
+        self.power_profile = config.POWER_STATES["ACTIVE"]
+        self.frame_period = 0.0
+        self.native_fps = None
+
+        #Gesture -> action dispatch table, compiled from settings.gesture_rules once actions exist
+        self.rules = RuleEngine()
+        #Gesture that last toggled the keyboard; it has to be released before it can toggle again
+        self.keyboard_toggle_gesture = None
+
+        #Per-frame hand data for other local processes
+        self.publisher = LandmarkPublisher() if config.SHM_STREAM_ENABLED else None
+
+        #Gesture / state / cursor events for remote dashboards, served from its own thread
+        self.event_server = EventServer() if config.EVENT_SERVER_ENABLED else None
+
+        #Frame tracing, toggled from the window hotkey or SIGUSR1 (handled between frames)
+        self.trace_toggle_requested = False
+        TRACER.set_enabled(config.TRACE_ENABLED)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self.request_trace_toggle)
+
+        #Quality knobs, driven by the governor when enabled
+        self.keyframe_interval = 1
+        self.hud_level = 2
+        self.display_every = 1
+        self.governor = None
+        if config.GOVERNOR_ENABLED:
+            self.governor = QualityGovernor(
+                config.QUALITY_TIERS,
+                budget_ms=config.FRAME_BUDGET_MS,
+                window=config.GOVERNOR_WINDOW_FRAMES,
+                downgrade_ratio=config.GOVERNOR_DOWNGRADE_RATIO,
+                upgrade_ratio=config.GOVERNOR_UPGRADE_RATIO,
+                hold_frames=config.GOVERNOR_HOLD_FRAMES,
+                start_tier=config.GOVERNOR_START_TIER,
+            )
+
+    def open_camera(self):
+        if self.camera is not None:
+            self.native_fps = self.camera.get(cv2.CAP_PROP_FPS) or None
+            return self.camera
+        cap = cv2.VideoCapture(0)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_HEIGHT)
+        #Shallow queue so waking from a low-rate power state doesn't start on stale frames
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.native_fps = cap.get(cv2.CAP_PROP_FPS) or None
+        return cap
+
+    def build_detector(self, settings = None, pool = None):
+        #pool: only the startup detector shares the app's buffers; one built on the rebuild thread gets its own,
+        #or its warm-up would overwrite the detector input the main loop is passing to the running detector
+        settings = settings or self.settings
+        tier = self.governor.tier if self.governor is not None else {}
+        #Same interface either way; the worker runs the detector backend in a child process
+        options = dict(self.backend_options)
+        if config.DETECTOR_PROCESS_ENABLED:
+            detector_class = DetectionWorker
+            options["pipelined"] = config.DETECTOR_PROCESS_PIPELINED
+        else:
+            detector_class = HandDetector
+        detector = detector_class(
+            max_num_hands=settings.max_num_hands,
+            detection_confidence=settings.detection_confidence,
+            tracking_confidence=settings.tracking_confidence,
+            input_scale=tier.get("input_scale", settings.detector_input_scale),
+            model_complexity=tier.get("model_complexity", settings.model_complexity),
+            mirror=config.MIRROR_IN_COORDINATES,
+            pool=pool or BufferPool(),
+            backend=self.detector_backend,
+            **options,
+        )
 
-        #Cursor smoothing
-        self.prev_screen_xy: Optional[Tuple[int, int]] = None
+        #Warm-up inference so the first real frame doesn't pay for graph initialization
+        detector.detect_hands(np.zeros((config.FRAME_HEIGHT, config.FRAME_WIDTH, 3), dtype=np.uint8))
+        return detector
+
+    def build_actions(self):
+        return ActionMapper(cursor=self.cursor, keyboard=self.keyboard_backend, clock=self.clock)
+
+    def timed(self, name, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.startup_metrics[name] = (time.perf_counter() - start) * 1000.0
+        return result
+
+    def show_status(self, futures):
+        status = np.zeros((150, 420, 3), dtype=np.uint8)
+        cv2.putText(status, "Starting HandTrack...", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+        for i, (name, future) in enumerate(futures.items()):
+            if future.done():
+                text = f"{name}: ready ({self.startup_metrics.get(name, 0.0):.0f} ms)"
+            else:
+                text = f"{name}: loading..."
+            cv2.putText(status, text, (10, 65 + 28 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        cv2.imshow(WINDOW_NAME, status)
+        cv2.waitKey(30)
+
+    def startup(self):
+        #Camera open, MediaPipe graph + warm-up and pyautogui load run side by side behind a status window
+        tasks = {
+            "camera": self.open_camera,
+            "detector": lambda: self.build_detector(pool=self.pool),
+            "actions": self.build_actions,
+        }
+        with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+            futures = {name: pool.submit(self.timed, name, fn) for name, fn in tasks.items()}
+            while not self.headless and not all(future.done() for future in futures.values()):
+                self.show_status(futures)
+
+            self.cap = futures["camera"].result()
+            self.detector = futures["detector"].result()
+            self.actions = futures["actions"].result()
+
+        #The driver thread interpolates in wall-clock time, there is nothing for it to do on a simulated clock
+        if config.CURSOR_DRIVER_ENABLED and not self.clock.simulated:
+            self.cursor_driver = CursorDriver(self.actions.cursor)
+            self.cursor_driver.start()
+        if self.governor is not None:
+            self.apply_tier(self.governor.tier)
+        self.apply_settings(self.settings, None)
+        if self.calibration.load(self.calibration_path):
+            self.update_transform()
+        self.config_watcher.start()
+        self.drag = DragController(self.actions.cursor, self.cursor_driver)
+        self.keyboard = VirtualKeyboard(self.actions.ping_action)
+        if config.EVENT_LOG_ENABLED:
+            EVENT_LOG.start()
+            EVENT_LOG.log("session", user=config.CALIBRATION_USER)
+        if self.event_server is not None:
+            self.event_server.start()
+
+    def report_startup(self):
+        self.first_frame_ms = (time.perf_counter() - STARTUP_T0) * 1000.0
+        parts = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.startup_metrics.items())
+        print(f"[startup] first processed frame after {self.first_frame_ms:.0f} ms ({parts})")
+
+    def request_trace_toggle(self, *_):
+        self.trace_toggle_requested = True
+
+    def toggle_trace(self):
+        self.trace_toggle_requested = False
+        if TRACER.enabled:
+            TRACER.set_enabled(False)
+            path = os.path.join(config.TRACE_DIR, time.strftime("trace_%Y%m%d_%H%M%S.json"))
+            TRACER.dump(path)
+            print(f"[trace] stopped, {TRACER.slow_frames} slow frames, written to {path}")
+        else:
+            TRACER.set_enabled(True)
+            print("[trace] started")
+
+    def apply_settings(self, settings, previous):
+        self.settings = settings
+
+        self.classifier.PINCH_THRESHOLD = settings.pinch_threshold
+        self.classifier.FINGER_TIP_THRESHOLD = settings.finger_tip_threshold
+        self.classifier.THUMB_EXTENDED_RATIO = settings.thumb_extended_ratio
+        self.classifier.FINGER_EXTENDED_RATIO = settings.finger_extended_ratio
+        self.classifier.THUMB_DIRECTION_THRESHOLD = settings.thumb_direction_threshold
+        self.classifier.THREE_FINGERS_DIRECTION_THRESHOLD = settings.three_fingers_direction_threshold
+        self.classifier.POKE_Z_DELTA = settings.poke_z_delta
+        self.classifier.POKE_REQUIRE_EXTENDED = settings.poke_require_extended
+        self.classifier.THUMBS_Y_DELTA = settings.thumbs_y_delta
+        self.classifier.cooldown_frames = settings.gesture_cooldown_frames
+        if self.templates is not None:
+            self.templates.static_threshold = settings.template_static_threshold
+            self.templates.dynamic_threshold = settings.template_dynamic_threshold
+
+        self.compile_rules(settings)
+        self.apply_cursor_filter(settings)
+        self.actions.ping_action("SET_CLICK_COOLDOWN", settings.click_cooldown)
+        self.actions.ping_action("SET_ACTION_COOLDOWN", settings.keyboard_cooldown)
+
+        #Input scale is owned by the governor tiers when it runs
+        if self.governor is None:
+            self.detector.set_input_scale(settings.detector_input_scale)
+
+        if previous is not None and settings.detector_changed(previous, self.detector_fields()):
+            self.rebuild_detector()
+
+    def apply_cursor_filter(self, settings):
+        #With the driver thread running, it does the speed clamp at its own rate
+        try:
+            self.cursor_filter = CursorFilter.from_settings(settings, clamp=self.cursor_driver is None)
+        except ValueError as e:
+            print(f"Error in cursor filter settings, keeping the previous filter: {e}")
+            return
+        if self.cursor_driver is not None:
+            self.cursor_driver.max_speed = settings.cursor_max_speed or float("inf")
 
-        #Gesture state machine (ThumbsUp / ThumbsDown -> ACTIVE / IDLE)
-        self.state_machine = GestureStateMachine()
+    def compile_rules(self, settings):
+        try:
+            table = compile_rules(
+                settings.gesture_rules,
+                self.actions,
+                states=[s.name for s in ControlState],
+                gestures=self.gestures,
+                settings=settings,
+                app_actions={
+                "move_pointer": self.move_pointer,
+                "drag_pointer": self.drag_pointer,
+                "toggle_keyboard": self.toggle_keyboard,
+                "keyboard_track": self.keyboard_track,
+                "keyboard_stroke": self.keyboard_stroke,
+            },
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Error compiling gesture rules, keeping the previous ones: {e}")
+            return
+        self.rules = RuleEngine(table)
+
+    def gesture_set(self):
+        custom = self.templates.library.names() if self.templates is not None else []
+        return GestureClassifier.GESTURES + tuple(name for name in custom if name not in GestureClassifier.GESTURES)
+
+    def classify(self, landmarks):
+        #Built-in rules, overridden by a matching template. A static template is a per-frame label like the
+        #built-in ones and goes through the smoother; a dynamic match is already integrated over time and
+        #replaces the smoothed label for the frame it completes on.
+        static, dynamic = None, None
+        if self.templates is not None:
+            static, dynamic = self.templates.update(landmarks, self.frame_time)
+        if self.smoother is not None:
+            label, confidence = static or self.classifier.classify_with_confidence(landmarks)
+            gesture = self.smoother.update(label, confidence)
+        else:
+            gesture = static[0] if static else self.classifier.classify_gesture(landmarks)
+        if self.recorder.active:
+            self.recorder.add(landmarks, self.frame_time)
+        return dynamic[0] if dynamic else gesture
+
+    def toggle_recording(self):
+        if self.templates is None:
+            print("[templates] disabled (TEMPLATES_ENABLED)")
+            return
+        if not self.recorder.active:
+            try:
+                self.recorder.start(self.settings.template_record_name, self.settings.template_record_kind)
+            except ValueError as e:
+                print(f"[templates] {e}")
+                return
+            print(f"[templates] recording {self.recorder.kind} template '{self.recorder.name}'")
+            return
 
-        self.finger_hold_start_time = None
-        self.finger_hold_click_fired = False
-        self.FINGER_HOLD_TIME = 1.0  # seconds
+        library = self.templates.library
+        frames = self.recorder.stop(library)
+        if not frames:
+            print(f"[templates] demonstration too short (< {self.recorder.min_frames} frames with a hand), dropped")
+            return
+        library.save(config.TEMPLATE_LIBRARY_PATH)
+        print(f"[templates] saved '{self.recorder.name}' ({frames} frames), {len(library)} templates")
+        EVENT_LOG.log("template", name=self.recorder.name, template_kind=self.recorder.kind, frames=frames)
+
+        #A new name joins the gesture set: smoother and rule table are rebuilt over it
+        gestures = self.gesture_set()
+        if gestures != self.gestures:
+            self.gestures = gestures
+            if self.smoother is not None:
+                self.smoother = GestureHMM(self.gestures)
+            self.compile_rules(self.settings)
+
+    def detector_fields(self):
+        #Model complexity is owned by the governor tiers when it runs
+        if self.governor is not None:
+            return tuple(name for name in DETECTOR_FIELDS if name != "model_complexity")
+        return DETECTOR_FIELDS
+
+    def rebuild_detector(self):
+        #New graph + warm-up on a worker thread, swapped in by swap_detector() once ready
+        if self.detector_rebuild is not None and self.detector_rebuild.is_alive():
+            return
+        settings = self.settings
 
+        def work():
+            try:
+                self.pending_detector = (self.build_detector(settings), settings)
+            except Exception as e:
+                print(f"Error rebuilding detector: {e}")
+
+        self.detector_rebuild = threading.Thread(target=work, name="detector-rebuild", daemon=True)
+        self.detector_rebuild.start()
+
+    def swap_detector(self):
+        (detector, built_with), self.pending_detector = self.pending_detector, None
+        old = self.detector
+        self.detector = detector
+        if self.governor is not None:
+            self.apply_tier(self.governor.tier)
+        old.cleanup()
+
+        #Settings may have moved on again while the graph was building
+        if self.settings.detector_changed(built_with, self.detector_fields()):
+            self.rebuild_detector()
+
+    def apply_tier(self, tier):
+        self.detector.set_model_complexity(tier["model_complexity"])
+        self.detector.set_input_scale(tier["input_scale"])
+        self.keyframe_interval = max(1, tier["keyframe_interval"])
+        self.hud_level = tier["hud_level"]
+        self.display_every = max(1, tier["display_every"])
+
+    def apply_power(self, power):
+        if power == self.power:
+            return
+        previous = self.power
+        self.power = power
+        self.power_profile = config.POWER_STATES[power.name]
+
+        #Ask the camera for the lower rate and pace the loop as well, drivers often ignore CAP_PROP_FPS
+        fps = self.power_profile["capture_fps"] or self.native_fps
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.frame_period = 1.0 / self.power_profile["capture_fps"] if self.power_profile["capture_fps"] else 0.0
+        if previous is not None:
+            EVENT_LOG.log("power", state=power.name, prev=previous.name)
+
+    def update_transform(self):
+        transform = self.calibration.screen_transform(
+            self.actions.cursor.screen_width,
+            self.actions.cursor.screen_height,
+        )
+        self.actions.ping_action("SET_TRANSFORM", transform)
 
     def move_pointer(self, landmarks):
         index_xy = self.classifier.pointer_position(landmarks)
         if index_xy is None:
             return
 
+        if self.calibration.add_calibration_sample(landmarks):
+            self.update_transform()
+
         screen_xy = self.actions.cursor.map_coordinates(
             index_xy[0],
             index_xy[1],
             config.FRAME_WIDTH,
             config.FRAME_HEIGHT,
         )
-        screen_xy = smooth(self.prev_screen_xy, screen_xy, alpha=(1 - config.SMOOTHING_FACTOR))
-        self.prev_screen_xy = screen_xy
+        if self.track is not None and self.track.add(self.frame_time, screen_xy[0], screen_xy[1]):
+            EVENT_LOG.log("track", **self.track.fields())
+            self.track.reset()
+        x, y = self.cursor_filter.filter(screen_xy[0], screen_xy[1], self.frame_time)
+        screen_xy = (int(x), int(y))
+
+        #Move cursor (the driver thread interpolates between frames when enabled)
+        if self.cursor_driver is not None:
+            self.cursor_driver.set_target(screen_xy[0], screen_xy[1], self.frame_time)
+        else:
+            self.actions.ping_action("move_to", screen_xy[0], screen_xy[1], duration=0.0)
+        if self.event_server is not None:
+            self.event_server.publish_cursor(screen_xy[0], screen_xy[1])
+
+    def drag_pointer(self, landmarks):
+        #Press on the first frame (before moving, so the drag starts where the pointer is), then stream moves
+        if self.drag.hold(self.frame_time):
+            self.move_pointer(landmarks)
+
+    def toggle_keyboard(self, landmarks):
+        #The same held gesture also matches the rule of the state it just switched to
+        gesture = self.rules.active_key[1] if self.rules.active_key else None
+        if gesture is not None and gesture == self.keyboard_toggle_gesture:
+            return
+        self.keyboard_toggle_gesture = gesture
+        typing = self.state_machine.state != ControlState.TYPING
+        self.state_machine.set_typing(typing)
+        if typing:
+            self.keyboard.open()
+        else:
+            self.keyboard.close()
+
+    def keyboard_track(self, landmarks):
+        point = self.classifier.pointer_position(landmarks)
+        if point is not None:
+            self.keyboard.track(point)
 
-        #Move cursor
-        self.actions.ping_action("move_to", screen_xy[0], screen_xy[1], duration=0.0)
+    def keyboard_stroke(self, landmarks):
+        point = self.classifier.pointer_position(landmarks)
+        if point is not None:
+            self.keyboard.stroke(point, self.frame_time)
 
     def run(self):
-        if not self.cap.isOpened():
-            raise RuntimeError("Cannot open camera")
+        frame_index = 0
+        results = None
+        hand_landmarks = []
         try:
+            if self.cap is None:
+                self.startup()
+            if not self.cap.isOpened():
+                raise RuntimeError("Cannot open camera")
+
             while True:
-                ok, frame = self.cap.read()
+                #Config / detector changes land here, between frames
+                settings = self.config_watcher.take()
+                if settings is not None:
+                    self.apply_settings(settings, self.settings)
+                if self.pending_detector is not None:
+                    self.swap_detector()
+                    results = None
+                if self.trace_toggle_requested:
+                    self.toggle_trace()
+
+                TRACER.frame_begin()
+                TRACER.begin("capture")
+                ok, frame = self.cap.read(self.pool.peek("capture"))
+                TRACER.end("capture")
                 if not ok:
-                    print("Cannot read frame from camera")
+                    if not self.headless:
+                        print("Cannot read frame from camera")
                     break
-
-                #Mirror img
-                frame = cv2.flip(frame, 1)
-
-                #Detect hand and landmarks
-                results = self.detector.detect_hands(frame)
-                hand_landmarks = self.detector.get_landmarks(results, frame.shape)
-                frame = self.detector.draw_landmarks(frame, results)
+                self.pool.adopt("capture", frame)
+                frame_start = time.perf_counter()
+                #Capture timestamp, carried through detection, rule dispatch and cursor targets.
+                #Sources that know when the frame was taken report it, otherwise it's when read() returned.
+                self.frame_time = self.clock.frame_time(getattr(self.cap, "last_capture_time", None))
+
+                #Mirror img (or leave it and mirror the landmark coordinates instead)
+                if not config.MIRROR_IN_COORDINATES:
+                    TRACER.begin("mirror")
+                    frame = cv2.flip(frame, 1, dst=self.pool.get("mirror", frame.shape))
+                    TRACER.end("mirror")
+
+                #Detect hand and landmarks (between keyframes the last result is reused)
+                detect_every = max(self.keyframe_interval, self.power_profile["detect_every"])
+                run_detection = results is None or frame_index % detect_every == 0
+                #Without a result (first frame, after a detector swap) detection always runs, the gate can't veto it
+                if run_detection and results is not None and self.motion_gate is not None:
+                    TRACER.begin("motion_gate")
+                    run_detection = self.motion_gate.should_detect(frame, bool(hand_landmarks))
+                    TRACER.end("motion_gate")
+                if run_detection:
+                    TRACER.begin("detect")
+                    results = self.detector.detect_hands(frame, self.frame_time)
+                    TRACER.end("detect")
+                    TRACER.begin("landmarks")
+                    hand_landmarks = self.detector.get_landmarks(results, frame.shape)
+                    TRACER.end("landmarks")
+                else:
+                    #A pipelined worker may have finished the last frame sent to it since
+                    late = self.detector.poll()
+                    if late is not None:
+                        results = late
+                        hand_landmarks = self.detector.get_landmarks(results, frame.shape)
+                frame_index += 1
+                if self.session is not None:
+                    #Stamped the way detect_hands stamps frames, so a by-time replay finds each frame's result
+                    self.session.append(HandResults(results.hands, int(self.frame_time * 1000.0)))
+                    self.session_times.append(self.frame_time)
+                    self.session_shape = frame.shape
+
+                display = not self.headless and frame_index % max(self.display_every, self.power_profile["display_every"]) == 0
+                draw_hud = display and self.hud_level >= 1
+                if display and self.hud_level >= 2:
+                    TRACER.begin("draw_landmarks")
+                    frame = self.detector.draw_landmarks(frame, results)
+                    TRACER.end("draw_landmarks")
+                if display and config.MIRROR_IN_COORDINATES:
+                    #Only the displayed image needs flipping; HUD text is drawn after this
+                    frame = cv2.flip(frame, 1, dst=self.pool.get("display", frame.shape))
+
+                #Power state from hand presence (motion seen by the gate wakes deep idle early)
+                motion = self.motion_gate is not None and self.motion_gate.motion >= self.motion_gate.area_threshold
+                self.apply_power(self.state_machine.tick(self.frame_time, bool(hand_landmarks), motion))
 
                 #HUD based on current state
                 state = self.state_machine.state
-                hud_state_text = "ACTIVE" if state == ControlState.ACTIVE else "IDLE"
+                hud_state_text = state.name
                 hud_progress = self.state_machine.progress()
+                gesture = GestureClassifier.GESTURE_NONE
 
                 if hand_landmarks:
                     #Use first detected hand
                     landmarks = hand_landmarks[0]
 
                     #Classify gesture
-                    gesture = self.classifier.classify_gesture(landmarks)
+                    TRACER.begin("classify")
+                    gesture = self.classify(landmarks)
+                    TRACER.end("classify")
 
                     #Update state machine with this gesture
                     state = self.state_machine.update(gesture)
 
-                    #Cursor moves only when ACTIVE and hand is five fingers
-                                        # Cursor moves only when ACTIVE and hand is five fingers
-                    if (
-                        state == ControlState.ACTIVE
-                        and gesture == GestureClassifier.GESTURE_FIVE_FINGERS
-                    ):
-                        self.move_pointer(landmarks)
-
-                    if state == ControlState.ACTIVE:
-                        if gesture == GestureClassifier.GESTURE_THREE_FINGERS_UP:
-                            self.actions.ping_action("scroll_up", SCROLL_STEP)
-                        elif gesture == GestureClassifier.GESTURE_THREE_FINGERS_DOWN:
-                            self.actions.ping_action("scroll_down", SCROLL_STEP)
-
-                    if state == ControlState.ACTIVE and gesture == GestureClassifier.GESTURE_POINTER:
-                        now = time.time()
-                        if self.finger_hold_start_time is None:
-                            self.finger_hold_start_time = now
-                            self.finger_hold_click_fired = False
-                        else:
-                            if (
-                                not self.finger_hold_click_fired
-                                and (now - self.finger_hold_start_time) >= self.FINGER_HOLD_TIME
-                            ):
-                                self.actions.ping_action("left_click")
-                                self.finger_hold_click_fired = True
-                    else:
-                        self.finger_hold_start_time = None
-                        self.finger_hold_click_fired = False
+                    #Actions for this (state, gesture) from the compiled rule table
+                    TRACER.begin("dispatch")
+                    self.rules.dispatch(state.name, gesture, landmarks, self.frame_time)
+                    TRACER.end("dispatch")
+                    if gesture != self.keyboard_toggle_gesture:
+                        self.keyboard_toggle_gesture = None
 
                     #HUD: show current gesture text
-                    cv2.putText(
-                        frame,
-                        f"Gesture: {gesture}",
-                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
-                        1, (0, 255, 0), 2,
-                    )
+                    if draw_hud:
+                        cv2.putText(
+                            frame,
+                            f"Gesture: {gesture}",
+                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
+                            1, (0, 255, 0), 2,
+                        )
 
                     #Refresh HUD after state update
-                    hud_state_text = "ACTIVE" if state == ControlState.ACTIVE else "IDLE"
+                    hud_state_text = state.name
                     hud_progress = self.state_machine.progress()
+                else:
+                    #Hand lost: hold / repeat timers start over when it comes back
+                    self.rules.reset()
+                    self.keyboard_toggle_gesture = None
+                    if self.smoother is not None:
+                        self.smoother.reset()
+                    if self.templates is not None:
+                        self.templates.reset()
+
+                #Release a pinch-drag on release, hand loss or the safety timeout
+                self.drag.update(self.frame_time, bool(hand_landmarks))
+                #End of a swipe stroke decodes and types the word
+                self.keyboard.update(self.frame_time, bool(hand_landmarks), self.state_machine.state == ControlState.TYPING)
+
+                #Session log: gesture transitions (with how long the previous one was held) and state changes
+                if gesture != self.last_gesture:
+                    held_ms = None if self.gesture_since is None else round((self.frame_time - self.gesture_since) * 1000.0, 1)
+                    EVENT_LOG.log("gesture", gesture=gesture, prev=self.last_gesture, prev_ms=held_ms)
+                    self.last_gesture = gesture
+                    self.gesture_since = self.frame_time
+                if self.state_machine.state != self.last_state:
+                    EVENT_LOG.log("state", state=self.state_machine.state.name,
+                                  prev=self.last_state.name if self.last_state is not None else None)
+                    self.last_state = self.state_machine.state
+
+                if self.event_server is not None:
+                    self.event_server.publish_gesture(gesture)
+                    self.event_server.publish_state(state.name)
+
+                if self.publisher is not None:
+                    self.publisher.publish(
+                        hand_landmarks,
+                        self.detector.get_hand_info(results),
+                        gesture,
+                        state.name,
+                        frame.shape,
+                    )
 
-                #HUD state text
-                cv2.putText(
-                    frame,
-                    f"State: {hud_state_text}",
-                    (10, 70), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2,
-                )
-
-                #Progress bar (simple ON/OFF, but kept for compatibility)
-                cv2.rectangle(frame, (10, 90), (210, 110), (40, 40, 40), -1)
-                cv2.rectangle(
-                    frame,
-                    (10, 90),
-                    (10 + int(200 * max(0.0, min(1.0, hud_progress))), 110),
-                    (0, 200, 0),
-                    -1,
-                )
-
-                cv2.imshow("Hand Gesture Cursor (Thumbs Up=ON, Thumbs Down=OFF, FIVE to move)", frame)
-                if cv2.waitKey(1) & 0xFF == ord("q"):
-                    break
+                if draw_hud:
+                    if self.keyboard.is_open:
+                        self.keyboard.draw(frame)
 
-                time.sleep(0.001)
+                    #HUD state text
+                    cv2.putText(
+                        frame,
+                        f"State: {hud_state_text}",
+                        (10, 70), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2,
+                    )
+
+                    #Progress bar towards the next timed power transition
+                    cv2.rectangle(frame, (10, 90), (210, 110), (40, 40, 40), -1)
+                    cv2.rectangle(
+                        frame,
+                        (10, 90),
+                        (10 + int(200 * max(0.0, min(1.0, hud_progress))), 110),
+                        (0, 200, 0),
+                        -1,
+                    )
+                    remaining = self.state_machine.time_to_transition()
+                    power_text = f"Power: {self.power.name}"
+                    if remaining is not None:
+                        power_text += f" -> {self.state_machine.pending_transition().name} in {remaining:.0f}s"
+                    cv2.putText(frame, power_text, (220, 106), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+                    #Quality tier picked by the governor
+                    if self.governor is not None:
+                        cv2.putText(
+                            frame,
+                            f"Tier: {self.governor.tier_name} ({self.governor.last_average_ms:.1f} ms)",
+                            (10, 135),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1,
+                        )
+
+                    if self.recorder.active:
+                        cv2.putText(
+                            frame,
+                            f"Recording {self.recorder.kind} '{self.recorder.name}' ({len(self.recorder.frames)} frames)",
+                            (10, 185),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2,
+                        )
+
+                    #Detection paused by the motion gate
+                    if self.motion_gate is not None and not self.motion_gate.open:
+                        cv2.putText(
+                            frame,
+                            f"Idle: detection paused ({100 * self.motion_gate.skip_ratio():.0f}% skipped)",
+                            (10, 160),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (160, 160, 160), 1,
+                        )
+
+                if display:
+                    TRACER.begin("display")
+                    cv2.imshow(WINDOW_NAME, frame)
+                    key = cv2.waitKey(1) & 0xFF
+                    TRACER.end("display")
+                    if key == ord("q"):
+                        break
+                    if key == ord(config.TRACE_HOTKEY):
+                        self.toggle_trace()
+                    if key == ord(config.TEMPLATE_RECORD_HOTKEY):
+                        self.toggle_recording()
+
+                #Frame processing time (camera wait excluded) drives the governor and the logged latency summary
+                frame_ms = (time.perf_counter() - frame_start) * 1000.0
+                if self.governor is not None:
+                    tier = self.governor.update(frame_ms)
+                    if tier is not None:
+                        self.apply_tier(tier)
+                        EVENT_LOG.log("tier", tier=self.governor.tier_name, mean_ms=round(self.governor.last_average_ms, 2))
+                if self.frame_summary.add(frame_ms, run_detection):
+                    fields = self.frame_summary.fields()
+                    if isinstance(self.detector, DetectionWorker):
+                        fields["ipc_ms"] = round(self.detector.ipc_ms, 3)
+                        fields["restarts"] = self.detector.restarts
+                    EVENT_LOG.log("frames", **fields)
+                    self.frame_summary.reset()
+
+                if self.first_frame_ms is None:
+                    self.report_startup()
+
+                TRACER.frame_end()
+
+                #Low-power states pace the loop down to their capture rate
+                idle = self.frame_period - (time.perf_counter() - frame_start)
+                self.clock.sleep(max(0.001, idle))
         finally:
-            self.cap.release()
-            cv2.destroyAllWindows()
+            if TRACER.enabled:
+                self.toggle_trace()
+            if self.session:
+                ReplayBackend.save(config.DETECTOR_RECORD_PATH, self.session, self.session_times, self.session_shape)
+                print(f"[session] {len(self.session)} frames recorded to {config.DETECTOR_RECORD_PATH}")
+            if self.frame_summary.count:
+                EVENT_LOG.log("frames", **self.frame_summary.fields())
+            if self.track is not None and self.track.t:
+                EVENT_LOG.log("track", **self.track.fields())
+            self.config_watcher.stop()
+            if self.drag is not None:
+                self.drag.release()
+            if self.cursor_driver is not None:
+                self.cursor_driver.stop()
+            if self.publisher is not None:
+                self.publisher.close()
+            if self.event_server is not None:
+                self.event_server.stop()
+            self.calibration.save(self.calibration_path)
+            if self.cap is not None:
+                self.cap.release()
+            if not self.headless:
+                cv2.destroyAllWindows()
             try:
-                self.detector.cleanup()
+                if self.detector is not None:
+                    self.detector.cleanup()
             except Exception:
                 pass
+            EVENT_LOG.stop()
 
 if __name__ == "__main__":
     HTApp().run()
\ No newline at end of file
@@ -1,4 +1,5 @@
-from .smoothing import PositionalSmoother, VelocityLimiter
+from .smoothing import PositionalSmoother, VelocityLimiter, ExponentialMovingAverage
 from .calibration import HandCalibration, QuickCalibration
+from .lazy import LazyModule
 
-__all__ = ['PositionalSmoother', 'VelocityLimiter', 'HandCalibration', 'QuickCalibration', 'ExponentialMovingAverage', 'KalmanFilter1D']
\ No newline at end of file
+__all__ = ['PositionalSmoother', 'VelocityLimiter', 'ExponentialMovingAverage', 'HandCalibration', 'QuickCalibration', 'LazyModule']
\ No newline at end of file
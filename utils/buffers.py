@@ -0,0 +1,33 @@
+#Reusable frame-sized arrays so capture, mirror and colour conversion write into the same memory every frame
+from utils.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+class BufferPool:
+
+    def __init__(self):
+        self.buffers = {}
+        #Every new array handed out (or adopted) counts; in steady state this stops growing
+        self.allocations = 0
+
+    def peek(self, name):
+        return self.buffers.get(name)
+
+    def get(self, name, shape, dtype = "uint8"):
+        buf = self.buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buf
+            self.allocations += 1
+        return buf
+
+    def adopt(self, name, array):
+        #For calls like VideoCapture.read() that may ignore the buffer they were given
+        if self.buffers.get(name) is not array:
+            self.buffers[name] = array
+            self.allocations += 1
+        return array
+
+    def clear(self, *names):
+        for name in names or list(self.buffers):
+            self.buffers.pop(name, None)
@@ -1,12 +1,106 @@
 #calibration for visualization
-import numpy as np
 import json
+import math
 import os
 
+class P2Quantile:
+    #Running quantile estimate (Jain & Chlamtac P^2), five markers no matter how long the stream is
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        q = self.heights
+
+        #First five samples are kept sorted as the initial markers
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        #Nudge the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = self._parabolic(i, d)
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q = self.heights
+        n = self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            return self.heights[int(round(self.p * (len(self.heights) - 1)))]
+        return self.heights[2]
+
+    def state(self):
+        return {
+            'count': self.count,
+            'heights': list(self.heights),
+            'positions': list(self.positions),
+            'desired': list(self.desired),
+        }
+
+    def restore(self, state):
+        self.count = state['count']
+        self.heights = list(state['heights'])
+        self.positions = list(state['positions'])
+        self.desired = list(state['desired'])
+
+class RunningMean:
+    #Plain mean until window samples have been seen, then an EMA with the same weight so it can drift
+
+    def __init__(self, window = 100):
+        self.window = window
+        self.count = 0
+        self.value = None
+
+    def add(self, x):
+        self.count += 1
+        if self.value is None:
+            self.value = x
+            return
+        alpha = 1.0 / min(self.count, self.window)
+        self.value += alpha * (x - self.value)
+
 class HandCalibration:
 
-    def __init__(self):
-        
+    def __init__(self, low_percentile = 0.05, high_percentile = 0.95, max_samples = 100, padding = 0.1):
+
         #hand size
         self.hand_length = None
         self.palm_width = None
@@ -24,63 +118,83 @@ class HandCalibration:
         #calibration state
         self.is_calibrated = False
         self.sample_count = 0
-        self.max_samples = 100
+        self.max_samples = max_samples
+        self.padding = padding
+        self.low_percentile = low_percentile
+        self.high_percentile = high_percentile
+
+        #streaming estimators, constant memory however long the session runs
+        self._reset_estimators()
 
-        #buffers for calibration data
-        self.x_positions = []
-        self.y_positions = []
-        self.hand_sizes = []
+    def _reset_estimators(self):
+        self.x_low = P2Quantile(self.low_percentile)
+        self.x_high = P2Quantile(self.high_percentile)
+        self.y_low = P2Quantile(self.low_percentile)
+        self.y_high = P2Quantile(self.high_percentile)
+        self.hand_length_mean = RunningMean(self.max_samples)
+        self.palm_width_mean = RunningMean(self.max_samples)
 
     def calc_hand_size(self, landmarks):
         if not landmarks or len(landmarks) < 21:
             return None
-        
-        wrist = np.array(landmarks[0])
-        middle_tip = np.array(landmarks[12])
-        index_mcp = np.array(landmarks[5])
-        pinky_mcp = np.array(landmarks[17])
-
-        hand_length = np.sqrt((middle_tip['x'] - wrist['x'])**2 + (middle_tip['y'] - wrist['y'])**2)
-        palm_width = np.sqrt((pinky_mcp['x'] - index_mcp['x'])**2 + (pinky_mcp['y'] - index_mcp['y'])**2)
-        
+
+        wrist = landmarks[0]
+        middle_tip = landmarks[12]
+        index_mcp = landmarks[5]
+        pinky_mcp = landmarks[17]
+
+        hand_length = math.hypot(middle_tip['x'] - wrist['x'], middle_tip['y'] - wrist['y'])
+        palm_width = math.hypot(pinky_mcp['x'] - index_mcp['x'], pinky_mcp['y'] - index_mcp['y'])
+
         return {
             'hand_length': hand_length,
             'palm_width': palm_width
         }
-    
+
     def add_calibration_sample(self, landmarks):
+        #Returns True whenever the movement range / transform was refreshed by this sample
         if not landmarks or len(landmarks) != 21:
-            return False 
-        
+            return False
+
         hand_size = self.calc_hand_size(landmarks)
         if hand_size:
-            self.hand_sizes.append(hand_size['hand_length'])
+            self.hand_length_mean.add(hand_size['hand_length'])
+            self.palm_width_mean.add(hand_size['palm_width'])
 
         index_tip = landmarks[8]
-        self.x_positions.append(index_tip['x'])
-        self.y_positions.append(index_tip['y'])
+        self.x_low.add(index_tip['x'])
+        self.x_high.add(index_tip['x'])
+        self.y_low.add(index_tip['y'])
+        self.y_high.add(index_tip['y'])
         self.sample_count += 1
 
         if self.sample_count >= self.max_samples:
-            self.finalize_calibration()
-            return True
-        
+            return self.finalize_calibration()
+
         return False
-    
+
     def finalize_calibration(self):
-        if not self.hand_sizes or not self.x_positions:
-            return
-        
-        self.hand_length = np.mean(self.hand_sizes)
+        if self.hand_length_mean.value is None or self.x_low.value() is None:
+            return False
+
+        lo_x, hi_x = self.x_low.value(), self.x_high.value()
+        lo_y, hi_y = self.y_low.value(), self.y_high.value()
+
+        #Degenerate range (hand held still), keep the previous boundaries
+        if hi_x - lo_x < 1e-6 or hi_y - lo_y < 1e-6:
+            return False
+
+        self.hand_length = self.hand_length_mean.value
+        self.palm_width = self.palm_width_mean.value
 
         #movement range with padding
-        x_padding = (max(self.x_positions) - min(self.x_positions)) * 0.1
-        y_padding = (max(self.y_positions) - min(self.y_positions)) * 0.1
+        x_padding = (hi_x - lo_x) * self.padding
+        y_padding = (hi_y - lo_y) * self.padding
 
-        self.min_x = min(self.x_positions) - x_padding
-        self.max_x = max(self.x_positions) + x_padding
-        self.min_y = min(self.y_positions) - y_padding
-        self.max_y = max(self.y_positions) + y_padding
+        self.min_x = lo_x - x_padding
+        self.max_x = hi_x + x_padding
+        self.min_y = lo_y - y_padding
+        self.max_y = hi_y + y_padding
 
         #pinch threshold as 10% of hand length
         self.pinch_threshold = self.hand_length * 0.1
@@ -89,14 +203,24 @@ class HandCalibration:
         self.finger_extension_threshold = self.hand_length * 0.5
 
         self.is_calibrated = True
+        return True
+
+    def screen_transform(self, screen_width, screen_height):
+        #Affine camera->screen mapping (ax, bx, ay, by): screen = a * cam + b
+        if not self.is_calibrated:
+            return None
+
+        ax = screen_width / (self.max_x - self.min_x)
+        ay = screen_height / (self.max_y - self.min_y)
+        return (ax, -self.min_x * ax, ay, -self.min_y * ay)
 
     def map_to_screen(self, x, y, screen_width, screen_height):
-        
+
         if not self.is_calibrated:
             return (int(x * screen_width), int(y * screen_height))
-        
-        x = map(self.min-x, min(self.max_x, x))
-        y = map(self.min_y, max(self.max_y, y))
+
+        x = max(self.min_x, min(self.max_x, x))
+        y = max(self.min_y, min(self.max_y, y))
 
         x_norm = (x - self.min_x) / (self.max_x - self.min_x)
         y_norm = (y - self.min_y) / (self.max_y - self.min_y)
@@ -108,21 +232,21 @@ class HandCalibration:
         screen_y = max(0, min(screen_height - 1, screen_y))
 
         return (screen_x, screen_y)
-    
+
     def get_scaled_threshold(self, base_threshold):
-        
+
         if not self.is_calibrated or self.hand_length is None:
             return base_threshold
-        
+
         average_hand_length = 200.0
         scale_factor = self.hand_length / average_hand_length
 
         return base_threshold * scale_factor
-    
+
     def get_progress(self):
 
         return min(1.0, self.sample_count / self.max_samples)
-    
+
     def reset(self):
         self.hand_length = None
         self.palm_width = None
@@ -134,14 +258,16 @@ class HandCalibration:
         self.finger_extension_threshold = None
         self.is_calibrated = False
         self.sample_count = 0
-        self.x_positions = []
-        self.y_positions = []
-        self.hand_sizes = []
+        self._reset_estimators()
+
+    @staticmethod
+    def profile_path(user, profile_dir = 'profiles'):
+        return os.path.join(profile_dir, f"{user}.json")
 
     def save(self, filename = 'calibration.json'):
         if not self.is_calibrated:
             return False
-        
+
         data = {
             'hand_length': self.hand_length,
             'palm_width': self.palm_width,
@@ -150,20 +276,34 @@ class HandCalibration:
             'min_y': self.min_y,
             'max_y': self.max_y,
             'pinch_threshold': self.pinch_threshold,
-            'finger_extension_threshold': self.finger_extension_threshold
+            'finger_extension_threshold': self.finger_extension_threshold,
+            'sample_count': self.sample_count,
+            #estimator state so the next session keeps refining instead of starting over
+            'estimators': {
+                'x_low': self.x_low.state(),
+                'x_high': self.x_high.state(),
+                'y_low': self.y_low.state(),
+                'y_high': self.y_high.state(),
+                'hand_length': [self.hand_length_mean.count, self.hand_length_mean.value],
+                'palm_width': [self.palm_width_mean.count, self.palm_width_mean.value],
+            },
         }
 
         try:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
             with open(filename, 'w') as f:
                 json.dump(data, f, indent=4)
             return True
         except Exception as e:
+            print(f"Error saving calibration {filename}: {e}")
             return False
-        
+
     def load(self, filename = 'calibration.json'):
         if not os.path.exists(filename):
             return False
-        
+
         try:
             with open(filename, 'r') as f:
                 data = json.load(f)
@@ -177,37 +317,50 @@ class HandCalibration:
             self.pinch_threshold = data['pinch_threshold']
             self.finger_extension_threshold = data['finger_extension_threshold']
             self.is_calibrated = True
-            self.sample_count = self.max_samples
+            self.sample_count = data.get('sample_count', self.max_samples)
+
+            estimators = data.get('estimators')
+            if estimators:
+                self.x_low.restore(estimators['x_low'])
+                self.x_high.restore(estimators['x_high'])
+                self.y_low.restore(estimators['y_low'])
+                self.y_high.restore(estimators['y_high'])
+                self.hand_length_mean.count, self.hand_length_mean.value = estimators['hand_length']
+                self.palm_width_mean.count, self.palm_width_mean.value = estimators['palm_width']
+            else:
+                #older profile without estimator state, start streaming from scratch
+                self.sample_count = 0
 
             return True
-        
+
         except Exception as e:
+            print(f"Error loading calibration {filename}: {e}")
             return False
-        
+
 class QuickCalibration:
 
-    def __init__(self, num_smaples = 10):
-        self.num_smaples = num_smaples
-        self.samples = []
+    def __init__(self, num_samples = 10):
+        self.num_samples = num_samples
+        self.length_mean = RunningMean(num_samples)
         self.hand_length = None
         self.is_complete = False
 
     def add_sample(self, landmarks):
         if not landmarks or len(landmarks) != 21:
             return False
-        
+
         wrist = landmarks[0]
         middle_tip = landmarks[12]
 
-        length = np.sqrt((middle_tip['x'] - wrist['x'])**2 + (middle_tip['y'] - wrist['y'])**2)
-        self.samples.append(length)
+        length = math.hypot(middle_tip['x'] - wrist['x'], middle_tip['y'] - wrist['y'])
+        self.length_mean.add(length)
 
-        if len(self.smaples) >= self.num_smaples:
-            self.hand_length = np.mean(self.samples)
+        if self.length_mean.count >= self.num_samples:
+            self.hand_length = self.length_mean.value
             self.is_complete = True
             return True
-        
+
         return False
-    
+
     def get_progress(self):
-        return min(1.0, len(self.samples) / self.num_smaples)
\ No newline at end of file
+        return min(1.0, self.length_mean.count / self.num_samples)
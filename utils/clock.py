@@ -0,0 +1,48 @@
+#Time source for timing decisions: frame timestamps, click / key cooldowns, gesture holds, power-state timers.
+#RealClock is the monotonic wall clock (perf_counter, same base as camera capture times). SimulatedClock only
+#moves when frames arrive, so a recorded session goes through the same decisions as fast as the CPU allows.
+#Processing-time measurements (frame budget, tracing, startup metrics) stay on perf_counter either way.
+import time
+
+class RealClock:
+
+    simulated = False
+
+    def now(self):
+        return time.perf_counter()
+
+    def frame_time(self, capture_time = None):
+        #Timestamp for a new frame: when the source says it was taken, else now
+        return capture_time if capture_time is not None else self.now()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class SimulatedClock:
+
+    simulated = True
+
+    def __init__(self, start = 0.0, frame_period = 1.0 / 30.0):
+        self.t = start
+        #Step for frames whose source reports no capture time
+        self.frame_period = frame_period
+
+    def now(self):
+        return self.t
+
+    def frame_time(self, capture_time = None):
+        if capture_time is None:
+            self.t += self.frame_period
+        else:
+            self.t = max(self.t, capture_time)
+        return self.t
+
+    def advance(self, seconds):
+        self.t += seconds
+        return self.t
+
+    def sleep(self, seconds):
+        #Loop pacing is a no-op: time only moves with the frames
+        pass
+
+CLOCK = RealClock()
@@ -0,0 +1,209 @@
+#Session event log: gesture transitions, state changes, actions, errors and per-frame latency summaries.
+#log() only enqueues; a background thread writes compact JSON lines to size-rotated files.
+import json
+import os
+import queue
+import threading
+import time
+
+from gesture_rec import gesture_config as config
+
+#Frame-time histogram bucket upper edges (ms); summaries carry counts so percentiles merge exactly across files
+LATENCY_BUCKETS_MS = (2, 4, 6, 8, 10, 12, 15, 20, 25, 30, 35, 40, 50, 60, 75, 100, 125, 150, 200, 300, 500, 1000)
+
+def bucket_index(ms):
+    for i, edge in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= edge:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+class FrameSummary:
+    #Per-frame latency accumulator, flushed as one "frames" event every N frames
+
+    def __init__(self, frames = config.EVENT_LOG_SUMMARY_FRAMES):
+        self.frames = frames
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.detected = 0
+        self.hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, frame_ms, detected):
+        self.count += 1
+        self.total_ms += frame_ms
+        if frame_ms > self.max_ms:
+            self.max_ms = frame_ms
+        self.detected += detected
+        self.hist[bucket_index(frame_ms)] += 1
+        return self.count >= self.frames
+
+    def fields(self):
+        return {
+            "n": self.count,
+            "mean_ms": round(self.total_ms / max(1, self.count), 2),
+            "max_ms": round(self.max_ms, 2),
+            "detected": self.detected,
+            "hist": self.hist,
+        }
+
+class TrackBuffer:
+    #Raw pointer samples (capture time, screen x, y), logged in batches as "track" events for offline tuning
+
+    def __init__(self, batch = config.EVENT_LOG_TRACK_BATCH):
+        self.batch = batch
+        self.reset()
+
+    def reset(self):
+        self.t = []
+        self.x = []
+        self.y = []
+
+    def add(self, t, x, y):
+        self.t.append(round(t, 4))
+        self.x.append(int(x))
+        self.y.append(int(y))
+        return len(self.t) >= self.batch
+
+    def fields(self):
+        return {"ts": self.t, "x": self.x, "y": self.y}
+
+class EventLog:
+
+    def __init__(self, directory = config.EVENT_LOG_DIR, max_bytes = config.EVENT_LOG_MAX_BYTES,
+                 max_files = config.EVENT_LOG_MAX_FILES, queue_size = config.EVENT_LOG_QUEUE_SIZE,
+                 flush_interval = config.EVENT_LOG_FLUSH_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.running = False
+        self.dropped = 0
+        self.thread = None
+        self.file = None
+        self.path = None
+        self.written = 0
+
+    def log(self, kind, **fields):
+        #Never blocks the caller; events are dropped (and counted) if the writer falls behind
+        if not self.running:
+            return
+        try:
+            self.queue.put_nowait((time.time(), kind, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def error(self, message):
+        #Errors are still printed when no log is running (e.g. controllers used on their own)
+        if self.running:
+            self.log("error", message=message)
+        else:
+            print(message)
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="event-log", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.running = False
+        #A wedged writer with a full queue must not hang shutdown; without the sentinel the writer
+        #still stops once it has drained the queue (running is already False)
+        try:
+            self.queue.put(None, timeout=0.5)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=2.0)
+        if self.thread.is_alive():
+            print(f"Event log writer did not stop, {self.queue.qsize()} events not written")
+        self.thread = None
+
+    def open_file(self):
+        os.makedirs(self.directory, exist_ok=True)
+        #Zero-padded part number keeps names in write order when sorted
+        name = time.strftime("events_%Y%m%d_%H%M%S", time.localtime())
+        part = 0
+        path = os.path.join(self.directory, f"{name}_{part:04d}.jsonl")
+        while os.path.exists(path):
+            part += 1
+            path = os.path.join(self.directory, f"{name}_{part:04d}.jsonl")
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+        self.written = 0
+        self.prune()
+
+    def prune(self):
+        #Keep the newest max_files files
+        if not self.max_files:
+            return
+        files = sorted(f for f in os.listdir(self.directory) if f.startswith("events_"))
+        for name in files[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def write(self, event):
+        t, kind, fields = event
+        fields["t"] = round(t, 4)
+        fields["k"] = kind
+        line = json.dumps(fields, separators=(",", ":")) + "\n"
+        if self.file is None or self.written + len(line) > self.max_bytes:
+            if self.file is not None:
+                self.file.close()
+            self.open_file()
+        self.file.write(line)
+        self.written += len(line)
+
+    def run(self):
+        last_flush = time.monotonic()
+        reported_drops = 0
+        try:
+            while True:
+                try:
+                    event = self.queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    event = ()
+
+                #Drain whatever else is queued in one go
+                batch = [event] if event != () else []
+                while True:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = not self.running and not batch
+                for item in batch:
+                    if item is None:
+                        stop = True
+                    else:
+                        self.write(item)
+
+                if self.dropped != reported_drops:
+                    self.write((time.time(), "dropped", {"n": self.dropped - reported_drops}))
+                    reported_drops = self.dropped
+
+                now = time.monotonic()
+                if self.file is not None and (stop or now - last_flush >= self.flush_interval):
+                    self.file.flush()
+                    last_flush = now
+                if stop:
+                    break
+        except Exception as e:
+            self.running = False
+            print(f"Error writing event log {self.path}: {e}")
+        finally:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+EVENT_LOG = EventLog()
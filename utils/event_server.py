@@ -0,0 +1,205 @@
+#Gesture / state / cursor event stream for remote dashboards, length-prefixed JSON over TCP
+#Each message is a 4-byte big-endian length followed by {"seq", "dropped", "events": [...]}.
+#The server runs its own asyncio loop on a daemon thread; the frame loop only hands events over.
+import argparse
+import asyncio
+import json
+import struct
+import threading
+import time
+from collections import deque
+
+from gesture_rec import gesture_config as config
+
+LENGTH = struct.Struct(">I")
+
+class ClientSession:
+
+    def __init__(self, writer, max_pending):
+        self.writer = writer
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.cursor = None
+        self.wakeup = asyncio.Event()
+        self.seq = 0
+        self.dropped = 0
+        self.cursor_dropped = 0
+
+    def push(self, event):
+        #Bounded backlog: a client that stops reading loses its oldest events, never stalls the server
+        if len(self.pending) >= self.max_pending:
+            self.pending.popleft()
+            self.dropped += 1
+        self.pending.append(event)
+        self.wakeup.set()
+
+    def set_cursor(self, event):
+        #Only the newest cursor position is kept while the client is still draining the last batch
+        if self.cursor is not None:
+            self.cursor_dropped += 1
+        self.cursor = event
+        self.wakeup.set()
+
+    async def run(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+
+            events = list(self.pending)
+            self.pending.clear()
+            if self.cursor is not None:
+                events.append(self.cursor)
+                self.cursor = None
+            if not events:
+                continue
+
+            self.seq += 1
+            payload = json.dumps(
+                {"seq": self.seq, "dropped": self.dropped, "events": events},
+                separators=(",", ":"),
+            ).encode()
+            self.writer.write(LENGTH.pack(len(payload)) + payload)
+            await self.writer.drain()
+
+class EventServer:
+
+    def __init__(self, host = config.EVENT_SERVER_HOST, port = config.EVENT_SERVER_PORT,
+                 cursor_hz = config.EVENT_SERVER_CURSOR_HZ, max_pending = config.EVENT_SERVER_MAX_PENDING):
+        self.host = host
+        self.port = port
+        self.cursor_interval = 1.0 / max(1.0, cursor_hz)
+        self.max_pending = max_pending
+
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.ready = threading.Event()
+        self.clients = set()
+
+        self.last_gesture = None
+        self.last_state = None
+        self.cursor = None
+        self.cursor_sent = None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name="event-server", daemon=True)
+        self.thread.start()
+        self.ready.wait(timeout=2.0)
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._serve())
+        except Exception as e:
+            print(f"Error starting event server on {self.host}:{self.port}: {e}")
+            self.ready.set()
+            self.loop.close()
+            self.loop = None
+            return
+
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.run_until_complete(asyncio.sleep(0))
+            self.loop.close()
+
+    async def _serve(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.loop.create_task(self._cursor_ticker())
+
+    async def _handle(self, reader, writer):
+        client = ClientSession(writer, self.max_pending)
+        client.push({"type": "hello", "gesture": self.last_gesture, "state": self.last_state, "t": time.time()})
+        self.clients.add(client)
+
+        sender = asyncio.ensure_future(client.run())
+        closed = asyncio.ensure_future(reader.read())
+        try:
+            await asyncio.wait({sender, closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            closed.cancel()
+            writer.close()
+
+    async def _cursor_ticker(self):
+        #Cursor positions are sampled at cursor_hz rather than forwarded every frame
+        while True:
+            await asyncio.sleep(self.cursor_interval)
+            cursor = self.cursor
+            if cursor is None or cursor is self.cursor_sent:
+                continue
+            self.cursor_sent = cursor
+            event = {"type": "cursor", "x": cursor[0], "y": cursor[1], "t": cursor[2]}
+            for client in self.clients:
+                client.set_cursor(event)
+
+    def _fanout(self, event):
+        for client in self.clients:
+            client.push(event)
+
+    def _emit(self, event):
+        if self.loop is None or not self.clients:
+            return
+        self.loop.call_soon_threadsafe(self._fanout, event)
+
+    #Called from the frame loop; each call is a comparison and at most one call_soon_threadsafe
+    def publish_gesture(self, gesture):
+        if gesture == self.last_gesture:
+            return
+        previous, self.last_gesture = self.last_gesture, gesture
+        self._emit({"type": "gesture", "gesture": gesture, "previous": previous, "t": time.time()})
+
+    def publish_state(self, state):
+        if state == self.last_state:
+            return
+        previous, self.last_state = self.last_state, state
+        self._emit({"type": "state", "state": state, "previous": previous, "t": time.time()})
+
+    def publish_cursor(self, x, y):
+        self.cursor = (int(x), int(y), time.time())
+
+async def read_messages(host = config.EVENT_SERVER_HOST, port = config.EVENT_SERVER_PORT):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            header = await reader.readexactly(LENGTH.size)
+            payload = await reader.readexactly(LENGTH.unpack(header)[0])
+            yield json.loads(payload)
+    except asyncio.IncompleteReadError:
+        return
+    finally:
+        writer.close()
+
+async def print_messages(host, port):
+    async for message in read_messages(host, port):
+        for event in message["events"]:
+            print(f"[{message['seq']}] {event}")
+        if message["dropped"]:
+            print(f"    ({message['dropped']} events dropped so far)")
+
+if __name__ == "__main__":
+    #Local test client: python -m utils.event_server --port 8765
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=config.EVENT_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.EVENT_SERVER_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(print_messages(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
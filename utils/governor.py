@@ -0,0 +1,79 @@
+#Closed-loop quality governor, steps through the tiers in gesture_config to hold a frame-time budget
+import time
+
+class QualityGovernor:
+
+    def __init__(self, tiers, budget_ms = 33.0, window = 30,
+                 downgrade_ratio = 1.0, upgrade_ratio = 0.6, hold_frames = 90,
+                 start_tier = 0):
+        if not tiers:
+            raise ValueError("QualityGovernor needs at least one tier")
+
+        self.tiers = tiers
+        self.budget_ms = budget_ms
+        self.window = window
+
+        #Hysteresis: step down above budget * downgrade_ratio, step up only below budget * upgrade_ratio,
+        #and never change again until hold_frames have passed
+        self.downgrade_ratio = downgrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.hold_frames = hold_frames
+
+        self.tier_index = max(0, min(len(tiers) - 1, start_tier))
+        self.frames_since_change = 0
+        self.window_total = 0.0
+        self.window_count = 0
+        self.last_average_ms = 0.0
+        self.decisions = []
+
+    @property
+    def tier(self):
+        return self.tiers[self.tier_index]
+
+    @property
+    def tier_name(self):
+        return self.tier.get("name", str(self.tier_index))
+
+    def update(self, frame_ms):
+        #Feed one frame's processing time, returns the new tier dict when a step was taken
+        self.frames_since_change += 1
+        self.window_total += frame_ms
+        self.window_count += 1
+
+        if self.window_count < self.window:
+            return None
+
+        average = self.window_total / self.window_count
+        self.last_average_ms = average
+        self.window_total = 0.0
+        self.window_count = 0
+
+        if self.frames_since_change < self.hold_frames:
+            return None
+
+        if average > self.budget_ms * self.downgrade_ratio and self.tier_index < len(self.tiers) - 1:
+            return self._step(+1, average)
+        if average < self.budget_ms * self.upgrade_ratio and self.tier_index > 0:
+            return self._step(-1, average)
+        return None
+
+    def _step(self, direction, average):
+        old_name = self.tier_name
+        self.tier_index += direction
+        self.frames_since_change = 0
+
+        decision = {
+            'time': time.time(),
+            'from': old_name,
+            'to': self.tier_name,
+            'average_ms': average,
+            'budget_ms': self.budget_ms,
+        }
+        self.decisions.append(decision)
+        if len(self.decisions) > 100:
+            del self.decisions[0]
+
+        verb = "Lowering" if direction > 0 else "Raising"
+        print(f"[governor] {verb} quality {old_name} -> {self.tier_name} "
+              f"(avg {average:.1f} ms, budget {self.budget_ms:.1f} ms)")
+        return self.tier
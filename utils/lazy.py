@@ -0,0 +1,36 @@
+#Deferred imports for heavy modules (cv2, mediapipe, pyautogui), loaded on first attribute access.
+#Own methods stay underscored so they never shadow the module's attributes (numpy.load, ...)
+import importlib
+import threading
+
+class LazyModule:
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        #Module settings (pyautogui.PAUSE = 0.0) must reach the module, not the proxy
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
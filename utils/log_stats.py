@@ -0,0 +1,155 @@
+#Usage and latency statistics over event logs, streamed line by line so days of logs never sit in memory
+#usage: python -m utils.log_stats logs/ --since 2026-10-01 --until 2026-10-08 --short-ms 150
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+from utils.event_log import LATENCY_BUCKETS_MS
+
+def log_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.startswith("events_") and (name.endswith(".jsonl") or name.endswith(".jsonl.gz")):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+def read_events(paths, since = None, until = None):
+    for path in log_files(paths):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  #partially written last line of a crashed session
+                t = event.get("t", 0.0)
+                if (since is not None and t < since) or (until is not None and t >= until):
+                    continue
+                yield event
+
+def percentile(hist, q):
+    total = sum(hist)
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for i, n in enumerate(hist):
+        seen += n
+        if seen >= target:
+            return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else float("inf")
+    return float("inf")
+
+class Stats:
+
+    def __init__(self, short_ms):
+        self.short_ms = short_ms
+        self.kinds = Counter()
+        self.gestures = Counter()
+        self.short_gestures = Counter()
+        self.actions = Counter()
+        self.errors = Counter()
+        self.states = Counter()
+        self.per_day = defaultdict(Counter)
+        self.hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.frames = 0
+        self.frame_ms_total = 0.0
+        self.frame_ms_max = 0.0
+        self.detected = 0
+        self.dropped = 0
+        self.first = None
+        self.last = None
+
+    def add(self, event):
+        kind = event.get("k")
+        t = event.get("t", 0.0)
+        self.kinds[kind] += 1
+        self.first = t if self.first is None else min(self.first, t)
+        self.last = t if self.last is None else max(self.last, t)
+        day = time.strftime("%Y-%m-%d", time.localtime(t))
+
+        if kind == "gesture":
+            self.gestures[event["gesture"]] += 1
+            self.per_day[day]["gestures"] += 1
+            #A gesture that only lasted a few frames before changing again is most likely a misread
+            held = event.get("prev_ms")
+            if held is not None and held < self.short_ms and event.get("prev") not in (None, "None"):
+                self.short_gestures[event["prev"]] += 1
+        elif kind == "action":
+            self.actions[event["name"]] += 1
+            self.per_day[day]["actions"] += 1
+        elif kind == "state":
+            self.states[event["state"]] += 1
+        elif kind == "error":
+            self.errors[event["message"].split(":")[0]] += 1
+        elif kind == "frames":
+            n = event["n"]
+            self.frames += n
+            self.frame_ms_total += event["mean_ms"] * n
+            self.frame_ms_max = max(self.frame_ms_max, event["max_ms"])
+            self.detected += event.get("detected", 0)
+            for i, count in enumerate(event["hist"]):
+                self.hist[i] += count
+            self.per_day[day]["frames"] += n
+        elif kind == "dropped":
+            self.dropped += event["n"]
+
+    def report(self, out):
+        if self.first is None:
+            print("no events", file=out)
+            return
+        span_h = (self.last - self.first) / 3600.0
+        print(f"events: {sum(self.kinds.values())} over {span_h:.1f} h "
+              f"({time.strftime('%Y-%m-%d %H:%M', time.localtime(self.first))} .. "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(self.last))})", file=out)
+        if self.dropped:
+            print(f"dropped by writer: {self.dropped}", file=out)
+
+        if self.frames:
+            print("\n== frame latency", file=out)
+            print(f"frames {self.frames}, detect ratio {self.detected / self.frames:.2f}, "
+                  f"mean {self.frame_ms_total / self.frames:.1f} ms, max {self.frame_ms_max:.1f} ms", file=out)
+            print("p50 <= {} ms, p95 <= {} ms, p99 <= {} ms".format(
+                percentile(self.hist, 0.50), percentile(self.hist, 0.95), percentile(self.hist, 0.99)), file=out)
+
+        if self.gestures:
+            print(f"\n== gestures (short = held < {self.short_ms:.0f} ms, likely false activations)", file=out)
+            for gesture, n in self.gestures.most_common():
+                short = self.short_gestures.get(gesture, 0)
+                print(f"{gesture:<18} {n:>8}  short {short:>6} ({short / n:.0%})", file=out)
+
+        for title, counter in (("actions", self.actions), ("state changes", self.states), ("errors", self.errors)):
+            if counter:
+                print(f"\n== {title}", file=out)
+                for name, n in counter.most_common():
+                    print(f"{name:<30} {n:>8}", file=out)
+
+        if len(self.per_day) > 1:
+            print("\n== per day", file=out)
+            for day in sorted(self.per_day):
+                c = self.per_day[day]
+                print(f"{day}  frames {c['frames']:>9}  gestures {c['gestures']:>7}  actions {c['actions']:>6}", file=out)
+
+def parse_day(text):
+    return time.mktime(time.strptime(text, "%Y-%m-%d")) if text else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Usage and latency statistics from event logs")
+    parser.add_argument("paths", nargs="*", default=["logs"], help="log files or directories")
+    parser.add_argument("--since", default=None, help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--until", default=None, help="YYYY-MM-DD (exclusive)")
+    parser.add_argument("--short-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    stats = Stats(args.short_ms)
+    for event in read_events(args.paths, parse_day(args.since), parse_day(args.until)):
+        stats.add(event)
+    stats.report(sys.stdout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#Replays a recorded session (DETECTOR_RECORD_PATH) through the full decision path: classifier, smoothing,
+#templates, state machine, rules and cursor / keyboard actions. It runs headless on a simulated clock, as fast
+#as the CPU allows, with actions going to recording backends instead of the OS. --check replays it again in
+#real time and compares the two action streams.
+#usage: python -m utils.replay_session logs/session.npz [--check] [--show 20]
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+from actions.cursor_ctrl import RecordingCursor
+from actions.keyboard_ctr import RecordingKeyboard
+from gesture_rec import gesture_config as config
+from utils.clock import RealClock, SimulatedClock
+from utils.lazy import LazyModule
+
+cv2 = LazyModule("cv2")
+
+class ReplayCamera:
+    #VideoCapture stand-in: blank frames of the recorded shape, stamped with the recorded capture times.
+    #On the real clock each frame is held back until it is due, like the camera did.
+
+    def __init__(self, path, clock):
+        data = np.load(path)
+        self.times = data["capture_times"] if "capture_times" in data.files else data["timestamps"] / 1000.0
+        shape = tuple(data["frame_shape"]) if "frame_shape" in data.files else (config.FRAME_HEIGHT, config.FRAME_WIDTH, 3)
+        self.image = np.zeros(shape, dtype=np.uint8)
+        self.clock = clock
+        self.index = 0
+        self.started = None
+        self.last_capture_time = None
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS and len(self.times) > 1:
+            return float(1.0 / np.median(np.diff(self.times)))
+        return 0.0
+
+    def read(self, image = None):
+        if not self.opened or self.index >= len(self.times):
+            return False, None
+        t = float(self.times[self.index])
+        if not self.clock.simulated:
+            if self.started is None:
+                self.started = time.perf_counter() - t
+            delay = self.started + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        #The recorded time either way: the replay backend looks each frame's result up by it
+        self.last_capture_time = t
+        self.index += 1
+        return True, self.image
+
+    def release(self):
+        self.opened = False
+
+def replay(path, clock, profile_dir):
+    #Replay settings: every frame is looked up (no gate / governor skipping), no driver thread, no side channels
+    config.MOTION_GATE_ENABLED = False
+    config.GOVERNOR_ENABLED = False
+    config.DETECTOR_PROCESS_ENABLED = False
+    config.CURSOR_DRIVER_ENABLED = False
+    config.EVENT_LOG_ENABLED = False
+    config.SHM_STREAM_ENABLED = False
+    config.EVENT_SERVER_ENABLED = False
+    config.DETECTOR_RECORD_PATH = None
+    from main import HTApp
+
+    camera = ReplayCamera(path, clock)
+    cursor = RecordingCursor(clock=clock)
+    keyboard = RecordingKeyboard(clock=clock)
+    app = HTApp(headless=True, camera=camera, cursor=cursor, keyboard=keyboard, clock=clock, backend="replay",
+                backend_options={"path": path, "by_time": True, "loop": False})
+    #Each run starts from an empty calibration and doesn't touch the user's profile
+    app.calibration_path = os.path.join(profile_dir, f"calibration_{type(clock).__name__}.json")
+
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    actions = sorted(cursor.events + keyboard.events, key=lambda e: e[0])
+    return camera, actions, cursor.moves, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the gesture / action logic")
+    parser.add_argument("session", help=".npz written with DETECTOR_RECORD_PATH set")
+    parser.add_argument("--check", action="store_true", help="also replay in real time and compare the actions")
+    parser.add_argument("--show", type=int, default=20, help="actions to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as profile_dir:
+        camera, actions, moves, elapsed = replay(args.session, SimulatedClock(), profile_dir)
+        duration = float(camera.times[-1] - camera.times[0]) if len(camera.times) > 1 else 0.0
+        print(f"{len(camera.times)} frames, {duration:.1f} s of session replayed in {elapsed:.2f} s "
+              f"({duration / max(elapsed, 1e-9):.0f}x realtime)")
+        print(f"{len(moves)} cursor moves, actions: " + (", ".join(f"{name} {n}" for name, n in Counter(a[1] for a in actions).items()) or "none"))
+        t0 = camera.times[0] if len(camera.times) else 0.0
+        for t, name, action_args in actions[:args.show]:
+            print(f"  {t - t0:8.3f} s  {name} {' '.join(str(a) for a in action_args)}")
+
+        if args.check:
+            print("replaying in real time...")
+            _, real_actions, real_moves, _ = replay(args.session, RealClock(), profile_dir)
+            same_actions = [a[1:] for a in actions] == [a[1:] for a in real_actions]
+            same_moves = [m[1:] for m in moves] == [m[1:] for m in real_moves]
+            print(f"actions {'identical' if same_actions else 'DIFFER'} ({len(actions)} vs {len(real_actions)}), "
+                  f"cursor moves {'identical' if same_moves else 'DIFFER'} ({len(moves)} vs {len(real_moves)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#Typed runtime settings loaded from config.json on top of gesture_config defaults, hot-reloaded by mtime polling
+import json
+import os
+import threading
+from dataclasses import dataclass, field, fields, asdict
+
+from gesture_rec import gesture_config as config
+
+#Changing any of these needs a new MediaPipe graph
+DETECTOR_FIELDS = ("max_num_hands", "detection_confidence", "tracking_confidence", "model_complexity")
+
+@dataclass(frozen=True)
+class RuntimeSettings:
+    #classifier
+    pinch_threshold: float = config.PINCH_THRESHOLD
+    finger_tip_threshold: float = config.FINGER_TIP_THRESHOLD
+    thumb_extended_ratio: float = config.THUMB_EXTENDED_RATIO
+    finger_extended_ratio: float = config.FINGER_EXTENDED_RATIO
+    thumb_direction_threshold: float = config.THUMB_DIRECTION_THRESHOLD
+    three_fingers_direction_threshold: float = config.THREE_FINGERS_DIRECTION_THRESHOLD
+    poke_z_delta: float = config.POKE_Z_DELTA
+    poke_require_extended: bool = config.POKE_REQUIRE_EXTENDED
+    thumbs_y_delta: float = config.THUMBS_Y_DELTA
+    gesture_cooldown_frames: int = config.GESTURE_COOLDOWN_FRAMES
+
+    #gesture templates
+    template_static_threshold: float = config.TEMPLATE_STATIC_THRESHOLD
+    template_dynamic_threshold: float = config.TEMPLATE_DYNAMIC_THRESHOLD
+    template_record_name: str = config.TEMPLATE_RECORD_NAME
+    template_record_kind: str = config.TEMPLATE_RECORD_KIND
+
+    #cursor filter
+    cursor_filter: str = config.CURSOR_FILTER
+    smoothing_factor: float = config.SMOOTHING_FACTOR
+    one_euro_min_cutoff: float = config.ONE_EURO_MIN_CUTOFF
+    one_euro_beta: float = config.ONE_EURO_BETA
+    cursor_max_speed: float = config.CURSOR_MAX_SPEED
+
+    #scroll
+    scroll_step: int = config.SCROLL_STEP
+
+    #action cooldowns
+    click_cooldown: float = config.CLICK_COOLDOWN
+    keyboard_cooldown: float = config.KEYBOARD_COOLDOWN
+    finger_hold_time: float = config.FINGER_HOLD_TIME
+
+    #gesture -> action rules, recompiled into the dispatch table on change
+    gesture_rules: list = field(default_factory=lambda: list(config.GESTURE_RULES))
+
+    #detector
+    max_num_hands: int = config.MAX_NUM_HANDS
+    detection_confidence: float = config.HAND_DETECTION_CONFIDENCE
+    tracking_confidence: float = config.HAND_TRACKING_CONFIDENCE
+    model_complexity: int = config.MODEL_COMPLEXITY
+    detector_input_scale: float = config.DETECTOR_INPUT_SCALE
+
+    @classmethod
+    def from_dict(cls, data):
+        defaults = cls()
+        known = {f.name for f in fields(cls)}
+        values = {}
+
+        for key, value in data.items():
+            if key not in known:
+                print(f"Ignoring unknown config key: {key}")
+                continue
+
+            expected = type(getattr(defaults, key))
+            if expected is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = float(value)
+            elif expected is int and isinstance(value, float) and value.is_integer():
+                value = int(value)
+
+            if type(value) is not expected:
+                print(f"Ignoring config key {key}: expected {expected.__name__}, got {type(value).__name__}")
+                continue
+            values[key] = value
+
+        return cls(**values)
+
+    def detector_changed(self, other, names = DETECTOR_FIELDS):
+        return any(getattr(self, name) != getattr(other, name) for name in names)
+
+    def to_dict(self):
+        return asdict(self)
+
+class ConfigWatcher:
+
+    def __init__(self, path = config.CONFIG_PATH, poll_interval = config.CONFIG_POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.mtime = self.stat_mtime()
+        self.settings = self.load() or RuntimeSettings()
+
+        self.pending = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def stat_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        #Returns None on a broken file so the current settings stay in place
+        if not os.path.exists(self.path):
+            return RuntimeSettings()
+        try:
+            with open(self.path, 'r') as f:
+                text = f.read()
+            data = json.loads(text) if text.strip() else {}
+            if not isinstance(data, dict):
+                raise ValueError("top level must be an object")
+            return RuntimeSettings.from_dict(data)
+        except Exception as e:
+            print(f"Error loading config {self.path}: {e}")
+            return None
+
+    def check(self):
+        mtime = self.stat_mtime()
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+
+        settings = self.load()
+        if settings is None:
+            return False
+        with self.lock:
+            latest = self.pending or self.settings
+            if settings == latest:
+                return False
+            self.pending = settings
+        return True
+
+    def take(self):
+        #Called between frames; hands over a new settings object at most once
+        if self.pending is None:
+            return None
+        with self.lock:
+            settings, self.pending = self.pending, None
+            self.settings = settings
+        return settings
+
+    def poll_loop(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self.check()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.poll_loop, name="config-watcher", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+def update_config_file(path, values):
+    #Merge values into the config file and swap it in with one rename, the watcher never sees a partial file
+    known = {f.name for f in fields(RuntimeSettings)}
+    unknown = sorted(set(values) - known)
+    if unknown:
+        raise ValueError(f"Unknown setting(s): {', '.join(unknown)}")
+    data = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            text = f.read()
+        data = json.loads(text) if text.strip() else {}
+    data.update(values)
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
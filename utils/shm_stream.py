@@ -0,0 +1,208 @@
+#Shared-memory ring buffer of per-frame hand data for local consumers (overlays, analytics)
+#Each slot is guarded by a sequence number: odd while the writer is filling it, even once complete.
+#The writer never waits on readers; a reader that sees the sequence change under it just retries.
+import struct
+import time
+from multiprocessing import shared_memory
+
+from gesture_rec import gesture_config as config
+from utils.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+MAGIC = b"HTLM"
+VERSION = 1
+NUM_LANDMARKS = 21
+
+#magic, version, slots, max_hands, slot_size, latest published frame sequence
+HEADER = struct.Struct("<4sIIIIQ")
+#slot lock sequence, frame sequence, timestamp, frame width, frame height, hand count, gesture, state
+SLOT_HEADER = struct.Struct("<QQdIII32s16s")
+#handedness code, handedness score
+HAND_HEADER = struct.Struct("<If")
+HAND_SIZE = HAND_HEADER.size + NUM_LANDMARKS * 3 * 4
+
+HANDEDNESS_CODES = {"Left": 1, "Right": 2}
+HANDEDNESS_NAMES = {1: "Left", 2: "Right"}
+
+def slot_size(max_hands):
+    size = SLOT_HEADER.size + max_hands * HAND_SIZE + 8
+    return (size + 63) // 64 * 64
+
+def attach(name):
+    #Readers must not unlink the segment on exit, so keep it out of the resource tracker
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+class LandmarkPublisher:
+
+    def __init__(self, name = config.SHM_STREAM_NAME, slots = config.SHM_STREAM_SLOTS, max_hands = 2):
+        self.name = name
+        self.slots = slots
+        self.max_hands = max_hands
+        self.slot_size = slot_size(max_hands)
+        size = HEADER.size + slots * self.slot_size
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            #Left behind by a crashed session, replace it
+            stale = attach(name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.buf = self.shm.buf
+        self.seq = 0
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, slots, max_hands, self.slot_size, 0)
+
+        #Per-slot landmark arrays written in place, (slots, max_hands, 21, 3) float32 views over the segment
+        self.landmark_views = []
+        for slot in range(slots):
+            base = HEADER.size + slot * self.slot_size + SLOT_HEADER.size
+            views = []
+            for hand in range(max_hands):
+                offset = base + hand * HAND_SIZE + HAND_HEADER.size
+                views.append(np.ndarray((NUM_LANDMARKS, 3), dtype=np.float32, buffer=self.buf, offset=offset))
+            self.landmark_views.append(views)
+
+    def publish(self, hands_landmarks, hand_info, gesture, state, frame_shape, timestamp = None):
+        self.seq += 1
+        seq = self.seq
+        slot = seq % self.slots
+        offset = HEADER.size + slot * self.slot_size
+
+        #Odd lock value marks the slot as being written
+        struct.pack_into("<Q", self.buf, offset, 2 * seq - 1)
+
+        count = min(len(hands_landmarks), self.max_hands)
+        for hand in range(count):
+            view = self.landmark_views[slot][hand]
+            for i, lm in enumerate(hands_landmarks[hand]):
+                view[i, 0] = lm['relative_x']
+                view[i, 1] = lm['relative_y']
+                view[i, 2] = lm['z']
+
+            info = hand_info[hand] if hand < len(hand_info) else {}
+            HAND_HEADER.pack_into(
+                self.buf, offset + SLOT_HEADER.size + hand * HAND_SIZE,
+                HANDEDNESS_CODES.get(info.get('handedness'), 0), info.get('score', 0.0),
+            )
+
+        height, width = frame_shape[:2]
+        SLOT_HEADER.pack_into(
+            self.buf, offset,
+            2 * seq - 1, seq, time.time() if timestamp is None else timestamp,
+            width, height, count,
+            str(gesture).encode()[:32], str(state).encode()[:16],
+        )
+
+        #Even lock value publishes the slot, then advertise it in the header
+        struct.pack_into("<Q", self.buf, offset, 2 * seq)
+        struct.pack_into("<Q", self.buf, HEADER.size - 8, seq)
+
+    def close(self):
+        self.landmark_views = []
+        self.buf = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class LandmarkReader:
+
+    def __init__(self, name = config.SHM_STREAM_NAME):
+        self.shm = attach(name)
+        self.buf = self.shm.buf
+        magic, version, self.slots, self.max_hands, self.slot_size, _ = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{name} is not a HandTrack landmark stream (v{VERSION})")
+        self.last_seq = 0
+
+    def latest_seq(self):
+        return struct.unpack_from("<Q", self.buf, HEADER.size - 8)[0]
+
+    def read(self, seq):
+        #Returns the frame with this sequence number, or None if it was overwritten / is being written
+        if seq <= 0:
+            return None
+        offset = HEADER.size + (seq % self.slots) * self.slot_size
+
+        lock, frame_seq, timestamp, width, height, count, gesture, state = SLOT_HEADER.unpack_from(self.buf, offset)
+        if lock != 2 * seq or frame_seq != seq:
+            return None
+
+        hands = []
+        for hand in range(min(count, self.max_hands)):
+            hand_offset = offset + SLOT_HEADER.size + hand * HAND_SIZE
+            code, score = HAND_HEADER.unpack_from(self.buf, hand_offset)
+            landmarks = np.frombuffer(
+                self.buf, dtype=np.float32, count=NUM_LANDMARKS * 3,
+                offset=hand_offset + HAND_HEADER.size,
+            ).reshape(NUM_LANDMARKS, 3).copy()
+            hands.append({
+                'handedness': HANDEDNESS_NAMES.get(code, "Unknown"),
+                'score': score,
+                'landmarks': landmarks,
+            })
+
+        #Writer lapped us while copying
+        if struct.unpack_from("<Q", self.buf, offset)[0] != lock:
+            return None
+
+        return {
+            'seq': seq,
+            'timestamp': timestamp,
+            'frame_width': width,
+            'frame_height': height,
+            'gesture': gesture.rstrip(b"\0").decode(errors="replace"),
+            'state': state.rstrip(b"\0").decode(errors="replace"),
+            'hands': hands,
+        }
+
+    def latest(self, retries = 3):
+        for _ in range(retries):
+            frame = self.read(self.latest_seq())
+            if frame is not None:
+                self.last_seq = max(self.last_seq, frame['seq'])
+                return frame
+        return None
+
+    def read_new(self):
+        #Frames published since the last call, oldest first; frames already overwritten are skipped
+        newest = self.latest_seq()
+        start = max(self.last_seq + 1, newest - self.slots + 1)
+        frames = []
+        for seq in range(start, newest + 1):
+            frame = self.read(seq)
+            if frame is not None:
+                frames.append(frame)
+        self.last_seq = max(self.last_seq, newest)
+        return frames
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+if __name__ == "__main__":
+    reader = LandmarkReader()
+    try:
+        while True:
+            for frame in reader.read_new():
+                tip = frame['hands'][0]['landmarks'][8] if frame['hands'] else None
+                print(f"#{frame['seq']} {frame['state']:<8} {frame['gesture']:<18} index tip: {tip}")
+            time.sleep(0.01)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
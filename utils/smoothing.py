@@ -1,4 +1,4 @@
-import numpy as np
+import math
 
 class PositionalSmoother:
     
@@ -38,7 +38,7 @@ class VelocityLimiter:
         
         dx = x -self.prev_x
         dy = y - self.prev_y
-        distance = np.sqrt(dx * dx + dy * dy)
+        distance = math.hypot(dx, dy)
 
         if distance > self.max_speed:
             scale = self.max_speed / distance
@@ -55,5 +55,92 @@ class VelocityLimiter:
         self.prev_x = None
         self.prev_y = None
 
+class OneEuroFilter:
+    def __init__(self, freq=60.0, min_cutoff=1.5, beta=0.35, d_cutoff=20.0):
+        self.freq = freq  # expected samples/sec, updated from timestamps when they are given
+        self.min_cutoff = min_cutoff
+        self.beta = beta  # velocity sensitivity
+        self.d_cutoff = d_cutoff
+        self.last_time = None
+        self.prev_x = None
+        self.prev_dx = None
+
+    def alpha(self, cutoff):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        te = 1.0 / max(1e-3, self.freq)
+        return 1.0 / (1.0 + tau / te)
+
+    def OneEuroF(self, x, timestamp = None):
+        #Irregular frame spacing (keyframes, motion gate) changes the rate, so follow the real one
+        if timestamp is not None:
+            if self.last_time is not None and timestamp > self.last_time:
+                self.freq = 1.0 / (timestamp - self.last_time)
+            self.last_time = timestamp
+
+        #Estimate dx
+        if self.prev_x is None:
+            dx = 0.0
+        else:
+            dx = (x - self.prev_x) * self.freq
+
+        #Smooth dx
+        a_d = self.alpha(self.d_cutoff)
+        dx_hat = dx if self.prev_dx is None else (a_d * dx + (1 - a_d) * self.prev_dx)
+
+        cutoff = self.min_cutoff + self.beta * abs(dx_hat)
+        a = self.alpha(cutoff)
+        x_hat = x if self.prev_x is None else (a * x + (1 - a) * self.prev_x)
+        self.prev_x = x_hat
+        self.prev_dx = dx_hat
+        return x_hat
+
+    def reset(self):
+        self.last_time = None
+        self.prev_x = None
+        self.prev_dx = None
+
 ExponentialMovingAverage = PositionalSmoother
-#KalmanFilter1D = None 
\ No newline at end of file
+#KalmanFilter1D = None
+
+CURSOR_FILTERS = ("ema", "one_euro")
+
+class CursorFilter:
+    #Cursor position chain: EMA or One Euro per axis, then an optional speed clamp (pixels per second).
+    #The live loop and the offline tuner both run this, so tuned numbers mean the same thing in both.
+
+    def __init__(self, kind = "ema", smoothing_factor = 0.7, min_cutoff = 1.5, beta = 0.35, max_speed = 0.0):
+        if kind not in CURSOR_FILTERS:
+            raise ValueError(f"Unknown cursor filter {kind!r} (expected one of {', '.join(CURSOR_FILTERS)})")
+        self.kind = kind
+        self.ema = PositionalSmoother(smoothing_factor)
+        self.euro_x = OneEuroFilter(min_cutoff=min_cutoff, beta=beta)
+        self.euro_y = OneEuroFilter(min_cutoff=min_cutoff, beta=beta)
+        self.max_speed = max_speed
+        self.limiter = VelocityLimiter()
+        self.last_time = None
+
+    @classmethod
+    def from_settings(cls, settings, clamp = True):
+        return cls(settings.cursor_filter, settings.smoothing_factor, settings.one_euro_min_cutoff,
+                   settings.one_euro_beta, settings.cursor_max_speed if clamp else 0.0)
+
+    def filter(self, x, y, timestamp):
+        if self.kind == "ema":
+            x, y = self.ema.smooth(x, y)
+        else:
+            x = self.euro_x.OneEuroF(x, timestamp)
+            y = self.euro_y.OneEuroF(y, timestamp)
+
+        if self.max_speed > 0.0:
+            dt = timestamp - self.last_time if self.last_time is not None else 0.0
+            self.limiter.max_speed = self.max_speed * max(dt, 1e-3)
+            x, y = self.limiter.limit(x, y)
+        self.last_time = timestamp
+        return (x, y)
+
+    def reset(self):
+        self.ema.reset()
+        self.euro_x.reset()
+        self.euro_y.reset()
+        self.limiter.reset()
+        self.last_time = None
@@ -1,17 +1,81 @@
 from enum import Enum, auto
+from typing import Optional
 
 class ControlState(Enum):
     
     IDLE = auto()
     ACTIVE = auto()
+    TYPING = auto()
+
+class PowerState(Enum):
+
+    ACTIVE = auto()
+    WATCHING = auto()
+    DEEP_IDLE = auto()
 
 class GestureStateMachine:
 
-    def __init__(self):
+    def __init__(self, watch_after: float = 5.0, deep_idle_after: float = 60.0):
         self.state = ControlState.IDLE
 
+        #Power states step down on hand-absence timers and jump back up on a hand (or motion)
+        self.power = PowerState.ACTIVE
+        self.watch_after = watch_after
+        self.deep_idle_after = deep_idle_after
+        self.last_hand_time: Optional[float] = None
+        self.now: Optional[float] = None
+
+    def pending_transition(self) -> Optional[PowerState]:
+        if self.power == PowerState.ACTIVE:
+            return PowerState.WATCHING
+        if self.power == PowerState.WATCHING:
+            return PowerState.DEEP_IDLE
+        return None
+
+    def time_to_transition(self) -> Optional[float]:
+        if self.now is None or self.last_hand_time is None or self.pending_transition() is None:
+            return None
+        deadline = self.watch_after if self.power == PowerState.ACTIVE else self.deep_idle_after
+        return max(0.0, deadline - (self.now - self.last_hand_time))
+
     def progress(self) -> float:
-        return 1.0 if self.state == ControlState.ACTIVE else 0.0
+        #Fraction of the way through the running timed transition (0 when none is running)
+        if self.time_to_transition() is None:
+            return 0.0
+        start = 0.0 if self.power == PowerState.ACTIVE else self.watch_after
+        deadline = self.watch_after if self.power == PowerState.ACTIVE else self.deep_idle_after
+        absent = self.now - self.last_hand_time
+        return max(0.0, min(1.0, (absent - start) / max(1e-6, deadline - start)))
+
+    def tick(self, now: float, hand_present: bool, motion: bool = False) -> PowerState:
+        self.now = now
+        if self.last_hand_time is None:
+            self.last_hand_time = now
+
+        if hand_present:
+            self.last_hand_time = now
+            self.power = PowerState.ACTIVE
+            return self.power
+
+        absent = now - self.last_hand_time
+        if absent >= self.deep_idle_after:
+            self.power = PowerState.DEEP_IDLE
+        elif absent >= self.watch_after:
+            self.power = PowerState.WATCHING
+
+        #Motion in deep idle brings the camera rate back up so a hand is picked up quickly
+        if motion and self.power == PowerState.DEEP_IDLE:
+            self.power = PowerState.WATCHING
+            self.last_hand_time = now - self.watch_after
+
+        return self.power
+
+    def set_typing(self, typing: bool) -> ControlState:
+        if typing:
+            self.state = ControlState.TYPING
+        elif self.state == ControlState.TYPING:
+            self.state = ControlState.ACTIVE
+        return self.state
 
     def update(self, gesture_label: str) -> ControlState:
         if gesture_label == "ThumbsUp":
@@ -19,4 +83,4 @@ class GestureStateMachine:
         elif gesture_label == "ThumbsDown":
             self.state = ControlState.IDLE
 
-        return self.state
\ No newline at end of file
+        return self.state
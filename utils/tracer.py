@@ -0,0 +1,179 @@
+#Opt-in per-frame tracing: begin/end spans in a preallocated ring, dumped as Chrome / Perfetto trace-event JSON
+#Frames slower than slow_frame_ms keep a snapshot of the spans around them so a hitch survives the ring wrapping.
+import gc
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from gesture_rec import gesture_config as config
+
+class Span:
+
+    __slots__ = ("tracer", "name")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        if self.tracer.enabled:
+            self.tracer.record(self.name, "B")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.tracer.enabled:
+            self.tracer.record(self.name, "E")
+        return False
+
+class Tracer:
+
+    def __init__(self, capacity = config.TRACE_CAPACITY, slow_frame_ms = config.TRACE_SLOW_FRAME_MS,
+                 context_frames = config.TRACE_CONTEXT_FRAMES, max_hitches = 32):
+        self.capacity = capacity
+        self.slow_frame_ms = slow_frame_ms
+        self.context_frames = context_frames
+        self.enabled = False
+
+        #Parallel preallocated columns; a slot's seq is -1 while it is being overwritten
+        self.seqs = [-1] * capacity
+        self.names = [None] * capacity
+        self.phases = [None] * capacity
+        self.times = [0] * capacity
+        self.tids = [0] * capacity
+        self.args = [None] * capacity
+        self.counter = itertools.count()
+        #Highest seq written so far, snapshots walk back from it instead of scanning the whole ring
+        self.last_seq = -1
+
+        self.spans = {}
+        self.frame_seqs = deque(maxlen=context_frames + 1)
+        self.frame_start_ns = None
+        self.pending_hitches = []
+        self.hitches = deque(maxlen=max_hitches)
+        self.slow_frames = 0
+
+    def record(self, name, phase, args = None):
+        seq = next(self.counter)
+        i = seq % self.capacity
+        self.seqs[i] = -1
+        self.names[i] = name
+        self.phases[i] = phase
+        self.times[i] = time.perf_counter_ns()
+        self.tids[i] = threading.get_native_id()
+        self.args[i] = args
+        self.seqs[i] = seq
+        if seq > self.last_seq:
+            self.last_seq = seq
+        return seq
+
+    def begin(self, name):
+        if self.enabled:
+            self.record(name, "B")
+
+    def end(self, name):
+        if self.enabled:
+            self.record(name, "E")
+
+    def instant(self, name, args = None):
+        if self.enabled:
+            self.record(name, "i", args)
+
+    def span(self, name):
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = Span(self, name)
+        return span
+
+    def frame_begin(self):
+        if not self.enabled:
+            return
+        self.frame_seqs.append(self.record("frame", "B"))
+        self.frame_start_ns = time.perf_counter_ns()
+
+    def frame_end(self):
+        if not self.enabled or self.frame_start_ns is None:
+            return
+        self.record("frame", "E")
+        frame_ms = (time.perf_counter_ns() - self.frame_start_ns) / 1e6
+
+        #Finish hitches that were waiting for their trailing context frames
+        still_pending = []
+        for hitch in self.pending_hitches:
+            hitch[1] -= 1
+            if hitch[1] <= 0:
+                self.hitches.append(self.snapshot(hitch[0]))
+            else:
+                still_pending.append(hitch)
+        self.pending_hitches = still_pending
+
+        if frame_ms > self.slow_frame_ms:
+            self.slow_frames += 1
+            self.record("slow_frame", "i", {"frame_ms": round(frame_ms, 2)})
+            self.pending_hitches.append([self.frame_seqs[0], self.context_frames])
+
+    def snapshot(self, from_seq = 0):
+        #Only the slots written since from_seq, already in order; slots being (or already) overwritten are skipped
+        events = []
+        end = self.last_seq + 1
+        for seq in range(max(from_seq, end - self.capacity), end):
+            i = seq % self.capacity
+            if self.seqs[i] == seq:
+                events.append((seq, self.names[i], self.phases[i], self.times[i], self.tids[i], self.args[i]))
+        return events
+
+    def gc_callback(self, phase, info):
+        if phase == "start":
+            self.record("gc", "B", {"generation": info.get("generation")})
+        else:
+            self.record("gc", "E", {"collected": info.get("collected")})
+
+    def set_enabled(self, enabled):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if enabled:
+            gc.callbacks.append(self.gc_callback)
+        else:
+            if self.gc_callback in gc.callbacks:
+                gc.callbacks.remove(self.gc_callback)
+            self.frame_start_ns = None
+            self.pending_hitches = []
+
+    def toggle(self):
+        self.set_enabled(not self.enabled)
+        return self.enabled
+
+    def dump(self, path):
+        #Ring contents plus every kept hitch, deduplicated by sequence number
+        merged = {event[0]: event for event in self.snapshot()}
+        for hitch in self.hitches:
+            for event in hitch:
+                merged.setdefault(event[0], event)
+
+        pid = os.getpid()
+        thread_names = {t.native_id: t.name for t in threading.enumerate()}
+        trace_events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        for seq in sorted(merged):
+            _, name, phase, ts, tid, args = merged[seq]
+            event = {"name": name, "ph": phase, "ts": ts / 1000.0, "pid": pid, "tid": tid}
+            if phase == "i":
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+        return path
+
+#Process-wide tracer shared by the main loop, action dispatch and worker threads
+TRACER = Tracer()
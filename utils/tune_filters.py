@@ -0,0 +1,263 @@
+#Offline cursor filter tuning: replays recorded raw pointer tracks ("track" events, EVENT_LOG_TRACKS = True)
+#through CursorFilter candidates on a process pool, scores each parameter set on jitter at rest and lag while
+#moving, prints the Pareto front and optionally writes the chosen set into config.json (hot-reloaded).
+#usage: python -m utils.tune_filters logs/ --search random --samples 4000 --write
+#       python -m utils.tune_filters --synthetic 20   (generated tracks with known ground truth)
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from gesture_rec import gesture_config as config
+from utils.log_stats import read_events
+from utils.runtime_config import ConfigWatcher, update_config_file
+from utils.smoothing import CursorFilter
+
+REST_SPEED = 60.0  #px/s, slower than this (on the reference path) counts as holding still
+MOTION_SPEED = 300.0  #px/s, faster than this counts as deliberate motion
+TRACK_GAP = 0.25  #seconds without a sample splits a recording into separate tracks
+
+#Search space per filter: (low, high, log scale)
+SPACES = {
+    "ema": {"smoothing_factor": (0.05, 1.0, False)},
+    "one_euro": {"min_cutoff": (0.05, 8.0, True), "beta": (1e-4, 0.1, True)},
+}
+MAX_SPEEDS = (0.0, 2000.0, 4000.0, 8000.0, 16000.0)
+
+def load_tracks(paths, since = None, until = None, min_samples = 30):
+    #Concatenate "track" batches and split them at gaps; returns (t, x, y) float arrays per track
+    tracks = []
+    t, x, y = [], [], []
+    for event in read_events(paths, since, until):
+        if event.get("k") != "track":
+            continue
+        for ts, xs, ys in zip(event["ts"], event["x"], event["y"]):
+            if t and not 0.0 < ts - t[-1] <= TRACK_GAP:
+                if len(t) >= min_samples:
+                    tracks.append((np.array(t), np.array(x, dtype=np.float64), np.array(y, dtype=np.float64), None))
+                t, x, y = [], [], []
+            t.append(ts)
+            x.append(xs)
+            y.append(ys)
+    if len(t) >= min_samples:
+        tracks.append((np.array(t), np.array(x, dtype=np.float64), np.array(y, dtype=np.float64), None))
+    return tracks
+
+def synthetic_tracks(count, seconds = 20.0, fps = 30.0, noise = 1.5, seed = 0, screen = (1920, 1080)):
+    #Holds and minimum-jerk reaches with landmark-like jitter and dropped frames; the clean path is the truth
+    rng = np.random.default_rng(seed)
+    tracks = []
+    for _ in range(count):
+        times, points = [], []
+        t = 0.0
+        position = rng.uniform((100, 100), (screen[0] - 100, screen[1] - 100))
+        while t < seconds:
+            hold = rng.uniform(0.4, 2.0)
+            target = rng.uniform((100, 100), (screen[0] - 100, screen[1] - 100))
+            reach = rng.uniform(0.2, 0.8)
+            for k in range(int(hold * fps)):
+                times.append(t)
+                points.append(position)
+                t += 1.0 / fps
+            steps = int(reach * fps)
+            for k in range(1, steps + 1):
+                s = k / steps
+                times.append(t)
+                points.append(position + (target - position) * (10 * s ** 3 - 15 * s ** 4 + 6 * s ** 5))
+                t += 1.0 / fps
+            position = target
+        times = np.array(times)
+        truth = np.array(points)
+        keep = rng.random(len(times)) > 0.05
+        keep[0] = True
+        times, truth = times[keep], truth[keep]
+        raw = truth + rng.normal(0.0, noise, truth.shape)
+        tracks.append((times, raw[:, 0], raw[:, 1], truth))
+    return tracks
+
+def reference_path(track):
+    #Ground truth when known, else a zero-phase (centred) moving average of the raw samples
+    t, x, y, truth = track
+    if truth is not None:
+        return truth[:, 0], truth[:, 1]
+    kernel = np.ones(5) / 5.0
+    rx = np.convolve(np.pad(x, 2, mode="edge"), kernel, mode="valid")
+    ry = np.convolve(np.pad(y, 2, mode="edge"), kernel, mode="valid")
+    return rx, ry
+
+def prepare(tracks):
+    #Per track: samples, reference path, reference speed and rest / motion masks
+    prepared = []
+    for track in tracks:
+        t, x, y, _ = track
+        rx, ry = reference_path(track)
+        dt = np.maximum(np.diff(t, prepend=t[0] - 1.0 / 30.0), 1e-3)
+        speed = np.hypot(np.diff(rx, prepend=rx[0]), np.diff(ry, prepend=ry[0])) / dt
+        prepared.append((t, x, y, rx, ry, speed, speed < REST_SPEED, speed > MOTION_SPEED))
+    return prepared
+
+TRACKS = None
+
+def init_worker(tracks):
+    global TRACKS
+    TRACKS = tracks
+
+def score(params):
+    #(jitter px per frame at rest, lag ms while moving) over all tracks
+    rest_sq = 0.0
+    rest_n = 0
+    lag_px = 0.0
+    lag_speed = 0.0
+    for t, x, y, rx, ry, speed, rest, motion in TRACKS:
+        chain = CursorFilter(**params)
+        out = np.empty((len(t), 2))
+        for i in range(len(t)):
+            out[i] = chain.filter(x[i], y[i], t[i])
+        step = np.hypot(*np.diff(out, axis=0, prepend=out[:1]).T)
+        rest_sq += float(np.sum(step[rest] ** 2))
+        rest_n += int(rest.sum())
+        error = np.hypot(out[:, 0] - rx, out[:, 1] - ry)
+        lag_px += float(error[motion].sum())
+        lag_speed += float(speed[motion].sum())
+    jitter = math.sqrt(rest_sq / max(1, rest_n))
+    lag_ms = 1000.0 * lag_px / max(1e-9, lag_speed)
+    return jitter, lag_ms
+
+def score_chunk(chunk):
+    return [score(params) for params in chunk]
+
+def candidates(kinds, search, samples, seed):
+    rng = np.random.default_rng(seed)
+    out = []
+    per_kind = max(1, samples // len(kinds))
+    for kind in kinds:
+        space = SPACES[kind]
+        if search == "grid":
+            #Same budget spread over an even grid (per axis) times the speed clamps
+            axes = max(2, int(round((per_kind / len(MAX_SPEEDS)) ** (1.0 / len(space)))))
+            grids = []
+            for low, high, log in space.values():
+                grids.append(np.geomspace(low, high, axes) if log else np.linspace(low, high, axes))
+            mesh = np.meshgrid(*grids, indexing="ij")
+            points = np.stack([m.ravel() for m in mesh], axis=1)
+            combos = [(p, s) for p in points for s in MAX_SPEEDS]
+        else:
+            combos = []
+            for _ in range(per_kind):
+                p = []
+                for low, high, log in space.values():
+                    p.append(math.exp(rng.uniform(math.log(low), math.log(high))) if log else rng.uniform(low, high))
+                combos.append((p, MAX_SPEEDS[rng.integers(len(MAX_SPEEDS))]))
+        for point, max_speed in combos:
+            params = {"kind": kind, "max_speed": float(max_speed)}
+            params.update({name: float(v) for name, v in zip(space, point)})
+            out.append(params)
+    return out
+
+def pareto_front(results):
+    #Non-dominated (jitter, lag) points, lowest jitter first
+    front = []
+    best_lag = float("inf")
+    for params, (jitter, lag) in sorted(results, key=lambda r: (r[1][0], r[1][1])):
+        if lag < best_lag:
+            front.append((params, (jitter, lag)))
+            best_lag = lag
+    return front
+
+def pick(front, max_jitter = None, max_lag = None):
+    #Under a limit: the best on the other axis. Otherwise the knee, closest to the origin once both are normalized.
+    if max_jitter is not None:
+        ok = [r for r in front if r[1][0] <= max_jitter]
+        return min(ok, key=lambda r: r[1][1]) if ok else front[0]
+    if max_lag is not None:
+        ok = [r for r in front if r[1][1] <= max_lag]
+        return min(ok, key=lambda r: r[1][0]) if ok else front[-1]
+    jitters = [r[1][0] for r in front]
+    lags = [r[1][1] for r in front]
+    j_span = max(1e-9, max(jitters) - min(jitters))
+    l_span = max(1e-9, max(lags) - min(lags))
+    return min(front, key=lambda r: math.hypot((r[1][0] - min(jitters)) / j_span, (r[1][1] - min(lags)) / l_span))
+
+def to_settings(params):
+    settings = {"cursor_filter": params["kind"], "cursor_max_speed": params["max_speed"]}
+    if params["kind"] == "ema":
+        settings["smoothing_factor"] = round(params["smoothing_factor"], 4)
+    else:
+        settings["one_euro_min_cutoff"] = round(params["min_cutoff"], 4)
+        settings["one_euro_beta"] = round(params["beta"], 6)
+    return settings
+
+def describe(params):
+    return " ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in params.items())
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the cursor filter against recorded pointer tracks")
+    parser.add_argument("paths", nargs="*", default=[config.EVENT_LOG_DIR], help="event log files or directories")
+    parser.add_argument("--since", default=None, help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--until", default=None, help="YYYY-MM-DD (exclusive)")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N generated tracks instead of logs")
+    parser.add_argument("--filters", default="ema,one_euro")
+    parser.add_argument("--search", default="random", choices=["random", "grid"])
+    parser.add_argument("--samples", type=int, default=2000, help="parameter sets to evaluate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-jitter", type=float, default=None, help="pick the least lag under this jitter (px)")
+    parser.add_argument("--max-lag", type=float, default=None, help="pick the least jitter under this lag (ms)")
+    parser.add_argument("--write", action="store_true", help="write the chosen settings to the runtime config")
+    parser.add_argument("--config", default=config.CONFIG_PATH)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        tracks = synthetic_tracks(args.synthetic, seed=args.seed)
+    else:
+        since = time.mktime(time.strptime(args.since, "%Y-%m-%d")) if args.since else None
+        until = time.mktime(time.strptime(args.until, "%Y-%m-%d")) if args.until else None
+        tracks = load_tracks(args.paths, since, until)
+    if not tracks:
+        print("no pointer tracks found (record some with EVENT_LOG_TRACKS = True, or use --synthetic N)")
+        sys.exit(1)
+    prepared = prepare(tracks)
+    samples = sum(len(t[0]) for t in prepared)
+    print(f"{len(prepared)} tracks, {samples} samples")
+
+    params = candidates(args.filters.split(","), args.search, args.samples, args.seed)
+    chunk_size = max(1, len(params) // (4 * max(1, args.workers)))
+    chunks = [params[i:i + chunk_size] for i in range(0, len(params), chunk_size)]
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(prepared,)) as pool:
+        for chunk, scores in zip(chunks, pool.map(score_chunk, chunks)):
+            results.extend(zip(chunk, scores))
+    elapsed = time.perf_counter() - start
+    print(f"{len(results)} parameter sets in {elapsed:.1f} s ({len(results) / elapsed:.0f}/s, {args.workers} workers)")
+
+    #Where the running settings sit (config.json over the defaults, loaded like the app does), for comparison
+    running = ConfigWatcher(args.config).settings
+    current = {"kind": running.cursor_filter, "smoothing_factor": running.smoothing_factor,
+               "min_cutoff": running.one_euro_min_cutoff, "beta": running.one_euro_beta, "max_speed": running.cursor_max_speed}
+    init_worker(prepared)
+    jitter, lag = score(current)
+    print(f"current ({args.config}): jitter {jitter:.2f} px, lag {lag:.1f} ms")
+
+    front = pareto_front(results)
+    print(f"\n== Pareto front ({len(front)} of {len(results)})")
+    print(f"{'jitter px':>10} {'lag ms':>8}  parameters")
+    shown = front if len(front) <= 20 else [front[int(i * (len(front) - 1) / 19)] for i in range(20)]
+    for p, (jitter, lag) in shown:
+        print(f"{jitter:>10.2f} {lag:>8.1f}  {describe(p)}")
+
+    chosen, (jitter, lag) = pick(front, args.max_jitter, args.max_lag)
+    settings = to_settings(chosen)
+    print(f"\nchosen: jitter {jitter:.2f} px, lag {lag:.1f} ms -> {json.dumps(settings)}")
+    if args.write:
+        update_config_file(args.config, settings)
+        print(f"written to {args.config}")
+
+if __name__ == "__main__":
+    main()
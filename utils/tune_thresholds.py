@@ -0,0 +1,194 @@
+#Classifier threshold search: labeled landmark sets are reduced to features once, then thousands of threshold
+#sets are applied in vectorized chunks across a process pool and scored on macro F1. Reports per-gesture
+#precision / recall and the confusion matrix for the current and the best set, and writes the best as a profile.
+#usage: python -m utils.tune_thresholds data/labeled.npz --samples 5000 --profile profiles/thresholds.json [--write]
+#       python -m utils.tune_thresholds --synthetic 2000 --noise 3 --dropout 0.03
+#A dataset is an .npz with landmarks (N, 21, >=2, same pixel units as get_landmarks) and labels (N,) gesture names.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from gesture_rec import gesture_config as config
+from gesture_rec.batch_classifier import (
+    GESTURES, GESTURE_INDEX, THRESHOLDS, classify, confusion, current_thresholds, features, precision_recall,
+)
+from gesture_rec.gesture_class import GestureClassifier
+from utils.runtime_config import update_config_file
+
+#Search ranges: (low, high); finger_tip_threshold is in landmark units (pixels), the rest are ratios
+SPACE = {
+    "pinch_threshold": (0.02, 0.6),
+    "finger_tip_threshold": (-10.0, 20.0),
+    "thumb_extended_ratio": (0.9, 1.5),
+    "finger_extended_ratio": (0.9, 1.5),
+    "thumb_direction_threshold": (0.05, 0.8),
+    "three_fingers_direction_threshold": (0.05, 0.8),
+}
+
+def load_dataset(paths):
+    landmarks, labels = [], []
+    for path in paths:
+        data = np.load(path, allow_pickle=False)
+        landmarks.append(np.asarray(data["landmarks"], dtype=np.float64)[:, :, :3])
+        labels.append(np.asarray(data["labels"]).astype(str))
+    return np.concatenate(landmarks), np.concatenate(labels)
+
+def save_dataset(path, landmarks, labels):
+    np.savez_compressed(path, landmarks=np.asarray(landmarks, dtype=np.float32), labels=np.asarray(labels, dtype=str))
+
+def synthetic_dataset(per_gesture, seed = 0, **gen_kwargs):
+    #Truncated to ints like get_landmarks, so the classifier sees what it would see live
+    from gesture_rec.synthetic import SyntheticHand, POSES
+    hand = SyntheticHand(seed=seed)
+    landmarks, labels = [], []
+    for gesture in POSES:
+        batch = hand.gesture_batch(gesture, per_gesture, **gen_kwargs)
+        batch[..., :2] = np.trunc(batch[..., :2])
+        landmarks.append(batch[..., :3])
+        labels += [gesture] * per_gesture
+    return np.concatenate(landmarks), np.array(labels)
+
+def check_agreement(landmarks, limit = 500):
+    #The batch classifier must stay a faithful copy of classify_gesture
+    classifier = GestureClassifier()
+    idx = np.linspace(0, len(landmarks) - 1, min(limit, len(landmarks))).astype(np.int64)
+    batch = classify(features(landmarks[idx]), current_thresholds(classifier))[0]
+    mismatches = 0
+    for k, i in enumerate(idx):
+        hand = [{'x': p[0], 'y': p[1], 'z': p[2]} for p in landmarks[i]]
+        mismatches += GESTURE_INDEX[classifier.classify_gesture(hand)] != batch[k]
+    return mismatches, len(idx)
+
+def candidates(samples, seed):
+    #Row 0 is the current set, the rest uniform random over SPACE
+    rng = np.random.default_rng(seed)
+    sets = {name: rng.uniform(low, high, samples) for name, (low, high) in SPACE.items()}
+    for name, value in current_thresholds().items():
+        sets[name][0] = value
+    return sets
+
+FEATURES = None
+TRUE = None
+
+def init_worker(feats, true):
+    global FEATURES, TRUE
+    FEATURES = feats
+    TRUE = true
+
+def macro_scores(matrices, present):
+    #Macro F1 over the gestures that occur in the data, plus accuracy, per threshold set
+    tp = np.diagonal(matrices, axis1=1, axis2=2).astype(np.float64)
+    predicted = matrices.sum(axis=1)
+    actual = matrices.sum(axis=2)
+    f1 = np.where(predicted + actual > 0, 2.0 * tp / np.maximum(1, predicted + actual), 0.0)
+    accuracy = tp.sum(axis=1) / np.maximum(1, actual.sum(axis=1))
+    return f1[:, present].mean(axis=1), accuracy
+
+def score_chunk(chunk):
+    matrices = confusion(TRUE, classify(FEATURES, chunk))
+    present = np.bincount(TRUE, minlength=len(GESTURES)) > 0
+    return macro_scores(matrices, present)
+
+def report(title, matrix, out):
+    precision, recall = precision_recall(matrix)
+    present = matrix.sum(axis=1) > 0
+    print(f"\n== {title}: accuracy {np.trace(matrix) / max(1, matrix.sum()):.3f}", file=out)
+    print(f"{'gesture':<18} {'precision':>9} {'recall':>7} {'n':>6}", file=out)
+    for i, name in enumerate(GESTURES):
+        if present[i] or matrix[:, i].sum():
+            p = "-" if np.isnan(precision[i]) else f"{precision[i]:.3f}"
+            r = "-" if np.isnan(recall[i]) else f"{recall[i]:.3f}"
+            print(f"{name:<18} {p:>9} {r:>7} {int(matrix[i].sum()):>6}", file=out)
+
+    #Confusion matrix over the rows / columns that are used, abbreviated headers
+    used = [i for i in range(len(GESTURES)) if matrix[i].sum() or matrix[:, i].sum()]
+    short = {i: GESTURES[i][:6] for i in used}
+    print("\ntrue \\ predicted  " + " ".join(f"{short[i]:>6}" for i in used), file=out)
+    for i in used:
+        print(f"{GESTURES[i]:<17} " + " ".join(f"{int(matrix[i, j]):>6}" for j in used), file=out)
+
+def main():
+    parser = argparse.ArgumentParser(description="Search classifier thresholds against labeled landmarks")
+    parser.add_argument("datasets", nargs="*", help=".npz files with landmarks and labels")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N poses per gesture instead")
+    parser.add_argument("--noise", type=float, default=2.0, help="synthetic landmark noise (px)")
+    parser.add_argument("--dropout", type=float, default=0.02, help="synthetic occluded-landmark rate")
+    parser.add_argument("--samples", type=int, default=5000, help="threshold sets to evaluate")
+    parser.add_argument("--holdout", type=float, default=0.25, help="fraction kept out of the search for reporting")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=64, help="threshold sets per vectorized batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default=os.path.join(config.CALIBRATION_PROFILE_DIR, "classifier_thresholds.json"))
+    parser.add_argument("--write", action="store_true", help="also merge the best set into the runtime config")
+    parser.add_argument("--config", default=config.CONFIG_PATH)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        landmarks, labels = synthetic_dataset(args.synthetic, args.seed, noise=args.noise, dropout=args.dropout)
+    elif args.datasets:
+        landmarks, labels = load_dataset(args.datasets)
+    else:
+        print("no data: pass .npz datasets or --synthetic N")
+        sys.exit(1)
+    unknown = sorted(set(labels) - set(GESTURES))
+    if unknown:
+        print(f"unknown gesture labels in the data: {', '.join(unknown)}")
+        sys.exit(1)
+    true = np.array([GESTURE_INDEX[name] for name in labels], dtype=np.int64)
+
+    mismatches, checked = check_agreement(landmarks)
+    print(f"{len(labels)} labeled hands; batch vs scalar classifier: {mismatches} / {checked} disagree")
+
+    #Random split: shuffle, search on one part, report on the other
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(labels))
+    cut = int(len(order) * (1.0 - args.holdout))
+    search_idx, hold_idx = order[:cut], order[cut:]
+    search_features = features(landmarks[search_idx])
+
+    sets = candidates(args.samples, args.seed)
+    chunks = [{name: values[i:i + args.chunk] for name, values in sets.items()} for i in range(0, args.samples, args.chunk)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(search_features, true[search_idx])) as pool:
+        results = list(pool.map(score_chunk, chunks))
+    elapsed = time.perf_counter() - start
+    f1 = np.concatenate([r[0] for r in results])
+    accuracy = np.concatenate([r[1] for r in results])
+    print(f"{args.samples} threshold sets x {len(search_idx)} hands in {elapsed:.1f} s "
+          f"({args.samples * len(search_idx) / elapsed / 1e6:.1f} M classifications/s, {args.workers} workers)")
+
+    print(f"\n== top sets (search split, macro F1 / accuracy; current: {f1[0]:.3f} / {accuracy[0]:.3f})")
+    print(" ".join(f"{name[:14]:>14}" for name in THRESHOLDS) + f" {'F1':>6} {'acc':>6}")
+    for i in np.argsort(-f1)[:10]:
+        print(" ".join(f"{sets[name][i]:>14.4f}" for name in THRESHOLDS) + f" {f1[i]:>6.3f} {accuracy[i]:>6.3f}")
+
+    best = int(np.argmax(f1))
+    best_set = {name: float(sets[name][best]) for name in THRESHOLDS}
+    evaluate = hold_idx if len(hold_idx) else search_idx
+    held = features(landmarks[evaluate])
+    split = "held-out" if len(hold_idx) else "search"
+    for title, thresholds in (("current", current_thresholds()), ("best", best_set)):
+        matrix = confusion(true[evaluate], classify(held, thresholds))[0]
+        report(f"{title} thresholds, {split} split ({len(evaluate)} hands)", matrix, sys.stdout)
+
+    profile = {name: round(value, 5) for name, value in best_set.items()}
+    directory = os.path.dirname(args.profile)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.profile, "w") as f:
+        json.dump(profile, f, indent=2)
+        f.write("\n")
+    print(f"\nbest set written to {args.profile}: {json.dumps(profile)}")
+    if args.write:
+        update_config_file(args.config, profile)
+        print(f"merged into {args.config}")
+
+if __name__ == "__main__":
+    main()